@@ -0,0 +1,81 @@
+"""
+Import-time benchmark of the CLI and the content generation modules.
+
+Imports each module in a fresh interpreter, several times, and reports the median
+wall time of the import plus which heavy third-party packages it pulled in. Starting a
+cache-only run should not load LangChain, the OpenAI client, requests, BeautifulSoup or
+NumPy: those are imported on first use.
+
+Usage (from the repository root):
+    python -m benchmarks.import_benchmark
+    python -m benchmarks.import_benchmark --modules main --repeat 10
+    python -m benchmarks.import_benchmark --json imports.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["main", "src.marketing_content_gen", "src.marketing_content_gen_with_planner"]
+HEAVY_MODULES = [
+    "langchain", "langchain_core", "langchain_openai", "openai", "tiktoken",
+    "requests", "urllib3", "bs4", "httpx", "numpy",
+]
+
+# Runs in the child interpreter: time the import, then list the heavy packages it loaded.
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+__import__({module!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeat: int) -> dict:
+    samples = []
+    loaded = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            capture_output=True, text=True, check=True,
+        )
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        samples.append(result["seconds"])
+        loaded = result["loaded"]
+    return {
+        "module": module,
+        "median_seconds": statistics.median(samples),
+        "min_seconds": min(samples),
+        "heavy_modules_loaded": loaded,
+    }
+
+
+def print_table(rows):
+    header = f"{'module':<42} {'median ms':>10} {'min ms':>8}  heavy modules loaded"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['module']:<42} {row['median_seconds'] * 1000:>10.1f} {row['min_seconds'] * 1000:>8.1f}  "
+            f"{', '.join(row['heavy_modules_loaded']) or '-'}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark module import times in fresh interpreters.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="Modules to import.")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    rows = [measure(module, args.repeat) for module in args.modules]
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+End-to-end benchmark of the landing page pipeline against the offline fake LLM.
+
+Runs main.py's flow (crawl -> analyse -> pitch -> rewrite -> render) over synthetic
+playbooks and reports throughput, per-target p50/p99 latency and peak RSS. Pages are
+served by a local HTTP stand-in, the LLM by `FakeChatModel`, so nothing leaves the machine
+and the numbers measure the pipeline's own overhead (HTML parsing, cache I/O, prompt
+building, JSON parsing) plus the simulated LLM latency.
+
+Usage (from the repository root):
+    python -m benchmarks.pipeline_benchmark
+    python -m benchmarks.pipeline_benchmark --sizes 10 1000 --latency lognormal:0.2
+    python -m benchmarks.pipeline_benchmark --sizes 100000 --json results.json
+    python -m benchmarks.pipeline_benchmark --sizes 1000 --batch-rewrites
+    python -m benchmarks.pipeline_benchmark --sizes 10000 --warm --workers 4
+
+Each size runs in a fresh interpreter so peak RSS is not inflated by earlier runs.
+With --warm, the playbook is run once to fill the cache and the timed run is the rebuild.
+"""
+import argparse
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_SIZES = [10, 1000, 100000]
+COMPANY_INFO_PATH = "data/company_info.json"
+HTML_PATH = "data/landing_page.html"
+POSITIONS = [
+    {"placeholder": "hs_cos_wrapper_banner"},
+    {"placeholder": "hs_cos_wrapper_widget_1611686344563"},
+    {"placeholder": "hs_cos_wrapper_widget_1609866779313"},
+]
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        name = self.path.strip("/")
+        body = (
+            f"<html><head><title>{name}</title><meta name=\"description\" content=\"{name} home\"></head>"
+            f"<body>{'<p>We serve customers across the region with quality products and services.</p>' * 20}"
+            f"</body></html>"
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def write_synthetic_target_info(path: str, targets: int, base_url: str):
+    """
+    Playbook in the target_info.json layout: mostly accounts, plus a few of each other section.
+    """
+    def record(i: int, name: str) -> dict:
+        return {"data": [
+            {"id": f"text-{i}", "type": "text", "value": f"{name} is a mid-size business looking to modernise finance."},
+            {"id": f"url-{i}", "type": "url", "value": f"{base_url}/{name.replace(' ', '-').lower()}"},
+        ], "meta": {"position": i}}
+
+    others = min(targets // 10, 30)
+    accounts = targets - 3 * others
+    target_info = {
+        "Accounts": {f"Account {i:06d}": record(i, f"Account {i:06d}") for i in range(accounts)},
+        "Industries": {f"Industry {i:03d}": record(i, f"Industry {i:03d}") for i in range(others)},
+        "Personas": {f"Persona {i:03d}": record(i, f"Persona {i:03d}") for i in range(others)},
+        "Healthcare Subverticals": {f"Subvertical {i:03d}": record(i, f"Subvertical {i:03d}") for i in range(others)},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(target_info, f)
+
+
+def parse_latency(spec: str):
+    """
+    "0" | "constant:S" | "uniform:LOW:HIGH" | "lognormal:MEDIAN[:SIGMA]" (seconds).
+    """
+    from src_.core.fake_llm import constant_latency, lognormal_latency, uniform_latency
+
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(":") if v]
+    if kind in ("0", "none"):
+        return None
+    if kind == "constant":
+        return constant_latency(*values)
+    if kind == "uniform":
+        return uniform_latency(*values, seed=0)
+    if kind == "lognormal":
+        return lognormal_latency(*values, seed=0)
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def install_fake_llm(latency_spec: str):
+    """
+    Answer every LLM call with `FakeChatModel`; also run in each --workers process.
+    """
+    from src_.core.fake_llm import fake_chat_model_factory
+    from src_.core.llm_backend import set_chat_model_factory
+
+    set_chat_model_factory(fake_chat_model_factory(latency=parse_latency(latency_spec)))
+
+
+def run_once(
+    targets: int,
+    latency_spec: str,
+    max_concurrency: int,
+    batch_rewrites: bool = False,
+    workers: int = 1,
+    warm: bool = False,
+) -> dict:
+    """
+    One benchmark run in this interpreter, with a cold cache in a temporary directory
+    (or, with `warm`, a rebuild over the cache filled by an untimed first run).
+    """
+    from src_.core.base_agent import set_max_concurrency
+    from src_.core.landing_page_pipeline import LandingPageRun, company_info_text
+    from src_.core.metrics import metrics
+    from src_.core.pipeline import targets_from_grouped_info
+    from src_.core.response_cache import ResponseCache, set_default_response_cache
+    from src_.core.sharded_run import WorkerSettings, run_sharded
+    from src_.entity.cache import Cache
+    from src_.entity.playbook import Playbook
+
+    install_fake_llm(latency_spec)
+    set_max_concurrency(max_concurrency)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    workdir = tempfile.mkdtemp(prefix="pipeline-bench-")
+    try:
+        target_info_path = os.path.join(workdir, "target_info.json")
+        write_synthetic_target_info(target_info_path, targets, f"http://127.0.0.1:{server.server_address[1]}")
+
+        def timed_run():
+            started = time.perf_counter()
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                set_default_response_cache(ResponseCache(max_entries=4 * targets + 16))
+                playbook = Playbook.load(COMPANY_INFO_PATH, target_info_path)
+                cache = Cache(os.path.join(workdir, "cache.db"))
+                cache.update_company_info(playbook.company_info)
+                run = LandingPageRun(
+                    cache=cache,
+                    company_info_text=company_info_text(cache, playbook.company_info.company_name),
+                    html_path=HTML_PATH,
+                    positions=POSITIONS,
+                    output_dir=os.path.join(workdir, "output"),
+                    batch_rewrites=batch_rewrites,
+                )
+                pipeline_targets = targets_from_grouped_info(playbook.target_info_grouping())
+                if workers > 1:
+                    results = run_sharded(run, pipeline_targets, workers, WorkerSettings(
+                        max_concurrency=max_concurrency, setup=functools.partial(install_fake_llm, latency_spec),
+                    ))
+                else:
+                    results = asyncio.run(run.run(pipeline_targets))
+            return results, time.perf_counter() - started
+
+        if warm:
+            timed_run()
+            metrics.reset()
+        results, wall = timed_run()
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    latencies = [target.elapsed for target in results]
+    failed = sum(1 for target in results if "failed" in target.status.values())
+    return {
+        "targets": len(results),
+        "workers": workers,
+        "failed": failed,
+        "latency": latency_spec,
+        "wall_seconds": round(wall, 3),
+        "throughput_per_second": round(len(results) / wall, 2),
+        "p50_seconds": round(statistics.median(latencies), 4),
+        "p99_seconds": round(percentile(latencies, 0.99), 4),
+        "peak_rss_mb": round(peak_rss_bytes() / 2 ** 20, 1),
+        "llm_requests": sum(t["count"] for t in metrics.snapshot()["timings"].get("llm_request_seconds", [])),
+    }
+
+
+def print_table(rows):
+    header = f"{'targets':>8} {'workers':>7} {'failed':>6} {'wall s':>9} {'targets/s':>10} {'p50 s':>8} {'p99 s':>8} {'peak RSS MB':>12} {'LLM calls':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['targets']:>8} {row['workers']:>7} {row['failed']:>6} {row['wall_seconds']:>9.2f} {row['throughput_per_second']:>10.1f} "
+            f"{row['p50_seconds']:>8.3f} {row['p99_seconds']:>8.3f} {row['peak_rss_mb']:>12.1f} {row['llm_requests']:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the landing page pipeline with a fake LLM.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Playbook sizes (targets).")
+    parser.add_argument("--latency", default="0", help="Fake LLM latency, e.g. 0, constant:0.1, lognormal:0.5:0.6")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="In-flight LLM calls.")
+    parser.add_argument("--batch-rewrites", action="store_true", help="Rewrite several targets per LLM request.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="Process counts to compare (--workers).")
+    parser.add_argument("--warm", action="store_true", help="Time a rebuild over a warm cache instead of a cold run.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        print(json.dumps(run_once(
+            args.single, args.latency, args.max_concurrency, args.batch_rewrites, args.workers[0], args.warm
+        )))
+        return
+
+    rows = []
+    for size in args.sizes:
+        for workers in args.workers:
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.pipeline_benchmark", "--single", str(size),
+                 "--latency", args.latency, "--max-concurrency", str(args.max_concurrency),
+                 "--workers", str(workers)]
+                + (["--batch-rewrites"] if args.batch_rewrites else [])
+                + (["--warm"] if args.warm else []),
+                capture_output=True, text=True, check=True,
+            )
+            rows.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark of the playbook diff that decides which targets a run schedules.
+
+For each playbook size, a snapshot of the previous version is recorded in a cache store,
+then a new version with 1% of the targets changed, 0.5% removed and 0.5% added is diffed
+against it the way `IncrementalSchedule` does: load the stored digests, digest and compare
+every target, then drop the removed ones.
+
+Reported: time to record the snapshot, to load it back, to digest and diff the new version
+(and per target), and how many targets the run would schedule.
+
+Usage (from the repository root):
+    python -m benchmarks.playbook_diff_benchmark
+    python -m benchmarks.playbook_diff_benchmark --sizes 10000 500000 --json diff.json
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from src_.entity.cache import Cache
+from src_.entity.playbook_diff import PlaybookDiffer, digest_target
+
+DEFAULT_SIZES = [10000, 500000]
+
+
+def _playbook(size: int, version: int):
+    """
+    (cache key, {"url", "text"}) of a synthetic playbook; version 1 edits, drops and adds a few targets.
+    """
+    for i in range(size):
+        if version and i % 200 == 0:
+            continue  # removed
+        text = f"Account {i} runs community centers"
+        if version and i % 100 == 1:
+            text += " and schools"  # changed
+        yield f"accounts:Account {i}", {"url": f"https://example.com/{i}", "text": text}
+    if version:
+        for i in range(size, size + size // 200):
+            yield f"accounts:Account {i}", {"url": f"https://example.com/{i}"}
+
+
+def measure(size: int, workdir: str) -> dict:
+    cache = Cache(os.path.join(workdir, f"cache_{size}.db"))
+    started = time.perf_counter()
+    cache.record_target_digests({key: digest_target(info) for key, info in _playbook(size, 0)})
+    record_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    previous = cache.load_target_digests()
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    differ = PlaybookDiffer(previous)
+    targets = 0
+    for key, info in _playbook(size, 1):
+        differ.compare(key, digest_target(info))
+        targets += 1
+    diff = differ.finish()
+    diff_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    cache.remove_targets(diff.removed)
+    remove_seconds = time.perf_counter() - started
+    return {
+        "size": size,
+        "record_seconds": record_seconds,
+        "load_seconds": load_seconds,
+        "diff_seconds": diff_seconds,
+        "diff_us_per_target": diff_seconds / targets * 1e6,
+        "remove_seconds": remove_seconds,
+        "scheduled": len(diff.affected),
+        "removed": len(diff.removed),
+    }
+
+
+def print_table(rows):
+    header = (f"{'targets':>8} {'record s':>9} {'load s':>7} {'diff s':>7} {'diff us/target':>15} "
+              f"{'remove s':>9} {'scheduled':>10} {'removed':>8}")
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['size']:>8} {row['record_seconds']:>9.2f} {row['load_seconds']:>7.2f} {row['diff_seconds']:>7.2f} "
+            f"{row['diff_us_per_target']:>15.2f} {row['remove_seconds']:>9.2f} {row['scheduled']:>10} {row['removed']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark diffing a playbook against the last run.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Playbook sizes (targets).")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        rows = [measure(size, workdir) for size in args.sizes]
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
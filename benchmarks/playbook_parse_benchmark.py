@@ -0,0 +1,256 @@
+"""
+Benchmark of target_info.json parsing: the single-pass record parser and the streaming
+reader against the per-consumer parsers they replaced.
+
+For each playbook size, a synthetic target_info.json (and the same targets as JSON Lines)
+is written once and every mode runs in a fresh interpreter:
+
+    legacy   Playbook.load + target_info_grouping, then PlaybookParser.parse_targets,
+             categorize_playbook_data and parse_target_info, each re-reading the file
+    records  PlaybookTargets.from_json once, then the four views
+    stream   stream_target_records -> targets_from_records, consumed one target at a time
+             the way main.py feeds the pipeline (no views)
+    jsonl    the same from the JSON Lines file
+
+Reported: time to the first and to all pipeline targets, time to all four shapes, memory
+held once the playbook is parsed and the tracemalloc peak while parsing (both in a separate
+run), and peak RSS.
+
+Usage (from the repository root):
+    python -m benchmarks.playbook_parse_benchmark
+    python -m benchmarks.playbook_parse_benchmark --sizes 10000 500000 --json parse.json
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.pipeline_benchmark import peak_rss_bytes, write_synthetic_target_info
+
+DEFAULT_SIZES = [10000, 500000]
+MODES = ["legacy", "records", "stream", "jsonl"]
+STREAMING_MODES = ("stream", "jsonl")
+
+
+def _legacy_load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _legacy_grouping(target_data: dict) -> dict:
+    # The four per-section loops of the former Playbook.target_info_grouping.
+    grouped_info = {}
+    for section_key, section_name in (
+        ("Accounts", "accounts"), ("Industries", "industries"),
+        ("Personas", "personas"), ("Healthcare Subverticals", "healthcare_subverticals"),
+    ):
+        grouped = grouped_info[section_name] = {}
+        for name, target in target_data[section_key].items():
+            values = {}
+            for entry in target.get("data", []):
+                if "value" in entry:
+                    if entry["type"] == "url":
+                        values["url"] = entry["value"]
+                    elif entry["type"] == "text":
+                        values["text"] = entry["value"]
+            if values:
+                grouped[name] = values
+    return grouped_info
+
+
+def _legacy_parse_targets(path: str) -> list:
+    # The former PlaybookParser.parse_targets, which loaded the file again.
+    results = []
+    for target_type, targets in _legacy_load(path).items():
+        if target_type == "meta":
+            continue
+        for name, target in targets.items():
+            if name == "meta" or not isinstance(target, dict):
+                continue
+            context = " ".join(
+                item["value"].strip() for item in target.get("data", [])
+                if item.get("type") in ("text", "url") and item.get("value", "").strip()
+            )
+            if context:
+                results.append({"target_type": target_type, "name": name, "context": context})
+    return results
+
+
+def _legacy_categorize(targets: list) -> dict:
+    categories = {"Accounts": "accounts", "Personas": "personas", "Industries": "industries",
+                  "Healthcare Subverticals": "subverticals"}
+    categorized = {category: [] for category in categories.values()}
+    for target in targets:
+        category = categories.get(target["target_type"])
+        if category:
+            categorized[category].append({"name": target["name"], "context": target["context"]})
+    return categorized
+
+
+def _legacy_descriptions(path: str) -> dict:
+    # The former parse_target_info, which loaded the file a third time.
+    data = _legacy_load(path)
+    parsed = {}
+    for section_key, category in (
+        ("Accounts", "accounts"), ("Industries", "industries"),
+        ("Personas", "personas"), ("Healthcare Subverticals", "subverticals"),
+    ):
+        parsed[category] = []
+        for name, details in data.get(section_key, {}).items():
+            if name == "meta":
+                continue
+            description = url = ""
+            for entry in details.get("data", []):
+                if entry["type"] == "text":
+                    description = entry["value"]
+                elif entry["type"] == "url":
+                    url = entry["value"]
+            parsed[category].append({"name": name, "description": description, "url": url})
+    return parsed
+
+
+def write_json_lines(source_path: str, path: str):
+    """
+    The targets of a target_info.json as JSON Lines, one {"section", "name", "data"} per line.
+    """
+    with open(source_path, "r", encoding="utf-8") as f:
+        target_info = json.load(f)
+    with open(path, "w", encoding="utf-8") as f:
+        for section, targets in target_info.items():
+            for name, target in targets.items():
+                f.write(json.dumps({"section": section, "name": name, "data": target["data"]}) + "\n")
+
+
+def load(mode: str, path: str):
+    """
+    What a Playbook keeps in memory after loading.
+    """
+    if mode == "legacy":
+        return _legacy_load(path)
+    from src_.entity.target_records import PlaybookTargets
+    return PlaybookTargets.from_json(path)
+
+
+def consume_stream(path: str, on_first=None) -> int:
+    from src_.core.pipeline import targets_from_records
+    from src_.entity.target_records import stream_target_records
+
+    count = 0
+    for _ in targets_from_records(stream_target_records(path)):
+        if count == 0 and on_first is not None:
+            on_first()
+        count += 1
+    return count
+
+
+def run_once(mode: str, path: str, measure_memory: bool) -> dict:
+    if measure_memory:
+        gc.collect()
+        tracemalloc.start()
+        loaded = consume_stream(path) if mode in STREAMING_MODES else load(mode, path)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del loaded
+        return {"retained_mb": retained / 1e6, "traced_peak_mb": peak / 1e6}
+
+    started = time.perf_counter()
+    if mode in STREAMING_MODES:
+        first = []
+        targets = consume_stream(path, on_first=lambda: first.append(time.perf_counter() - started))
+        elapsed = time.perf_counter() - started
+        return {
+            "first_target_seconds": first[0],
+            "grouping_seconds": elapsed,
+            "all_views_seconds": None,
+            "targets": targets,
+            "peak_rss_mb": peak_rss_bytes() / 1e6,
+        }
+
+    loaded = load(mode, path)
+    grouped = _legacy_grouping(loaded) if mode == "legacy" else loaded.grouping()
+    grouping_seconds = time.perf_counter() - started
+    if mode == "legacy":
+        flattened = _legacy_parse_targets(path)
+        views = [grouped, flattened, _legacy_categorize(flattened), _legacy_descriptions(path)]
+    else:
+        views = [grouped, loaded.flattened(), loaded.categorized(), loaded.descriptions()]
+    all_views_seconds = time.perf_counter() - started
+    return {
+        "first_target_seconds": grouping_seconds,
+        "grouping_seconds": grouping_seconds,
+        "all_views_seconds": all_views_seconds,
+        "targets": sum(len(section) for section in grouped.values()),
+        "peak_rss_mb": peak_rss_bytes() / 1e6,
+        "views": len(views),
+    }
+
+
+def _run_child(mode: str, path: str, measure_memory: bool) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.playbook_parse_benchmark", "--single", mode, path]
+        + (["--memory"] if measure_memory else []),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def print_table(rows):
+    header = (f"{'targets':>8} {'mode':>8} {'first s':>8} {'targets s':>10} {'all views s':>12} "
+              f"{'retained MB':>12} {'traced peak MB':>15} {'peak RSS MB':>12}")
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        all_views = f"{row['all_views_seconds']:.2f}" if row["all_views_seconds"] is not None else "-"
+        print(
+            f"{row['size']:>8} {row['mode']:>8} {row['first_target_seconds']:>8.2f} {row['grouping_seconds']:>10.2f} "
+            f"{all_views:>12} {row['retained_mb']:>12.1f} {row['traced_peak_mb']:>15.1f} {row['peak_rss_mb']:>12.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark target_info.json parsing.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Playbook sizes (targets).")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    parser.add_argument("--single", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    parser.add_argument("--memory", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--write", nargs=2, metavar=("SIZE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.write is not None:
+        size, path = args.write
+        write_synthetic_target_info(path, int(size), "https://example.com")
+        write_json_lines(path, path + "l")
+        return
+    if args.single is not None:
+        print(json.dumps(run_once(*args.single, measure_memory=args.memory)))
+        return
+
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            path = os.path.join(workdir, f"target_info_{size}.json")
+            json_lines_path = path + "l"
+            # Written by a child: ru_maxrss carries this process's memory over into the measured ones.
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.playbook_parse_benchmark", "--write", str(size), path], check=True
+            )
+            for mode in MODES:
+                source = json_lines_path if mode == "jsonl" else path
+                row = {"size": size, "mode": mode}
+                row.update(_run_child(mode, source, measure_memory=False))
+                row.update(_run_child(mode, source, measure_memory=True))
+                rows.append(row)
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
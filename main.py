@@ -1,138 +1,188 @@
-from datetime import datetime
-import json
+import argparse
+import asyncio
 import os
-from src.marketing_content_gen_with_planner import generate_replacement_content
-from src_.utils import url_content_crawler
-from src_.utils.gen_customized_web_content import extract_tagged_content_from_html, generate_customized_web_content
-from src_.utils.gen_marketing_pitch import generate_marketing_pitch
-from src_.entity.playbook import Playbook
+from src_.core.base_agent import set_max_concurrency
+from src_.core.llm_backend import llm_pool_stats
+from src_.core.landing_page_pipeline import LandingPageRun, company_info_text
+from src_.core.incremental import IncrementalSchedule
+from src_.core.metrics import metrics
+from src_.core.rate_limiter import ModelLimits, set_rate_limits
+from src_.core.pipeline import targets_from_records
+from src_.core.run_journal import RunJournal
+from src_.core.sharded_run import WorkerSettings, run_sharded
+from src_.utils.file_lock import atomic_write
+from src_.utils.recrawl import detect_changed_pages
+from src_.core.response_cache import ResponseCache, set_default_response_cache
+from src_.entity.playbook import CompanyInfo
 from src_.entity.cache import Cache
-from src_.entity.field_template import FieldTemplate
+from src_.entity.target_records import PlaybookTargets, stream_target_records
 
 
 company_info_path = 'data/company_info.json'
+# target_info.json layout, or JSON Lines (.jsonl) with one target per line.
 target_info_path = 'data/target_info.json'
-cache_path = 'cache/cache.json'
+cache_path = 'cache/cache.db'
+# Pre-SQLite cache file, imported into the store once if present.
+legacy_cache_path = 'cache/cache.json'
 html_path = 'data/landing_page.html'
+output_dir = 'output'
+# Raw LLM responses, shared across runs so identical prompts cost no API calls.
+response_cache_path = 'cache/llm_responses.db'
+# Finished (target, stage) units of the last run, read back by --resume.
+journal_path = 'cache/run_journal.jsonl'
 
-
-playbook = Playbook.load(company_info_path, target_info_path)
-if not os.path.exists('cache'):
-    os.makedirs("cache", exist_ok=True)
-# create cache if not exists, create the file first
-if not os.path.exists(cache_path):
-    with open(cache_path, 'w') as f:
-        json.dump({}, f)
-        
-cache = Cache(cache_path)
-grouped_info = playbook.target_info_grouping()
-# cache.update_cache_with_grouped_target_info(grouping_info)
-cache.update_company_info(playbook.company_info)
-# Persist updated cache
-# update cache with first 10 grouped info
-
-# print(company_info)
-cache.save_cache()
+# How many LLM requests may be in flight at once across all targets.
+MAX_CONCURRENCY = 16
+# Provider budgets per model (OpenAI tier 1 defaults, adjust to the account's tier).
+# Requests queue in arrival order instead of running into 429s.
+RATE_LIMITS = {
+    "gpt-4o": ModelLimits(requests_per_minute=500, tokens_per_minute=30000),
+    "gpt-3.5-turbo": ModelLimits(requests_per_minute=3500, tokens_per_minute=200000),
+}
+# Per-stage caps: page fetches in flight, and output writes running in worker threads.
+CRAWL_CONCURRENCY = 20
+RENDER_CONCURRENCY = 8
 
 positions = [
-    {"placeholder": "hs_cos_wrapper_banner"},   # Banner 
+    {"placeholder": "hs_cos_wrapper_banner"},   # Banner
     {"placeholder": "hs_cos_wrapper_widget_1611686344563"},  # Main headline
     {"placeholder": "hs_cos_wrapper_widget_1609866779313"}    # Content paragraph
 ]
 
 
-cache_data = cache.cache_data
-company_info_from_cache = cache_data['company:'+playbook.company_info.company_name]
-# print(f"[DEBUG] company_info_from_cache: {company_info_from_cache}")
-company_info_text = company_info_from_cache.to_string()
+async def main(
+    refresh: bool = False,
+    sections: list = None,
+    metrics_json: str = None,
+    metrics_prom: str = None,
+    batch_rewrites: bool = False,
+    resume: bool = False,
+    workers: int = 1,
+    target_info: str = target_info_path,
+    full: bool = False,
+):
+    # Loaded here rather than at import, so --workers processes do not each load the playbook again.
+    company_info = CompanyInfo.from_json(company_info_path)
+    os.makedirs("cache", exist_ok=True)
+    set_default_response_cache(ResponseCache(response_cache_path))
 
-# test with accounts only from the target.
-for section_name, section_data in grouped_info.items():
-    # if section_name == 'accounts':
-        for key, value_dict in section_data.items():
-            cache_key = f"{section_name}:{key}"
-            text = value_dict.get("text")
-            url = value_dict.get("url", "")
-            
-            print(f"[DEBUG] text: {text}")
-            print(f"[DEBUG] url: {url}")        
-            target_audience = key
-            # Prepare new entry basic info
-            new_entry = FieldTemplate(
-                text=text,
-                url=url
-            )
-            cached_entry = cache_data.get(cache_key)
-            if cached_entry:
-                # If cache exists, compare URL
-                if cached_entry.url == url and cached_entry.crawled_content and cached_entry.marketing_pitch:
-                    print(f"[SKIP] {cache_key} - No changes detected, using cached data.")
-                    continue
-                elif cached_entry.url != url or cached_entry.text != text:
-                    crawled_content = url_content_crawler.crawl_content_from_url(url)
-                    marketing_pitch = generate_marketing_pitch(target_audience, text, crawled_content, company_info_text)
-                    cached_entry.crawled_content = crawled_content
-                    cached_entry.marketing_pitch = marketing_pitch
-                    cache_data[cache_key] = cached_entry
-                    print(f"[UPDATE] {cache_key} - URL changed or text updated, crawling and generating...")
-                elif marketing_pitch is None:
-                    print(f"[UPDATE] {cache_key} - No marketing pitch found, generating...")
-                    crawled_content = url_content_crawler.crawl_content_from_url(url)
-                    marketing_pitch = generate_marketing_pitch(target_audience, text, crawled_content, company_info_text)
-                    cached_entry.crawled_content = crawled_content
-                    cached_entry.marketing_pitch = marketing_pitch
-                    cache_data[cache_key] = cached_entry
-            else:
-                print(f"[NEW] {cache_key} - Not in cache, crawling and generating...")
+    cache = Cache(cache_path)
+    cache.import_json_cache(legacy_cache_path)
+    cache.update_company_info(company_info)
+    # Persist updated cache
+    cache.save_cache()
 
-            # --- Need to crawl new content ---
-            crawled_content = None
-            if url:
-                crawled_content = url_content_crawler.crawl_content_from_url(url)
+    set_max_concurrency(MAX_CONCURRENCY)
+    set_rate_limits(RATE_LIMITS)
 
-            # --- Need to generate new marketing pitch ---
-            if crawled_content:
-                try:
-                    # print(f"[DEBUG] text: {text}")
-                    # print(f"[DEBUG] crawled_content: {crawled_content}")
-                    # print(f"[DEBUG] company_info_text: {company_info_text}")
-                    marketing_pitch = generate_marketing_pitch(target_audience, text, crawled_content, company_info_text)
-                except Exception as e:
-                    print(f"[ERROR] Failed to generate marketing pitch for {cache_key}: {str(e)}")
-                    marketing_pitch = None
-            else:
-                marketing_pitch = None
+    # --- Refresh mode: conditional GETs, only changed pages are re-analysed ---
+    changed_pages = {}
+    if refresh:
+        grouped_info = PlaybookTargets(stream_target_records(target_info)).grouping()
+        changed_pages = await detect_changed_pages(cache.cache_data, grouped_info, sections=sections)
+        # Persist the refreshed validators of unchanged pages.
+        cache.save_cache()
+        print(f"[REFRESH] {len(changed_pages)} page(s) changed")
 
-            # --- Update new entry fields ---
-            new_entry.crawled_content = crawled_content
-            new_entry.marketing_pitch = marketing_pitch
-            new_entry.last_updated = datetime.now().isoformat()
+    # --- Every target flows crawl -> analyse -> pitch -> rewrite -> render on its own ---
+    # Each finished unit is journaled; --resume skips them and retries only failed ones.
+    journal = RunJournal(journal_path, resume=resume)
+    run = LandingPageRun(
+        cache=cache,
+        company_info_text=company_info_text(cache, company_info.company_name),
+        html_path=html_path,
+        positions=positions,
+        output_dir=output_dir,
+        changed_pages=changed_pages,
+        crawl_concurrency=CRAWL_CONCURRENCY,
+        render_concurrency=RENDER_CONCURRENCY,
+        batch_rewrites=batch_rewrites,
+        journal=journal,
+    )
+    # Only targets added or changed since the last run are scheduled (pages a refresh found
+    # changed as well); entries of targets removed from the playbook are dropped afterwards.
+    schedule = IncrementalSchedule(
+        cache,
+        run.shared_inputs_fingerprint(),
+        sections=sections,
+        full=full,
+        forced=changed_pages,
+        is_complete=run.is_complete,
+    )
+    # Targets are read from the playbook as the pipeline makes progress, not loaded up front.
+    targets = schedule.select(targets_from_records(stream_target_records(target_info), sections))
+    try:
+        if workers > 1:
+            # Targets are sharded across processes; this one writes the cache, outputs and journal.
+            run_sharded(run, targets, workers, WorkerSettings(
+                max_concurrency=MAX_CONCURRENCY,
+                rate_limits=RATE_LIMITS,
+                response_cache_path=response_cache_path,
+            ), collect=False, on_finished=schedule.finished)
+        else:
+            await run.run(targets, collect=False, on_finished=schedule.finished)
+    finally:
+        journal.close()
+    schedule.finish()
 
-            # --- Save to cache ---
-            cache_data[cache_key] = new_entry
-            cache.save_cache()
+    # --- Where the run spent its time: LLM calls, tokens, retries, cache and fetch timings ---
+    print(metrics.summary_table())
+    print(f"[LLM POOL] {llm_pool_stats()}")
+    if metrics_json:
+        atomic_write(metrics_json, metrics.to_json())
+    if metrics_prom:
+        atomic_write(metrics_prom, metrics.to_prometheus())
 
-            
 
-# --- Generate replacement content ---
-for section_name, section_data in grouped_info.items():
-    # if section_name == 'accounts':
-        for key, value_dict in section_data.items():
-            cache_key = f"{section_name}:{key}"
-            text = value_dict.get("text")
-            url = value_dict.get("url", "")
-            marketing_pitch = cache_data.get(cache_key).marketing_pitch
-            if marketing_pitch:
-                # print(f"[DEBUG] marketing_pitch: {marketing_pitch}")
-                # cache key: accounts:YMCA, target_audience: YMCA
-                target_audience = cache_key.split(':')[1]
-                extracted_positions = extract_tagged_content_from_html(positions=positions, html_file_path=html_path)
-                replacement_content = generate_customized_web_content(target_audience=target_audience,marketing_pitch=marketing_pitch, positions= extracted_positions)
-                print(f"[DEBUG] replacement_content: {replacement_content}")
-                # --- Save replacements to output folder ---
-                output_path = f"output/{cache_key}.json"
-                # check if the output directory exists, make directory if not    
-                if not os.path.exists(os.path.dirname("output")):
-                    os.makedirs(os.path.dirname("output"), exist_ok=True)
-                with open(output_path, 'w') as f:
-                    json.dump(replacement_content, f)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate personalized landing page content for every target.")
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Re-fetch crawled pages with conditional GETs and regenerate only the ones that changed.",
+    )
+    parser.add_argument(
+        "--sections",
+        nargs="+",
+        help="Only process these target sections (e.g. accounts industries).",
+    )
+    parser.add_argument(
+        "--batch-rewrites",
+        action="store_true",
+        help="Rewrite several targets per LLM request, sending the page sections and instructions once.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the last run from its journal: skip finished units, retry failed ones.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Partition the targets across this many processes (LLM budgets are shared between them).",
+    )
+    parser.add_argument(
+        "--target-info",
+        default=target_info_path,
+        help="Targets to process: target_info.json, or JSON Lines (.jsonl) with one target per line.",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Process every target, not only those added or changed since the last run.",
+    )
+    parser.add_argument("--metrics-json", help="Write the run's metrics to this JSON file.")
+    parser.add_argument("--metrics-prom", help="Write the run's metrics to this file in Prometheus text format.")
+    args = parser.parse_args()
+    asyncio.run(main(
+        refresh=args.refresh,
+        sections=args.sections,
+        metrics_json=args.metrics_json,
+        metrics_prom=args.metrics_prom,
+        batch_rewrites=args.batch_rewrites,
+        resume=args.resume,
+        workers=args.workers,
+        target_info=args.target_info,
+        full=args.full,
+    ))
@@ -1,17 +1,24 @@
 import json
-import openai
 import os
-from bs4 import BeautifulSoup, NavigableString
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from langchain_openai import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.messages import HumanMessage, SystemMessage
+from src_.core.llm_backend import create_chat_model, openai_errors
+from src_.utils.compiled_template import load_compiled_template
+from src_.utils.content_validation import format_feedback, validate_replacements
+from src_.utils.file_lock import atomic_write
+from src_.utils.relevance_index import select_relevant
+from src_.utils.token_counter import count_tokens
+
+
+# The GPT model, created on first use (importing this module does not build a client)
+def llm():
+    return create_chat_model(model_name="gpt-4o", temperature=0.4)
 
 
-# Initialize the GPT model
-llm = ChatOpenAI(temperature=0.4, model="gpt-4o")
 ATTEMPTS = 10
+# Descriptions sent per account, picked by lexical relevance to the account knowledge.
+RELEVANT_INDUSTRIES = 3
+RELEVANT_PERSONAS = 2
+RELEVANT_SUBVERTICALS = 3
 
 # Function to fetch and summarize URL content using LangChain through OpenAI
 def parse_account_url_with_langchain(account_url: str, max_length=2000) -> str:
@@ -23,12 +30,13 @@ def parse_account_url_with_langchain(account_url: str, max_length=2000) -> str:
         """
 
         # Create the LangChain with the prompt template
+        from langchain.prompts import PromptTemplate
         prompt = PromptTemplate(
             input_variables=["account_url"], template=prompt_template
         )
 
         # Call LangChain to generate the content
-        result = llm.invoke(prompt.format(account_url=account_url))
+        result = llm().invoke(prompt.format(account_url=account_url))
 
         # Ensure the result does not exceed the maximum length
         if len(result) > max_length:
@@ -36,28 +44,25 @@ def parse_account_url_with_langchain(account_url: str, max_length=2000) -> str:
 
         return result
 
-    except openai.error.OpenAIError as e:
+    except openai_errors() as e:
         print(f"Error with OpenAI API: {e}")
         return ""
 
 
-# Split long text into chunks
-def chunk_text(text, max_tokens=3900):
-    splitter = RecursiveCharacterTextSplitter(chunk_size=max_tokens, chunk_overlap=100)
+# Split long text into chunks of at most max_tokens tokens
+def chunk_text(text, max_tokens=3900, model_name="gpt-4o"):
+    # Most texts fit in one chunk: one (memoised) count and the splitter never runs.
+    if count_tokens(text, model_name) <= max_tokens:
+        return [text] if text.strip() else []
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=max_tokens,
+        chunk_overlap=100,
+        length_function=lambda piece: count_tokens(piece, model_name),
+    )
     return splitter.split_text(text)
 
 
-def validate_replacement_content(replacements_dict, account_name):
-    """
-    Validate that the Account Name is included in the replacements dictionary.
-    This function checks if the Account Name appears in any of the replacement values.
-    """
-    for key, value in replacements_dict.items():
-        if account_name in value:
-            return True  # Account Name found in the replacement content
-    return False  # Account Name not found
-
-
 # Generate the prompt for GPT
 def generate_prompt(account_name, account_knowledge, industry_chunks, persona_chunks):
     return f"""
@@ -76,8 +81,34 @@ def generate_prompt(account_name, account_knowledge, industry_chunks, persona_ch
     """
 
 
+def select_relevant_descriptions(
+    account_name, account_knowledge, industry_descriptions, persona_descriptions, subvertical_descriptions=None
+):
+    """
+    Narrow the industry and persona descriptions to the ones most relevant to the account
+    (BM25 over the account knowledge, see src_.utils.relevance_index). Matching healthcare
+    subvertical descriptions, if given, are added to the industries.
+
+    Returns:
+        tuple: (industry descriptions, persona descriptions), each [{"name", "context"}].
+    """
+    query = f"{account_name} {account_knowledge}"
+    industries = select_relevant(
+        query, industry_descriptions, RELEVANT_INDUSTRIES, "industries", text_key="context"
+    )
+    personas = select_relevant(
+        query, persona_descriptions, RELEVANT_PERSONAS, "personas", text_key="context"
+    )
+    if subvertical_descriptions:
+        industries = industries + select_relevant(
+            query, subvertical_descriptions, RELEVANT_SUBVERTICALS, "subverticals",
+            text_key="context", keep_all_if_no_match=False,
+        )
+    return industries, personas
+
+
 # Generate landing page content with chunked context
-def generate_marketing_pitch(account_info, industry_descriptions, persona_descriptions):
+def generate_marketing_pitch(account_info, industry_descriptions, persona_descriptions, subvertical_descriptions=None):
     account_name = account_info["name"]
     account_url = account_info["context"]
 
@@ -87,7 +118,10 @@ def generate_marketing_pitch(account_info, industry_descriptions, persona_descri
     )  # Assumes HTML parsed cleanly
     account_chunks = chunk_text(account_knowledge)
 
-    # Step 2: Chunk industry and persona descriptions
+    # Step 2: Keep the most relevant industry and persona descriptions, then chunk them
+    industry_descriptions, persona_descriptions = select_relevant_descriptions(
+        account_name, account_knowledge, industry_descriptions, persona_descriptions, subvertical_descriptions
+    )
     industry_chunks = chunk_text(
         " ".join([d["context"] for d in industry_descriptions])
     )
@@ -150,7 +184,7 @@ def generate_marketing_pitch(account_info, industry_descriptions, persona_descri
     preview_conversation(conversation)
 
     # Step 8: Run the chat model
-    result = llm.invoke(conversation)
+    result = llm().invoke(conversation)
 
     # with open("logs/marketing_pitch.txt", "w", encoding="utf-8") as f:
     #     f.write(result.content)
@@ -176,21 +210,22 @@ def extract_label_contexts(html_path, positions):
     Given an HTML path and a list of replacement definitions, extract the original
     content and structural context for each placeholder (e.g., tag, id).
     """
-    with open(html_path, "r", encoding="utf-8") as f:
-        html = f.read()
-        soup = BeautifulSoup(html, "html.parser")
+    template = load_compiled_template(html_path)
 
     result = []
     for r in positions:
         placeholder = r["placeholder"]
         purpose = r.get("purpose", "")
 
-        tag = soup.find(id=placeholder) or soup.find(placeholder)
-        if not tag:
-            print(f"Could not find tag for placeholder: {placeholder}")
-            continue
-
-        content = tag.get_text(strip=True)
+        if placeholder in template:
+            content = template.text(placeholder)
+        else:
+            # Not an id: fall back to looking the placeholder up as a tag name.
+            tag = template.soup.find(placeholder)
+            if not tag:
+                print(f"Could not find tag for placeholder: {placeholder}")
+                continue
+            content = tag.get_text(strip=True)
         length = len(content)
 
         result.append(
@@ -210,6 +245,7 @@ def replacement_content_gen(
     persona_descriptions,
     positions,
     input_html_path,
+    subvertical_descriptions=None,
 ):
     account_name = account_info["name"]
     account_url = account_info["context"]
@@ -218,31 +254,17 @@ def replacement_content_gen(
     account_knowledge = parse_account_url_with_langchain(account_url)
     account_chunks = chunk_text(account_knowledge)
 
-    # Step 2: Chunk industry and persona descriptions
+    # Step 2: Keep the most relevant industry and persona descriptions, then chunk them
+    industry_descriptions, persona_descriptions = select_relevant_descriptions(
+        account_name, account_knowledge, industry_descriptions, persona_descriptions, subvertical_descriptions
+    )
     industry_chunks = chunk_text(
         " ".join([d["context"] for d in industry_descriptions])
     )
     persona_chunks = chunk_text(" ".join([d["context"] for d in persona_descriptions]))
 
-    # Step 3: Parse HTML and prepare content info from labels
-    with open(input_html_path, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f.read(), "html.parser")
-
-    tag_infos = []
-    for p in positions:
-        tag = soup.find(id=p["placeholder"])
-        if tag:
-            content = tag.get_text(strip=True)
-            html_snippet = str(tag)  # This will give you the full HTML for the tag
-
-            tag_infos.append(
-                {
-                    "placeholder": p["placeholder"],
-                    "original": content,
-                    "length": len(content),
-                    "html": html_snippet,  # Ensure the 'html' field is included
-                }
-            )
+    # Step 3: Prepare content info from labels using the pre-compiled template
+    tag_infos = load_compiled_template(input_html_path).tag_infos(positions)
 
     # Step 4: Build conversation
     conversation = [
@@ -326,7 +348,7 @@ def replacement_content_gen(
     conversation.append(HumanMessage(content=final_instruction_system))
     conversation.append(HumanMessage(content=final_instruction_human))
     # Step 5: Run the model
-    result = llm.invoke(conversation)
+    result = llm().invoke(conversation)
 
     # Step 6: Extract replacements from result
     replacements_dict = {}
@@ -353,6 +375,7 @@ def replacement_content_gen_with_pitch(
     persona_descriptions,
     positions,
     input_html_path,
+    subvertical_descriptions=None,
 ):
     """
     This function generates a marketing pitch using the account, industry, and persona descriptions
@@ -365,6 +388,7 @@ def replacement_content_gen_with_pitch(
         persona_descriptions (list): A list of persona descriptions.
         positions (list): A list of placeholders (HTML tags) to replace.
         input_html_path (str): The path to the input HTML template.
+        subvertical_descriptions (list): Optional healthcare subvertical descriptions.
 
     Returns:
         dict: A dictionary containing the replacements for each placeholder.
@@ -378,30 +402,14 @@ def replacement_content_gen_with_pitch(
     log += "-----------------------------------------\n"
     # Step 1: Generate marketing pitch using generate_landing_page
     marketing_pitch = generate_marketing_pitch(
-        account_info, industry_descriptions, persona_descriptions
+        account_info, industry_descriptions, persona_descriptions, subvertical_descriptions
     )
     log += f"Marketing Pitch: {marketing_pitch}\n"
     # with open("logs/marketing_pitch.txt", "w", encoding="utf-8") as f:
     #     f.write(marketing_pitch)
 
-    # Step 2: Parse the HTML and prepare content info from labels
-    with open(input_html_path, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f.read(), "html.parser")
-
-    tag_infos = []
-    for p in positions:
-        tag = soup.find(id=p["placeholder"])
-        if tag:
-            content = tag.get_text(strip=True)
-            html_snippet = str(tag)  # This will give you the full HTML for the tag
-            tag_infos.append(
-                {
-                    "placeholder": p["placeholder"],
-                    "original": content,
-                    "length": len(content),
-                    "html": html_snippet,  # Ensure the 'html' field is included
-                }
-            )
+    # Step 2: Prepare content info from labels using the pre-compiled template
+    tag_infos = load_compiled_template(input_html_path).tag_infos(positions)
 
     # Step 3: Build final instruction for GPT to generate the replacement content
     final_instruction = (
@@ -422,13 +430,17 @@ def replacement_content_gen_with_pitch(
         "Here are the HTML sections that need replacement:\n"
     )
 
+    final_instruction_header = final_instruction
     # Loop over each placeholder and add its details
+    placeholder_instructions = {}
     for t in tag_infos:
-        final_instruction += f"- Placeholder: {t['placeholder']}\n"
-        final_instruction += f"  HTML snippet to preserve (structure only):\n"
-        final_instruction += f"  {t['html']}\n"
-        final_instruction += f"  Text content to replace: \"{t['original']}\" (about {t['length']} characters), remember to keep the same length and logic as the marketing pitch.\n"
-        final_instruction += f"  Keep in mind you are a great marketing content generator, don't be a nerd, use in-depth marketing knowledge to generate the content.\n"
+        instruction = f"- Placeholder: {t['placeholder']}\n"
+        instruction += f"  HTML snippet to preserve (structure only):\n"
+        instruction += f"  {t['html']}\n"
+        instruction += f"  Text content to replace: \"{t['original']}\" (about {t['length']} characters), remember to keep the same length and logic as the marketing pitch.\n"
+        instruction += f"  Keep in mind you are a great marketing content generator, don't be a nerd, use in-depth marketing knowledge to generate the content.\n"
+        placeholder_instructions[t["placeholder"]] = instruction
+        final_instruction += instruction
     # Step 4: Create the conversation for GPT (including the SystemMessage and HumanMessage)
     conversation = [
         SystemMessage(content="You are an expert in marketing content generation."),
@@ -447,24 +459,41 @@ def replacement_content_gen_with_pitch(
     
     attempt_count = 0
     # Step 6: Extract replacements from result
+    # Each placeholder is validated on its own (account mention, length within ±10%,
+    # well-formed HTML); follow-up requests only ask again for the ones that failed.
     replacements_dict = {}
-    
+    original_lengths = {t["placeholder"]: t["length"] for t in tag_infos}
+    pending_lengths = dict(original_lengths)
+
     while attempt_count <= ATTEMPTS :
         print(f"Attempt {attempt_count + 1} of {ATTEMPTS}")
-        result = llm.invoke(conversation)
+        result = llm().invoke(conversation)
+        attempt_replacements = {}
         for line in result.content.splitlines():
             if line.startswith("REPLACEMENT for "):
                 try:
                     key, value = line.split(":", 1)
                     key = key.replace("REPLACEMENT for", "").strip()
                     value = value.strip()
-                    replacements_dict[key] = value
+                    if key in pending_lengths:
+                        attempt_replacements[key] = value
                 except ValueError:
                     continue
-        if validate_replacement_content(replacements_dict, account_info["name"]):
+        failures = validate_replacements(attempt_replacements, pending_lengths, account_info["name"])
+        # Only pending placeholders are parsed, so accepted ones are never overwritten;
+        # failing ones keep their latest attempt in case none ever passes.
+        replacements_dict.update(attempt_replacements)
+        if not failures:
             print(f"Validation passed for attempt {attempt_count + 1}")
             break
-        print(f"Validation failed for attempt {attempt_count + 1}")
+        print(f"Validation failed for attempt {attempt_count + 1}: {failures}")
+        pending_lengths = {key: original_lengths[key] for key in failures}
+        conversation = conversation[:2] + [HumanMessage(content=(
+            final_instruction_header
+            + "".join(placeholder_instructions[key] for key in failures)
+            + "\nA previous answer for these placeholders was rejected. Fix every problem:\n"
+            + format_feedback(failures)
+        ))]
         attempt_count += 1
     log += "---------------Replacements Dict-----------------\n"
     log += f"Replacements Dict: {replacements_dict}\n"
@@ -486,44 +515,11 @@ def page_render(input_html_path, output_html_path, replacements):
     """
     Replaces specified content inside an HTML file and writes the result to a new file,
     preserving the original tag structure and nesting (e.g., <p>, <h1>, etc).
+    The template is compiled once per file; rendering splices the new content
+    between the recorded offsets of each placeholder.
     """
-
-    # Load and parse the HTML file
-    with open(input_html_path, "r", encoding="utf-8") as file:
-        soup = BeautifulSoup(file.read(), "html.parser")
-
-    # Loop over each target ID and perform safe replacement
-    for key, new_content in replacements.items():
-        target = soup.find(id=key)
-
-        if target:
-            # Check if the target contains plain text
-            if isinstance(target.string, NavigableString):
-                # Simple case: just replace the string content
-                target.string.replace_with(new_content)
-            else:
-                # More complex case (with nested tags): try to preserve structure
-                try:
-                    # Attempt to parse the new content as HTML to preserve nested structure
-                    new_fragment = BeautifulSoup(new_content, "html.parser")
-
-                    # Clear the target tag's existing content
-                    target.clear()
-
-                    # Append each element from the new fragment (preserving structure)
-                    for el in new_fragment.contents:
-                        target.append(el)
-                except Exception as e:
-                    print(
-                        f"Warning: Could not parse replacement for {key}. Falling back to plain text."
-                    )
-                    target.string = new_content
-        else:
-            print(f"Warning: ID '{key}' not found in HTML. Skipped.")
-    # create the output directory if it doesn't exist
-    os.makedirs("output", exist_ok=True)
-    # Write the updated HTML to output path
-    with open(output_html_path, "w", encoding="utf-8") as file:
-        file.write(str(soup))
+    html = load_compiled_template(input_html_path).render(replacements)
+    # Write the updated HTML to output path (temp file + rename, never half-written)
+    atomic_write(output_html_path, html)
 
     print(f"HTML customization completed. Output written to: {output_html_path}")
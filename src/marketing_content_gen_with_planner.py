@@ -1,21 +1,26 @@
-from langchain.agents import initialize_agent
-from langchain.memory import ConversationSummaryBufferMemory
-from langchain.chat_models import ChatOpenAI
-from langchain.schema import SystemMessage, HumanMessage
-from langchain.text_splitter import TokenTextSplitter
-from langchain.callbacks import get_openai_callback
-from bs4 import BeautifulSoup
-from src.marketing_content_gen import preview_conversation
-import tiktoken
+from langchain_core.messages import SystemMessage, HumanMessage
+from src_.core.llm_backend import create_chat_model
+from src_.entity.target_records import PlaybookTargets
+from src_.utils.compiled_template import load_compiled_template
+from src_.utils.relevance_index import select_relevant
+from src_.utils.token_counter import count_tokens, split_text_by_tokens
 import time
-import json
+from concurrent.futures import ThreadPoolExecutor
+
+# The planner's model, created on first use (importing this module does not build a client)
+def llm():
+    return create_chat_model(model_name="gpt-3.5-turbo", temperature=0.5)
 
-llm = ChatOpenAI(temperature=0.5, model="gpt-3.5-turbo")
 
 CHUNK_TOKEN_SIZE = 3900
 SUMMARY_TARGET_LENGTH = 500  # words
 RETRY_ATTEMPTS = 3
 TARGET_PITCH_LENGTH = 2500  # words
+SUMMARY_MAX_WORKERS = 4  # concurrent summarization calls
+# Descriptions sent per account pitch, picked by lexical relevance to the account summary.
+RELEVANT_INDUSTRIES = 3
+RELEVANT_PERSONAS = 2
+RELEVANT_SUBVERTICALS = 3
 
 def parse_company_info(company_info_json):
     """
@@ -53,7 +58,7 @@ def parse_company_info(company_info_json):
 
 def parse_target_info(filepath):
     """
-    Parse the target_info.json file and separate Accounts, Industries, and Personas.
+    Parse the target_info.json file and separate Accounts, Industries, Personas and Healthcare Subverticals.
 
     Args:
         filepath (str): Path to the target_info.json file.
@@ -62,55 +67,11 @@ def parse_target_info(filepath):
         dict: {
             "accounts": List[{"name": str, "url": str}],
             "industries": List[{"name": str, "description": str, "url": str}],
-            "personas": List[{"name": str, "description": str, "url": str}]
+            "personas": List[{"name": str, "description": str, "url": str}],
+            "subverticals": List[{"name": str, "description": str, "url": str}]
         }
     """
-    with open(filepath, "r", encoding="utf-8") as file:
-        data = json.load(file)
-
-    parsed = {"accounts": [], "industries": [], "personas": []}
-
-    # Extract accounts
-    for name, details in data.get("Accounts", {}).items():
-        if name == "meta":
-            continue
-        url = ""
-        for entry in details.get("data", []):
-            if entry["type"] == "url":
-                url = entry["value"]
-        parsed["accounts"].append({"name": name, "url": url})
-
-    # Extract industries
-    for name, details in data.get("Industries", {}).items():
-        if name == "meta":
-            continue
-        description = ""
-        url = ""
-        for entry in details.get("data", []):
-            if entry["type"] == "text":
-                description = entry["value"]
-            elif entry["type"] == "url":
-                url = entry["value"]
-        parsed["industries"].append(
-            {"name": name, "description": description, "url": url}
-        )
-
-    # Extract personas
-    for name, details in data.get("Personas", {}).items():
-        if name == "meta":
-            continue
-        description = ""
-        url = ""
-        for entry in details.get("data", []):
-            if entry["type"] == "text":
-                description = entry["value"]
-            elif entry["type"] == "url":
-                url = entry["value"]
-        parsed["personas"].append(
-            {"name": name, "description": description, "url": url}
-        )
-
-    return parsed
+    return PlaybookTargets.from_json(filepath).descriptions()
 
 
 def generate_account_summary(account_name: str, url: str) -> str:
@@ -144,18 +105,21 @@ def generate_account_summary(account_name: str, url: str) -> str:
     )
 
     # Invoke the LLM
-    response = llm.invoke([system_msg, human_msg])
+    response = llm().invoke([system_msg, human_msg])
 
     return response.content.strip()
 
-def num_tokens_from_string(string: str, encoding_name: str = "cl100k_base") -> int:
-    encoding = tiktoken.get_encoding(encoding_name)
-    return len(encoding.encode(string))
+def num_tokens_from_string(string: str) -> int:
+    # Cached encoder and memoised counts: re-counting the same summaries at every reduction level is free.
+    return count_tokens(string)
 
 
 def split_into_chunks(text: str, chunk_token_size: int = CHUNK_TOKEN_SIZE):
-    splitter = TokenTextSplitter(chunk_size=chunk_token_size, chunk_overlap=100)
-    return splitter.split_text(text)
+    """
+    Returns (chunks, token count of each chunk); the text is tokenised once.
+    """
+    pieces = split_text_by_tokens(text, chunk_size=chunk_token_size, chunk_overlap=100)
+    return [chunk for chunk, _ in pieces], [token_count for _, token_count in pieces]
 
 def summarize_chunk(chunk: str, chunk_ratio: float, attempt=1) -> str:
     """
@@ -180,7 +144,7 @@ def summarize_chunk(chunk: str, chunk_ratio: float, attempt=1) -> str:
     ]
 
     try:
-        response = llm.invoke(messages)
+        response = llm().invoke(messages)
         return response.content.strip()
     except Exception as e:
         if attempt < 3:
@@ -190,12 +154,73 @@ def summarize_chunk(chunk: str, chunk_ratio: float, attempt=1) -> str:
             print(f"Failed to summarize chunk after 3 attempts. Returning fallback.")
             return f"[Summary unavailable for this section due to error: {e}]"
 
-def generate_company_summary(parsed_company_info: dict) -> str:
+def combine_summaries(summaries: list, target_length: int = SUMMARY_TARGET_LENGTH) -> str:
+    """
+    Combine several partial summaries into one cohesive summary with a single LLM call.
+
+    Args:
+        summaries (list): The partial summaries, in document order.
+        target_length (int): Approximate length of the combined summary, in words.
+
+    Returns:
+        str: The combined summary.
+    """
+    combined_summary_prompt = "\n".join(summaries)
+    messages = [
+        SystemMessage(content="You are a helpful assistant that creates polished summaries of business information."),
+        HumanMessage(content=(
+            f"Combine the following summaries into a single cohesive company profile.\n"
+            f"The final summary should be around {target_length} words:\n\n{combined_summary_prompt}"
+        ))
+    ]
+    result = llm().invoke(messages)
+    return result.content.strip()
+
+
+def group_summaries_by_tokens(summaries: list, token_budget: int = CHUNK_TOKEN_SIZE) -> list:
+    """
+    Pack consecutive summaries into groups whose combined token count fits the budget.
+    If no two summaries fit together, pair them up anyway so every reduction level shrinks the list.
+    """
+    groups = []
+    current, current_tokens = [], 0
+    for summary in summaries:
+        tokens = num_tokens_from_string(summary)
+        if current and current_tokens + tokens > token_budget:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(summary)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+
+    if len(groups) == len(summaries):
+        groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+    return groups
+
+
+def _combine_group(group: list) -> str:
+    if len(group) == 1:
+        return group[0]
+    try:
+        return combine_summaries(group)
+    except Exception as e:
+        # Keep the partial summaries rather than losing them; the next level will retry the merge.
+        print(f"Failed to combine {len(group)} summaries: {e}")
+        return "\n".join(group)
+
+
+def generate_company_summary(parsed_company_info: dict, max_workers: int = SUMMARY_MAX_WORKERS) -> str:
     """
     Generate a concise summary (~500 words) of a company's profile based on structured parsed input.
 
+    Chunks are summarized concurrently (map). If the chunk summaries together still exceed
+    CHUNK_TOKEN_SIZE they are merged level by level in parallel groups (tree reduction)
+    before the final combine, so latency grows with tree depth rather than chunk count.
+
     Args:
         parsed_company_info (dict): Dictionary containing structured company fields and their values.
+        max_workers (int): Maximum number of concurrent summarization calls.
 
     Returns:
         str: Final polished company summary.
@@ -209,31 +234,27 @@ def generate_company_summary(parsed_company_info: dict) -> str:
     # print("---- End of Company Info ----")
 
     # Step 2: Token length check and split
-    chunks = split_into_chunks(combined_text, CHUNK_TOKEN_SIZE)
-
-    chunk_token_counts = [num_tokens_from_string(c) for c in chunks]
+    chunks, chunk_token_counts = split_into_chunks(combined_text, CHUNK_TOKEN_SIZE)
     total_tokens = sum(chunk_token_counts)
 
-    all_summaries = []
-    for idx, (chunk, token_count) in enumerate(zip(chunks, chunk_token_counts)):
-        chunk_ratio = token_count / total_tokens
-        print(f"Summarizing chunk {idx + 1}/{len(chunks)}... (Ratio: {chunk_ratio:.2f})")
-        summary = summarize_chunk(chunk, chunk_ratio)
-        all_summaries.append(summary)
-
-    # Step 3: Combine and polish
-    combined_summary_prompt = "\n".join(all_summaries)
-    final_messages = [
-        SystemMessage(content="You are a helpful assistant that creates polished summaries of business information."),
-        HumanMessage(content=(
-            f"Combine the following summaries into a single cohesive company profile.\n"
-            f"The final summary should be around {SUMMARY_TARGET_LENGTH} words:\n\n{combined_summary_prompt}"
-        ))
-    ]
-
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Step 3: Map - summarize all chunks concurrently
+        chunk_ratios = [token_count / total_tokens for token_count in chunk_token_counts]
+        for idx, chunk_ratio in enumerate(chunk_ratios):
+            print(f"Summarizing chunk {idx + 1}/{len(chunks)}... (Ratio: {chunk_ratio:.2f})")
+        all_summaries = list(executor.map(summarize_chunk, chunks, chunk_ratios))
+
+        # Step 4: Reduce - merge groups in parallel until the summaries fit one prompt
+        level = 0
+        while len(all_summaries) > 1 and num_tokens_from_string("\n".join(all_summaries)) > CHUNK_TOKEN_SIZE:
+            level += 1
+            groups = group_summaries_by_tokens(all_summaries, CHUNK_TOKEN_SIZE)
+            print(f"Reducing {len(all_summaries)} summaries into {len(groups)} (level {level})...")
+            all_summaries = list(executor.map(_combine_group, groups))
+
+    # Step 5: Combine and polish
     try:
-        final_result = llm.invoke(final_messages)
-        return final_result.content.strip()
+        return combine_summaries(all_summaries, SUMMARY_TARGET_LENGTH)
     except Exception as e:
         print(f"Failed to generate final summary: {e}")
         return "[Error generating final summary]"
@@ -251,22 +272,23 @@ def generate_account_marketing_pitch(
     Parameters:
         account_summary (str): Summary of the target account (YMCA).
         company_summary (str): Summary of Stampli's core services and capabilities.
-        parsed_target_info (dict): A structured dict containing 'accounts', 'industries', and 'personas'.
+        parsed_target_info (dict): A structured dict containing 'accounts', 'industries', 'personas'
+            and optionally 'subverticals'. Only the descriptions most relevant to the account
+            summary are sent (see src_.utils.relevance_index).
 
     Returns:
         str: A ~2000-word marketing pitch tailored to the account.
     """
-    industry_summaries = {
-        industry["name"]: industry["description"]
-        for industry in parsed_target_info["industries"]
-        if industry.get("description")
-    }
-
-    persona_summaries = {
-        persona["name"]: persona["description"]
-        for persona in parsed_target_info["personas"]
-        if persona.get("description")
-    }
+    industries = [i for i in parsed_target_info["industries"] if i.get("description")]
+    personas = [p for p in parsed_target_info["personas"] if p.get("description")]
+    subverticals = [s for s in parsed_target_info.get("subverticals", []) if s.get("description")]
+    industries = select_relevant(account_summary, industries, RELEVANT_INDUSTRIES, "industries") + select_relevant(
+        account_summary, subverticals, RELEVANT_SUBVERTICALS, "subverticals", keep_all_if_no_match=False
+    )
+    personas = select_relevant(account_summary, personas, RELEVANT_PERSONAS, "personas")
+
+    industry_summaries = {industry["name"]: industry["description"] for industry in industries}
+    persona_summaries = {persona["name"]: persona["description"] for persona in personas}
 
     conversation = [
         SystemMessage(content=(
@@ -307,7 +329,7 @@ def generate_account_marketing_pitch(
     # print(conversation_content)
     for attempt in range(1, RETRY_ATTEMPTS + 1):
         try:
-            result = llm.invoke(conversation)
+            result = llm().invoke(conversation)
             pitch = result.content.strip()
             print("pitch: ", pitch)
             return pitch
@@ -320,22 +342,7 @@ def generate_account_marketing_pitch(
 
 
 def generate_replacement_content(pitch_text: str, html_path: str, positions: list) -> dict:
-    with open(html_path, "r", encoding="utf-8") as f:
-        soup = BeautifulSoup(f.read(), "html.parser")
-
-    tag_infos = []
-    for pos in positions:
-        placeholder = pos["placeholder"]
-        tag = soup.find(id=placeholder)
-        if tag:
-            original_text = tag.get_text(strip=True)
-            html_snippet = str(tag)
-            tag_infos.append({
-                "placeholder": placeholder,
-                "original": original_text,
-                "length": len(original_text),
-                "html": html_snippet
-            })
+    tag_infos = load_compiled_template(html_path).tag_infos(positions)
 
     # Step 3: Build final instruction for GPT to generate the replacement content
     final_instruction = (
@@ -370,7 +377,7 @@ def generate_replacement_content(pitch_text: str, html_path: str, positions: lis
         SystemMessage(content=final_instruction),
     ]
 
-    result = llm.invoke(messages)
+    result = llm().invoke(messages)
 
     # Parse response
     replacement_dict = {}
@@ -4,6 +4,7 @@ from bs4 import BeautifulSoup
 # from sentence_transformers import SentenceTransformer
 # from sklearn.metrics.pairwise import cosine_similarity
 from typing import Dict
+from src_.entity.target_records import categorize_targets
 import re
 
 # # Initialize the SentenceTransformer model for sentence embeddings
@@ -127,27 +128,8 @@ def categorize_playbook_data(playbook_data):
     company_info = playbook_data.get("company_info", {})
     targets = playbook_data.get("targets", [])
 
-    categorized_data = {
-        "company_info": company_info,
-        "accounts": [],
-        "personas": [],
-        "industries": [],
-    }
-
     # Categorize targets based on their type
-    for target in targets:
-        target_type = target.get("target_type", "Unknown")
-        name = target.get("name", "Unnamed")
-        context = target.get("context", "")
-
-        if target_type == "Accounts":
-            categorized_data["accounts"].append({"name": name, "context": context})
-        elif target_type == "Personas":
-            categorized_data["personas"].append({"name": name, "context": context})
-        elif target_type == "Industries":
-            categorized_data["industries"].append({"name": name, "context": context})
-
-    return categorized_data
+    return {"company_info": company_info, **categorize_targets(targets)}
 
 
 # def process_playbook_data(playbook_data, log_file_path="account_descriptions.log"):
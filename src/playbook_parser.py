@@ -1,13 +1,16 @@
 import json
 from typing import Dict, List, Union
 
+from src_.entity.target_records import PlaybookTargets
+
 
 class PlaybookParser:
     def __init__(self, company_info_path: str, target_info_path: str):
         self.company_info_path = company_info_path
         self.target_info_path = target_info_path
         self.company_info_raw = self._load_json(company_info_path)
-        self.target_info_raw = self._load_json(target_info_path)
+        # Targets are parsed once into compact records; the raw JSON is not kept.
+        self.targets = PlaybookTargets.from_json(target_info_path)
 
     @staticmethod
     def _load_json(path: str) -> Dict:
@@ -39,24 +42,7 @@ class PlaybookParser:
 
     def parse_targets(self) -> List[Dict[str, str]]:
         """Extract and flatten all targets (accounts, personas, industries, etc)"""
-        results = []
-        for target_type, targets in self.target_info_raw.items():
-            if target_type == "meta":
-                continue
-            for target_name, target_data in targets.items():
-                if target_name == "meta" or not isinstance(target_data, dict):
-                    continue
-                data_list = target_data.get("data", [])
-                context = self._extract_text_from_data(data_list)
-                if context:
-                    results.append(
-                        {
-                            "target_type": target_type,
-                            "name": target_name,
-                            "context": context,
-                        }
-                    )
-        return results
+        return self.targets.flattened()
 
     def get_structured(self) -> Dict[str, Union[str, List[Dict[str, str]]]]:
         """Return structured format for easy downstream usage"""
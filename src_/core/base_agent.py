@@ -1,7 +1,74 @@
+import asyncio
+import hashlib
+import inspect
+import time
+import weakref
 from abc import ABC, abstractmethod
-from typing import Any, Dict
-from langchain.chat_models import ChatOpenAI
-from langchain.schema import HumanMessage
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+from src_.core.llm_backend import create_chat_model
+from src_.core.metrics import metrics, record_llm_usage
+from src_.core.rate_limiter import DEFAULT_COMPLETION_TOKENS, rate_limiter
+from src_.core.response_cache import ResponseCache, get_default_response_cache
+from src_.utils.incremental_json import IncrementalJSONParser, JSONStreamError, TruncatedJSONError
+from src_.utils.token_counter import count_prompt_tokens
+
+
+DEFAULT_MAX_CONCURRENCY = 16
+# A streamed response that sends nothing for this long is treated as stalled and aborted.
+DEFAULT_STREAM_CHUNK_TIMEOUT = 30.0
+
+FieldCallback = Callable[[str, Any], None]
+
+
+class ConcurrencyLimiter:
+    """
+    Process-wide cap on the number of in-flight async LLM requests.
+
+    asyncio primitives are bound to the event loop they are first used in,
+    so one semaphore is kept per running loop (scripts may call asyncio.run more than once).
+    """
+
+    def __init__(self, limit: int = DEFAULT_MAX_CONCURRENCY):
+        self.limit = limit
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def set_limit(self, limit: int):
+        if limit < 1:
+            raise ValueError("Concurrency limit must be at least 1.")
+        self.limit = limit
+        # Semaphores created with the old limit are dropped; new ones pick up the new limit.
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limit)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self._semaphore():
+            yield
+
+
+# Shared by every agent so the whole process stays under one limit.
+llm_concurrency_limiter = ConcurrencyLimiter()
+
+
+def _prompt_messages(prompt: str) -> List:
+    # LangChain is only imported once a prompt is actually sent, not when the pipeline loads.
+    from langchain_core.messages import HumanMessage
+    return [HumanMessage(content=prompt)]
+
+
+def set_max_concurrency(limit: int):
+    """
+    Set how many async LLM requests may be in flight at once across all agents.
+    """
+    llm_concurrency_limiter.set_limit(limit)
 
 
 class BaseGPTAgent(ABC):
@@ -9,8 +76,31 @@ class BaseGPTAgent(ABC):
     Abstract base class for GPT agents using LangChain.
     """
 
-    def __init__(self, model_name: str = "gpt-3.5-turbo", temperature: float = 0.7):
-        self.llm = ChatOpenAI(model_name=model_name, temperature=temperature, request_timeout=60)
+    def __init__(
+        self,
+        model_name: str = "gpt-3.5-turbo",
+        temperature: float = 0.7,
+        response_cache: Optional[ResponseCache] = None,
+    ):
+        self.model_name = model_name
+        self.temperature = temperature
+        # None means the process-wide default cache, resolved at call time.
+        self.response_cache = response_cache
+        # ChatOpenAI by default; swappable via src_.core.llm_backend (e.g. FakeChatModel offline).
+        # Borrowed from the process-wide registry: agents with the same settings share one client.
+        self.llm = create_chat_model(model_name=model_name, temperature=temperature, request_timeout=60)
+
+    @classmethod
+    def prompt_version(cls) -> str:
+        """
+        Fingerprint of this agent's prompt and parsing code.
+        Editing the prompt text changes it, which invalidates artifacts generated with the old prompt.
+        """
+        try:
+            source = inspect.getsource(cls.build_prompt) + inspect.getsource(cls.parse_response)
+        except (OSError, TypeError):
+            source = cls.__qualname__
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
 
     @abstractmethod
     def build_prompt(self, input_data: Any) -> str:
@@ -19,13 +109,163 @@ class BaseGPTAgent(ABC):
         """
         pass
 
-    def run(self, input_data: Any) -> Dict[str, Any]:
+    def _estimate_tokens(self, prompt: str) -> int:
+        """
+        Tokens to reserve against the model's per-minute budget before sending the prompt.
+        Counted with the model's tokenizer; blocks shared across prompts are tokenised once.
+        """
+        return count_prompt_tokens(prompt, self.model_name) + DEFAULT_COMPLETION_TOKENS
+
+    def _settle_usage(self, response: Any, reserved_tokens: int):
+        used = record_llm_usage(response, **self._metric_labels())
+        if used:
+            rate_limiter.settle(self.model_name, reserved_tokens, used)
+
+    def _metric_labels(self) -> Dict[str, str]:
+        return {"agent": type(self).__name__, "model": self.model_name}
+
+    def _cache_lookup(self, messages: List, use_cache: bool):
+        """
+        Return (cache, key, cached_raw_output) for the rendered messages.
+        With use_cache=False the lookup is skipped, but the fresh response still
+        replaces the cached one, so a retry can overwrite a stale answer.
+        """
+        cache = self.response_cache if self.response_cache is not None else get_default_response_cache()
+        key = cache.make_key(self.model_name, self.temperature, messages)
+        cached = cache.get(key) if use_cache else None
+        if use_cache:
+            outcome = "llm_cache_hits_total" if cached is not None else "llm_cache_misses_total"
+            metrics.inc(outcome, agent=type(self).__name__)
+        return cache, key, cached
+
+    def _parse_and_cache(self, raw_output: str, input_data: Any, cache: ResponseCache, key: str):
+        result = self.parse_response(raw_output, input_data)
+        if not result.get("success"):
+            metrics.inc("llm_parse_failures_total", agent=type(self).__name__)
+        # Only responses that parsed cleanly are cached, so a retry after a bad response hits the API again.
+        if result.get("success"):
+            cache.set(key, raw_output)
+        return result
+
+    def run(self, input_data: Any, use_cache: bool = True) -> Dict[str, Any]:
         """
         Unified entry point for the agent: build prompt → call GPT → parse output.
+        Identical prompts are answered from the response cache unless use_cache is False
+        (see `_cache_lookup`).
+        """
+        with metrics.timer("agent_run_seconds", **self._metric_labels()):
+            prompt = self.build_prompt(input_data)
+            messages = _prompt_messages(prompt)
+            cache, key, cached = self._cache_lookup(messages, use_cache)
+            if cached is not None:
+                return self.parse_response(cached, input_data)
+            reserved = rate_limiter.acquire(self.model_name, self._estimate_tokens(prompt))
+            with metrics.timer("llm_request_seconds", **self._metric_labels()):
+                response = self.llm.invoke(messages)
+            self._settle_usage(response, reserved)
+            return self._parse_and_cache(response.content, input_data, cache, key)
+
+    async def arun(self, input_data: Any, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Async counterpart of `run`. The LLM call waits for a slot in the shared
+        concurrency limiter, so many targets can be fanned out with asyncio.gather,
+        and for room in the model's per-minute budget (see src_.core.rate_limiter).
+        """
+        with metrics.timer("agent_run_seconds", **self._metric_labels()):
+            prompt = self.build_prompt(input_data)
+            messages = _prompt_messages(prompt)
+            cache, key, cached = self._cache_lookup(messages, use_cache)
+            if cached is not None:
+                return self.parse_response(cached, input_data)
+            async with llm_concurrency_limiter.slot():
+                reserved = await rate_limiter.aacquire(self.model_name, self._estimate_tokens(prompt))
+                with metrics.timer("llm_request_seconds", **self._metric_labels()):
+                    response = await self.llm.ainvoke(messages)
+            self._settle_usage(response, reserved)
+            return self._parse_and_cache(response.content, input_data, cache, key)
+
+    async def arun_stream(
+        self,
+        input_data: Any,
+        on_field: Optional[FieldCallback] = None,
+        use_cache: bool = True,
+        chunk_timeout: float = DEFAULT_STREAM_CHUNK_TIMEOUT,
+    ) -> Dict[str, Any]:
+        """
+        Streaming counterpart of `arun` for agents that answer with a JSON object.
+
+        Tokens are parsed as they arrive (see IncrementalJSONParser) and `on_field(key, value)`
+        is called as soon as each top-level field closes, so downstream work can start before
+        the completion ends. Output that cannot become a JSON object, a stream that sends
+        nothing for `chunk_timeout` seconds, or one that ends inside the object is aborted and
+        returned as a failed result ({"success": False, "error", "raw_output"}); callers' retry
+        loops then start over without waiting for the tail. Otherwise the result is
+        `parse_response` of the full text, exactly as with `arun`.
         """
-        prompt = self.build_prompt(input_data)
-        response = self.llm.invoke([HumanMessage(content=prompt)])
-        return self.parse_response(response.content, input_data)
+        with metrics.timer("agent_run_seconds", **self._metric_labels()):
+            prompt = self.build_prompt(input_data)
+            messages = _prompt_messages(prompt)
+            cache, key, cached = self._cache_lookup(messages, use_cache)
+            if cached is not None:
+                if on_field is not None:
+                    try:
+                        for field, value in IncrementalJSONParser().feed(cached):
+                            on_field(field, value)
+                    except JSONStreamError:
+                        pass
+                return self.parse_response(cached, input_data)
+            parser = IncrementalJSONParser()
+            async with llm_concurrency_limiter.slot():
+                reserved = await rate_limiter.aacquire(self.model_name, self._estimate_tokens(prompt))
+                try:
+                    with metrics.timer("llm_request_seconds", **self._metric_labels()):
+                        response = await self._aconsume_stream(messages, parser, on_field, chunk_timeout)
+                except (JSONStreamError, asyncio.TimeoutError) as e:
+                    reason = "truncated" if isinstance(e, TruncatedJSONError) else (
+                        "stalled" if isinstance(e, asyncio.TimeoutError) else "invalid")
+                    metrics.inc("llm_stream_aborts_total", reason=reason, **self._metric_labels())
+                    error = str(e) or f"No output for {chunk_timeout} seconds."
+                    print(f"[ABORT] {type(self).__name__} stream {reason} after {len(parser.text)} chars: {error}")
+                    metrics.inc("llm_parse_failures_total", agent=type(self).__name__)
+                    return {"success": False, "error": error, "raw_output": parser.text}
+            self._settle_usage(response, reserved)
+            return self._parse_and_cache(response.content, input_data, cache, key)
+
+    async def _aconsume_stream(
+        self,
+        messages: List,
+        parser: IncrementalJSONParser,
+        on_field: Optional[FieldCallback],
+        chunk_timeout: float,
+    ):
+        """
+        Feed the streamed chunks to the parser; returns the merged response message.
+        """
+        started = time.perf_counter()
+        response = None
+        # stream_usage asks OpenAI for a final chunk with token usage.
+        stream = self.llm.astream(messages, stream_usage=True)
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), chunk_timeout)
+                except StopAsyncIteration:
+                    break
+                response = chunk if response is None else response + chunk
+                fields = parser.feed(chunk.content)
+                if fields and len(parser.fields) == len(fields):
+                    metrics.observe("llm_stream_first_field_seconds", time.perf_counter() - started, **self._metric_labels())
+                if on_field is not None:
+                    for field, value in fields:
+                        on_field(field, value)
+        finally:
+            # Closes the HTTP stream right away when aborting.
+            await stream.aclose()
+        finish_reason = (response.response_metadata or {}).get("finish_reason") if response is not None else None
+        if finish_reason == "length":
+            raise TruncatedJSONError(f"Output hit the model's token limit after {len(parser.text)} characters.")
+        parser.close()
+        return response
 
     @abstractmethod
     def parse_response(self, raw_output: str, input_data: Any) -> Dict[str, Any]:
@@ -33,5 +273,3 @@ class BaseGPTAgent(ABC):
         Parse the raw output from the LLM into a structured dict.
         """
         pass
-
-
@@ -0,0 +1,66 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+
+class MicroBatcher:
+    """
+    Groups concurrent single-item calls into batched calls.
+
+    `submit` queues an item and waits for its result. A batch is handed to `process` once it
+    holds `max_size` items, or `max_wait` seconds after its first item arrived, whichever comes
+    first. `process(items)` returns one result per item, in order; an exception instance in
+    place of a result is raised to that item's caller only.
+
+    Usage:
+        batcher = MicroBatcher(agenerate_customized_web_content_batch, max_size=32)
+        rewritten = await batcher.submit({"target_audience": "YMCA", "marketing_pitch": pitch})
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_size: int = 32,
+        max_wait: float = 0.05,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        self.process = process
+        self.max_size = max_size
+        self.max_wait = max_wait
+        self._pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif len(self._pending) == 1:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            # Keep a reference so the task is not garbage collected while it runs.
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[tuple]):
+        try:
+            results = await self.process([item for item, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue  # The caller was cancelled.
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
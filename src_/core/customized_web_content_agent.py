@@ -2,10 +2,6 @@ import json
 import time
 from typing import Dict, List, Optional, Any
 from src_.core.base_agent import BaseGPTAgent  # 替换成你的实际导入路径
-from langchain_core.exceptions import LangChainException
-import requests
-import socket
-import urllib3
 
 
 class CustomizedWebContentAgent(BaseGPTAgent):
@@ -75,6 +71,13 @@ class CustomizedWebContentAgent(BaseGPTAgent):
         Below is the tag-content pairs section that you should rewrite:
         """
         prompt += sections_text
+        # Follow-up requests only carry the sections that failed validation, plus what was wrong.
+        feedback = input_data.get("feedback", "")
+        if feedback:
+            prompt += (
+                "\n\nA previous rewrite of these sections was rejected for the reasons below. "
+                "Rewrite them again and fix every problem:\n" + feedback
+            )
         return prompt.strip()
 
     def parse_response(
@@ -91,3 +94,89 @@ class CustomizedWebContentAgent(BaseGPTAgent):
                 "error": f"Failed to parse JSON: {str(e)}",
                 "raw_output": raw_output,
             }
+
+
+class BatchedCustomizedWebContentAgent(BaseGPTAgent):
+    """
+    Rewrites the same webpage sections for several targets in one request.
+
+    The instructions and the original sections are sent once, followed by each target's
+    marketing pitch; the model answers {target_audience: {tag_id: rewritten content}}.
+    Target names must be unique within a batch since they key the output.
+    """
+
+    def build_prompt(self, input_data: Dict[str, Any]) -> str:
+        positions = input_data.get("positions", [])
+        targets = input_data.get("targets", [])
+
+        if not positions or not targets:
+            raise ValueError("positions and targets must be provided.")
+        if any(not target.get("target_audience") or not target.get("marketing_pitch") for target in targets):
+            raise ValueError("Every target needs a target_audience and a marketing_pitch.")
+
+        targets_text = "\n\n".join(
+            f"### Target: \"{target['target_audience']}\"\n"
+            f"Marketing Pitch:\n{target['marketing_pitch']}"
+            for target in targets
+        )
+        sections_text = "\n".join(
+            f"- Tag: {list(section.keys())[0]}\n"
+            f"  Content (length {len(list(section.values())[0])} chars): {list(section.values())[0]}"
+            for section in positions
+        )
+        prompt = f"""
+            You are a professional website copywriter specialized in SaaS and service-based industries.
+
+            The same webpage sections must be rewritten separately for each of the {len(targets)} target audiences below.
+            Each target comes with its own **Marketing Pitch** that its rewritten sections should embody.
+
+            **Task Instructions:**
+            - Rewrite every section once for every target. Never mix targets: each rewrite uses only its own target's pitch.
+            - Each rewritten section must:
+                - Naturally and clearly mention its target audience by name several times.
+                - Don't mention the company name in the rewritten content, instead, use the service provided by the company to match the target audience's needs.
+                - Reflect the tone, themes, and messaging from that target's Marketing Pitch.
+                - Respect the original section's role and approximate length (±10%), this is a requirement.
+                - Keep the original HTML structure and the original tag_id as the output key.
+
+                Output format strictly as valid JSON, keyed by the exact target name and then by tag_id:
+                ```json
+                {{
+                    "target name 1": {{"tag_id_1": "rewritten content", "tag_id_2": "rewritten content"}},
+                    "target name 2": {{"tag_id_1": "rewritten content", "tag_id_2": "rewritten content"}}
+                }}
+
+                **Important:**
+                - Output only the JSON object, no extra text, no comments.
+                - Include every target and every tag_id, in the input order.
+
+        Targets:
+
+        """
+        prompt += targets_text
+        prompt += "\n\nBelow is the tag-content pairs section that you should rewrite for every target:\n"
+        prompt += sections_text
+        return prompt.strip()
+
+    def parse_response(
+        self, raw_output: str, input_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        try:
+            parsed = json.loads(raw_output)
+            if not isinstance(parsed, dict):
+                raise ValueError("Parsed output is not a dictionary.")
+            # Targets whose entry is missing or malformed are left out and retried individually.
+            rewritten = {
+                target["target_audience"]: parsed[target["target_audience"]]
+                for target in input_data.get("targets", [])
+                if isinstance(parsed.get(target["target_audience"]), dict)
+            }
+            if not rewritten:
+                raise ValueError("No target in the output.")
+            return {"success": True, "rewritten_content": rewritten}
+        except Exception as e:
+            return {
+                "success": False,
+                "error": f"Failed to parse JSON: {str(e)}",
+                "raw_output": raw_output,
+            }
@@ -0,0 +1,193 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Offline stand-in for ChatOpenAI, so the pipeline can be exercised and benchmarked
+# without OPENAI_API_KEY. Install it with `set_chat_model_factory(fake_chat_model_factory(...))`
+# (see src_.core.llm_backend) or by exporting TOFU_LLM_BACKEND=fake.
+
+FILLER = (
+    "Our platform streamlines accounts payable with invoice capture, approval routing and "
+    "ERP integration so finance teams close faster with fewer errors. "
+)
+
+
+def constant_latency(seconds: float) -> Callable[[], float]:
+    return lambda: seconds
+
+
+def uniform_latency(low: float, high: float, seed: Optional[int] = None) -> Callable[[], float]:
+    rng = random.Random(seed)
+    return lambda: rng.uniform(low, high)
+
+
+def lognormal_latency(median: float, sigma: float = 0.5, seed: Optional[int] = None) -> Callable[[], float]:
+    """
+    Long-tailed latency, close to what a hosted LLM API shows; `median` is in seconds.
+    """
+    rng = random.Random(seed)
+    mu = math.log(median)
+    return lambda: rng.lognormvariate(mu, sigma)
+
+
+def _filler(words: int, seed: str) -> str:
+    base = FILLER.split()
+    offset = int(seed[:8], 16) % len(base)
+    return " ".join(base[(offset + i) % len(base)] for i in range(words))
+
+
+def schema_shaped_response(prompt: str, words: int = 200) -> str:
+    """
+    Build a response with the shape the prompt asks for:
+    a {tag_id: html} object for section rewrites ({target: {tag_id: html}} for batched
+    rewrites), a JSON object for other JSON prompts,
+    and plain prose otherwise. The content is deterministic per prompt.
+    """
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    sections = re.findall(
+        r"- Tag: (\S+).*?Content \(length \d+ chars\): (.*?)(?=\n- Tag: |\n\nA previous rewrite|\Z)",
+        prompt,
+        re.DOTALL,
+    )
+    if sections:
+        def rewrite(name: str) -> dict:
+            rewritten = {}
+            for tag, original_html in sections:
+                # Same visible length as the original section, so length validation passes.
+                length = len(" ".join(re.sub(r"<[^>]+>", " ", original_html).split()))
+                text = f"{name} {_filler(length // 4 + 10, digest)}"[:max(length, len(name))].rstrip()
+                rewritten[tag] = f'<div id="{tag}"><p>{text}</p></div>'
+            return rewritten
+
+        batch_targets = re.findall(r'### Target: "([^"]+)"', prompt)
+        if batch_targets:
+            return json.dumps({name: rewrite(name) for name in batch_targets})
+        audience = re.search(r'\*\*"([^"]+)"\*\*', prompt)
+        return json.dumps(rewrite(audience.group(1) if audience else "you"))
+    if "JSON" in prompt:
+        return json.dumps({
+            "summary": _filler(words, digest),
+            "key_products": ["invoice capture", "approval workflows", "ERP sync"],
+            "fingerprint": digest[:12],
+        })
+    return _filler(words, digest)
+
+
+# Characters per streamed chunk, a few tokens like the OpenAI API sends.
+STREAM_CHUNK_CHARS = 16
+# Share of the simulated latency spent before the first streamed chunk.
+FIRST_CHUNK_LATENCY_SHARE = 0.2
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(message.content) for message in messages)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that answers locally after a simulated delay.
+
+    Attributes:
+        model_name: Reported model name.
+        responses: Canned answers, {substring of the prompt: response}; the first match wins.
+        responder: Fallback callable prompt -> response (default: `schema_shaped_response`).
+        latency: Callable returning the delay in seconds for each call (default: no delay).
+    """
+
+    model_name: str = "fake-chat"
+    responses: Dict[str, str] = {}
+    responder: Optional[Callable[[str], str]] = None
+    latency: Optional[Callable[[], float]] = None
+    call_count: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        self.call_count += 1
+        prompt = _prompt_text(messages)
+        content = next((answer for key, answer in self.responses.items() if key in prompt), None)
+        if content is None:
+            content = (self.responder or schema_shaped_response)(prompt)
+        # Rough OpenAI-style usage, about four characters per token.
+        usage = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": len(content) // 4,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        message = AIMessage(
+            content=content,
+            response_metadata={"token_usage": usage, "model_name": self.model_name},
+            usage_metadata={
+                "input_tokens": usage["prompt_tokens"],
+                "output_tokens": usage["completion_tokens"],
+                "total_tokens": usage["total_tokens"],
+            },
+        )
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"token_usage": usage, "model_name": self.model_name},
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency is not None:
+            time.sleep(self.latency())
+        return self._respond(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency is not None:
+            await asyncio.sleep(self.latency())
+        return self._respond(messages)
+
+    def _stream_pieces(self, messages: List[BaseMessage]):
+        """
+        The response as streamed chunks; the last one carries usage and finish_reason like OpenAI's.
+        """
+        message = self._respond(messages).generations[0].message
+        content = message.content
+        pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        chunks = [ChatGenerationChunk(message=AIMessageChunk(content=piece)) for piece in pieces]
+        chunks.append(ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            usage_metadata=message.usage_metadata,
+            response_metadata={"finish_reason": "stop", "model_name": self.model_name},
+        )))
+        return chunks
+
+    def _stream(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        latency = self.latency() if self.latency is not None else 0.0
+        chunks = self._stream_pieces(messages)
+        time.sleep(latency * FIRST_CHUNK_LATENCY_SHARE)
+        for chunk in chunks:
+            yield chunk
+            time.sleep(latency * (1 - FIRST_CHUNK_LATENCY_SHARE) / len(chunks))
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        latency = self.latency() if self.latency is not None else 0.0
+        chunks = self._stream_pieces(messages)
+        await asyncio.sleep(latency * FIRST_CHUNK_LATENCY_SHARE)
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(latency * (1 - FIRST_CHUNK_LATENCY_SHARE) / len(chunks))
+
+
+def fake_chat_model_factory(**fake_kwargs) -> Callable[..., FakeChatModel]:
+    """
+    Chat model factory for `set_chat_model_factory` that builds `FakeChatModel`s
+    sharing the given responses / latency settings.
+    """
+    def factory(model_name: str, temperature: float, **kwargs) -> FakeChatModel:
+        return FakeChatModel(model_name=model_name, **fake_kwargs)
+    return factory
@@ -0,0 +1,112 @@
+from typing import Callable, Dict, Iterable, Iterator, Optional, Set
+
+from src_.core.pipeline import FAILED, PipelineTarget
+from src_.entity.cache import Cache
+from src_.entity.playbook_diff import CHANGED, UNCHANGED, PlaybookDiff, PlaybookDiffer, digest_target
+
+# Cache meta key holding the shared-inputs fingerprint the stored target digests were recorded under.
+CONTEXT_META_KEY = "playbook_context"
+# Digests of finished targets are written to the store this many at a time.
+DIGEST_FLUSH_SIZE = 1000
+
+
+def _no_failures(target: PipelineTarget) -> bool:
+    return FAILED not in target.status.values()
+
+
+class IncrementalSchedule:
+    """
+    Runs only the targets added or changed since the last run, and garbage-collects the
+    cache entries of targets removed from the playbook.
+
+    The store keeps a digest of each target's url and text as last processed (see
+    src_.entity.playbook_diff), written once the target completed. The playbook is diffed
+    against it as targets stream in: unchanged targets are not scheduled, added and changed
+    ones are, and previous targets never seen are removed when the run finishes. When the
+    shared inputs (company profile, template, prompts, models) changed, every target runs.
+
+    Usage:
+        schedule = IncrementalSchedule(cache, run.shared_inputs_fingerprint(), is_complete=run.is_complete)
+        await run.run(schedule.select(targets), on_finished=schedule.finished)
+        schedule.finish()
+    """
+
+    def __init__(
+        self,
+        cache: Cache,
+        context: str,
+        sections: Optional[Iterable[str]] = None,
+        full: bool = False,
+        forced: Iterable[str] = (),
+        is_complete: Callable[[PipelineTarget], bool] = _no_failures,
+    ):
+        """
+        Args:
+            cache: Cache holding the entries and target digests.
+            context: Fingerprint of the inputs every target shares (`LandingPageRun.shared_inputs_fingerprint`).
+            sections: Pipeline sections in scope (None: all); removals are only detected within them.
+            full: Schedule every target; the playbook is still diffed and removed targets collected.
+            forced: Cache keys to schedule even if unchanged (e.g. pages a refresh found changed).
+            is_complete: Whether a finished target can be skipped until its inputs change.
+        """
+        self.cache = cache
+        self.full = full
+        self.forced: Set[str] = set(forced)
+        self.is_complete = is_complete
+        self.skipped = 0
+        previous = cache.load_target_digests(sections)
+        if cache.get_meta(CONTEXT_META_KEY) != context:
+            if previous:
+                print("[DIFF] Company info, template, prompts or models changed: processing every target")
+            self.full = True
+            # Digests recorded under the old inputs no longer mean "up to date".
+            cache.clear_target_digests()
+            cache.set_meta(CONTEXT_META_KEY, context)
+        self._differ = PlaybookDiffer(previous)
+        # Scheduled targets not finished yet, and finished ones not written yet.
+        self._scheduled: Dict[str, bytes] = {}
+        self._completed: Dict[str, bytes] = {}
+
+    def select(self, targets: Iterable[PipelineTarget]) -> Iterator[PipelineTarget]:
+        """
+        Diff each target against the last run and yield only those that have to run.
+        """
+        for target in targets:
+            digest = digest_target(target.info)
+            outcome = self._differ.compare(target.key, digest)
+            if outcome == CHANGED:
+                print(f"[DIFF] {target.key} changed: {', '.join(self._differ.diff.changed[target.key])}")
+            elif outcome == UNCHANGED and not self.full and target.key not in self.forced:
+                self.skipped += 1
+                continue
+            self._scheduled[target.key] = digest
+            yield target
+
+    def finished(self, target: PipelineTarget):
+        """
+        Record a finished target's digest if it completed, so the next run can skip it.
+        """
+        digest = self._scheduled.pop(target.key, None)
+        if digest is None or not self.is_complete(target):
+            return
+        self._completed[target.key] = digest
+        if len(self._completed) >= DIGEST_FLUSH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self._completed:
+            self.cache.record_target_digests(self._completed)
+            self._completed = {}
+
+    def finish(self) -> PlaybookDiff:
+        """
+        Write the remaining digests, drop the cache entries of removed targets and return the diff.
+        Call only once every selected target has run.
+        """
+        self._flush()
+        diff = self._differ.finish()
+        if diff.removed:
+            dropped = self.cache.remove_targets(diff.removed)
+            print(f"[DIFF] Dropped {dropped} cache entr(ies) of removed targets")
+        print(f"[DIFF] {diff.summary()} ({self.skipped} not scheduled)")
+        return diff
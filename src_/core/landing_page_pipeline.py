@@ -0,0 +1,279 @@
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src_.core.batcher import MicroBatcher
+from src_.core.pipeline import FAILED, Pipeline, PipelineTarget, Stage, StageSkipped, no_output
+from src_.core.run_journal import RunJournal
+from src_.entity.cache import Cache
+from src_.entity.field_template import FieldTemplate
+from src_.entity.fingerprint import (
+    context_fingerprint,
+    crawl_fingerprint,
+    is_stale,
+    pitch_fingerprint,
+    record_fingerprint,
+    rewrite_fingerprint,
+)
+from src_.utils.async_fetcher import AsyncFetcher
+from src_.utils.compiled_template import load_compiled_template
+from src_.utils.file_lock import atomic_write
+from src_.utils.gen_customized_web_content import (
+    agenerate_customized_web_content,
+    agenerate_customized_web_content_batch,
+    extract_tagged_content_from_html,
+)
+from src_.utils.gen_marketing_pitch import agenerate_marketing_pitch
+from src_.utils.recrawl import apply_page_validators
+from src_.utils.url_content_crawler import acrawl_content_from_url
+
+# How long a target waits at the rewrite stage for others to share its batched request.
+REWRITE_BATCH_WAIT = 0.25
+
+
+@dataclass
+class LandingPageRun:
+    """
+    The crawl -> analyse -> pitch -> rewrite -> render pipeline over a set of targets.
+
+    Every stage rebuilds its artifact only when the fingerprint of its inputs changed
+    (see src_.entity.fingerprint), and persists it on the target's cache entry right away.
+
+    Attributes:
+        cache: Cache holding one FieldTemplate per "section:name" key.
+        company_info_text: Company profile passed to the pitch prompt.
+        html_path: Landing page template.
+        positions: Placeholders to rewrite, [{"placeholder": element id}].
+        output_dir: Where `<section>:<name>.json` and `.html` are written.
+        changed_pages: Fetch results of pages found changed by a refresh pass, by cache key.
+        batch_rewrites: Rewrite several targets per LLM request (see `agenerate_customized_web_content_batch`).
+        journal: Records finished (target, stage) units so an interrupted run can resume (see RunJournal).
+        write_output: Writes one output file, (path, text); sharded workers hand it to the parent instead.
+    """
+    cache: Cache
+    company_info_text: str
+    html_path: str
+    positions: List[Dict[str, str]]
+    output_dir: str = "output"
+    changed_pages: Dict[str, dict] = field(default_factory=dict)
+    crawl_concurrency: int = 20
+    render_concurrency: int = 8
+    batch_rewrites: bool = False
+    journal: Optional[RunJournal] = None
+    write_output: Callable[[str, str], None] = atomic_write
+    _rewrite_batcher: Optional[MicroBatcher] = field(default=None, init=False, repr=False)
+    _fetcher: Optional[AsyncFetcher] = field(default=None, init=False, repr=False)
+    _extracted_positions: List[Dict[str, str]] = field(default_factory=list, init=False, repr=False)
+
+    def prepare_entry(self, target: PipelineTarget) -> FieldTemplate:
+        """
+        Return the target's cache entry with its current text and URL, creating it if needed.
+        """
+        cache_key = target.key
+        text = target.info.get("text")
+        url = target.info.get("url", "")
+        cached_entry = self.cache.cache_data.get(cache_key)
+        if cached_entry is None:
+            print(f"[NEW] {cache_key} - Not in cache, crawling and generating...")
+        entry = cached_entry or FieldTemplate()
+
+        is_modified = entry.text != text or entry.url != url
+        needs_save = is_modified or cached_entry is None
+
+        # Entries written before fingerprints existed: adopt their artifacts if URL and text still match.
+        if cached_entry and cached_entry.fingerprints is None and not is_modified and entry.crawled_content:
+            record_fingerprint(entry, "crawl", crawl_fingerprint(url))
+            if entry.marketing_pitch:
+                record_fingerprint(entry, "pitch", pitch_fingerprint(
+                    target.name, text, entry.crawled_content, self.company_info_text))
+            needs_save = True
+
+        entry.text = text
+        entry.url = url
+        if is_modified:
+            entry.last_updated = datetime.now().isoformat()
+        if needs_save:
+            self.cache.upsert(cache_key, entry)
+        return entry
+
+    async def crawl_stage(self, target: PipelineTarget) -> Optional[dict]:
+        """
+        Fetch the target's page if its analysis has to be (re)built; returns the fetch result or None.
+        Pages found changed by the refresh pass are reused instead of fetched again.
+        """
+        entry = self.prepare_entry(target)
+        if not entry.url:
+            raise StageSkipped()
+        changed_page = self.changed_pages.get(target.key)
+        if changed_page:
+            return changed_page
+        if entry.crawled_content and not is_stale(entry, "crawl", crawl_fingerprint(entry.url)):
+            return None
+        print(f"[UPDATE] {target.key} - Crawling {entry.url}")
+        page = await self._fetcher.fetch(entry.url)
+        if not page["success"]:
+            print(f"[WARN] {target.key} - Could not fetch {entry.url}: {page['error']}. Analysing URL only.")
+        return page
+
+    async def analyse_stage(self, target: PipelineTarget):
+        """
+        Analyse the fetched page. Depends on the URL, the analysis prompt and model.
+        """
+        page = target.outputs["crawl"]
+        if page is None:
+            return
+        entry = self.cache.cache_data[target.key]
+        raw_html = page.get("raw_html") if page.get("success") else None
+        print(f"[UPDATE] {target.key} - Analysing {entry.url}")
+        # Streamed, so a malformed or truncated analysis is retried without waiting for its tail.
+        entry.crawled_content = await acrawl_content_from_url(entry.url, raw_html=raw_html, stream=True)
+        if entry.crawled_content.get("success"):
+            record_fingerprint(entry, "crawl", crawl_fingerprint(entry.url))
+            if page.get("success"):
+                apply_page_validators(entry, page)
+        entry.last_updated = datetime.now().isoformat()
+        self.cache.upsert(target.key, entry)
+
+    async def pitch_stage(self, target: PipelineTarget):
+        """
+        Generate the marketing pitch. Depends on the target text, the analysis,
+        the company profile, the pitch prompt and model.
+        """
+        entry = self.cache.cache_data[target.key]
+        if not entry.crawled_content:
+            raise StageSkipped()
+        pitch_fp = pitch_fingerprint(target.name, entry.text, entry.crawled_content, self.company_info_text)
+        if entry.marketing_pitch and not is_stale(entry, "pitch", pitch_fp):
+            print(f"[SKIP] {target.key} - Marketing pitch up to date.")
+            return
+        print(f"[UPDATE] {target.key} - Generating marketing pitch")
+        entry.marketing_pitch = await agenerate_marketing_pitch(
+            text=entry.text,
+            target_audience=target.name,
+            crawled_content=entry.crawled_content,
+            company_info=self.company_info_text,
+        )
+        record_fingerprint(entry, "pitch", pitch_fp)
+        entry.last_updated = datetime.now().isoformat()
+        self.cache.upsert(target.key, entry)
+
+    async def rewrite_stage(self, target: PipelineTarget) -> Dict[str, str]:
+        """
+        Rewrite the landing page sections. Regenerated only when the pitch, the template
+        sections, the prompt or model changed. Returns {tag_id: rewritten HTML}.
+        """
+        entry = self.cache.cache_data[target.key]
+        if not entry.marketing_pitch:
+            raise StageSkipped()
+        rewrite_fp = rewrite_fingerprint(target.name, entry.marketing_pitch, self._extracted_positions)
+        if entry.rewritten_content and not is_stale(entry, "rewrite", rewrite_fp):
+            print(f"[SKIP] {target.key} - Rewritten content up to date.")
+            return entry.rewritten_content
+
+        if self._rewrite_batcher is not None:
+            replacement_content = await self._rewrite_batcher.submit(
+                {"target_audience": target.name, "marketing_pitch": entry.marketing_pitch}
+            )
+        else:
+            replacement_content = await agenerate_customized_web_content(
+                target_audience=target.name,
+                marketing_pitch=entry.marketing_pitch,
+                positions=self._extracted_positions,
+            )
+        print(f"[UPDATE] {target.key} - Rewritten")
+        entry.rewritten_content = replacement_content
+        record_fingerprint(entry, "rewrite", rewrite_fp)
+        entry.last_updated = datetime.now().isoformat()
+        self.cache.upsert(target.key, entry)
+        return replacement_content
+
+    def shared_inputs_fingerprint(self) -> str:
+        """
+        Fingerprint of what every target's artifacts are built from besides its own url and text.
+        """
+        with open(self.html_path, "r", encoding="utf-8") as f:
+            template_html = f.read()
+        return context_fingerprint(self.company_info_text, template_html, self.positions)
+
+    def is_complete(self, target: PipelineTarget) -> bool:
+        """
+        True if the target finished without failures and its artifacts are all built (or it has
+        no URL to build them from), so it need not run again until its inputs change.
+        """
+        if FAILED in target.status.values():
+            return False
+        entry = self.cache.cache_data.get(target.key)
+        if entry is None:
+            return False
+        return not entry.url or (entry.fingerprints or {}).keys() >= {"crawl", "pitch", "rewrite"}
+
+    def cached_rewrite(self, target: PipelineTarget) -> Dict[str, str]:
+        return self.cache.cache_data[target.key].rewritten_content
+
+    def render_stage(self, target: PipelineTarget):
+        """
+        Save the rewritten sections and the rendered landing page to the output folder.
+        """
+        replacement_content = target.outputs["rewrite"]
+        output_path = os.path.join(self.output_dir, target.key)
+        # Temp file + rename: a crash or a concurrent run never leaves a half-written page.
+        self.write_output(f"{output_path}.json", json.dumps(replacement_content))
+        # The rewritten snippets carry their own wrapping tag, so whole elements are replaced.
+        html = load_compiled_template(self.html_path).render(replacement_content, outer=True)
+        self.write_output(f"{output_path}.html", html)
+
+    def build_pipeline(self) -> Pipeline:
+        # The template sections are the same for every target, extract them once.
+        self._extracted_positions = extract_tagged_content_from_html(
+            positions=self.positions, html_file_path=self.html_path
+        )
+        # Analysis, pitch and rewrite are persisted on the cache entry, so a resumed run restores
+        # them from there; the crawl result is only needed by a re-run analysis.
+        return Pipeline([
+            Stage("crawl", self.crawl_stage, concurrency=self.crawl_concurrency),
+            Stage("analyse", self.analyse_stage, depends_on=["crawl"], resume=no_output),
+            Stage("pitch", self.pitch_stage, depends_on=["analyse"], resume=no_output),
+            Stage("rewrite", self.rewrite_stage, depends_on=["pitch"], resume=self.cached_rewrite),
+            Stage("render", self.render_stage, depends_on=["rewrite"], concurrency=self.render_concurrency,
+                  resume=no_output),
+        ], journal=self.journal)
+
+    async def run(
+        self,
+        targets: Iterable[PipelineTarget],
+        summary: bool = True,
+        collect: bool = True,
+        on_finished: Optional[Callable[[PipelineTarget], None]] = None,
+    ) -> List[PipelineTarget]:
+        """
+        Run every target through the pipeline, sharing one pooled fetcher
+        (and, with batch_rewrites, one rewrite batcher).
+
+        `targets` may be a generator: it is consumed as the pipeline makes progress (see
+        `Pipeline.stream`). With `collect=False` the finished targets are not kept, so memory
+        does not grow with the playbook; the run's results live in the cache and output folder.
+        `on_finished` is called with each target as it finishes.
+        """
+        pipeline = self.build_pipeline()
+        if self.batch_rewrites:
+            # Targets reaching the rewrite stage around the same time share requests.
+            self._rewrite_batcher = MicroBatcher(
+                lambda batch: agenerate_customized_web_content_batch(batch, self._extracted_positions),
+                max_wait=REWRITE_BATCH_WAIT,
+            )
+        async with AsyncFetcher() as fetcher:
+            self._fetcher = fetcher
+            try:
+                return await pipeline.run(targets, summary=summary, collect=collect, on_finished=on_finished)
+            finally:
+                self._fetcher = None
+                self._rewrite_batcher = None
+
+
+def company_info_text(cache: Cache, company_name: str) -> str:
+    """
+    Company profile text used in the pitch prompts, as stored by `Cache.update_company_info`.
+    """
+    return cache.cache_data[f"company:{company_name}"].to_string()
@@ -0,0 +1,250 @@
+import asyncio
+import os
+import threading
+import weakref
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+from src_.core.metrics import metrics
+
+if TYPE_CHECKING:
+    import httpx
+
+# Which chat model class the agents and the src/ modules talk to.
+# Set TOFU_LLM_BACKEND=fake to run everything against `FakeChatModel` (no API key needed).
+LLM_BACKEND_ENV = "TOFU_LLM_BACKEND"
+
+# Connections to the API kept by the shared HTTP clients (all models talk to one host).
+HTTP_MAX_CONNECTIONS = 64
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 32
+HTTP_KEEPALIVE_EXPIRY = 60.0
+
+ChatModelFactory = Callable[..., Any]
+
+_chat_model_factory: Optional[ChatModelFactory] = None
+
+
+class HTTPClientPool:
+    """
+    Process-wide keep-alive HTTP clients handed to every ChatOpenAI, so TLS sessions and
+    open connections are reused across agents, targets and models instead of each client
+    opening its own.
+
+    Async connections belong to the event loop that opened them, and scripts may call
+    asyncio.run more than once, so the async client keeps one connection pool per loop.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self._lock = threading.Lock()
+        self._sync_client = None
+        self._async_client = None
+        self._async_transports = weakref.WeakKeyDictionary()
+
+    def _limits(self) -> "httpx.Limits":
+        import httpx
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def sync_client(self) -> "httpx.Client":
+        import httpx
+        with self._lock:
+            if self._sync_client is None:
+                self._sync_client = httpx.Client(limits=self._limits())
+            return self._sync_client
+
+    def async_client(self) -> "httpx.AsyncClient":
+        import httpx
+        with self._lock:
+            if self._async_client is None:
+                self._async_client = httpx.AsyncClient(transport=_loop_local_transport(self))
+            return self._async_client
+
+    def transport_for_running_loop(self) -> "httpx.AsyncHTTPTransport":
+        import httpx
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            transport = self._async_transports.get(loop)
+            if transport is None:
+                transport = httpx.AsyncHTTPTransport(limits=self._limits())
+                self._async_transports[loop] = transport
+            return transport
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Open connections in the shared pools, {"sync_connections": n, "async_connections": n}.
+        """
+        with self._lock:
+            sync_client = self._sync_client
+            async_transports = list(self._async_transports.values())
+        return {
+            "sync_connections": _open_connections(sync_client._transport) if sync_client is not None else 0,
+            "async_connections": sum(_open_connections(transport) for transport in async_transports),
+        }
+
+
+def _open_connections(transport) -> int:
+    pool = getattr(transport, "_pool", None)
+    return len(getattr(pool, "connections", ()))
+
+
+def _loop_local_transport(pool: HTTPClientPool) -> "httpx.AsyncBaseTransport":
+    """
+    A transport sending each request through the connection pool of the event loop it runs on.
+    (Defined on first use, so httpx is only imported once a chat model is created.)
+    """
+    import httpx
+
+    class _LoopLocalTransport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+            return await pool.transport_for_running_loop().handle_async_request(request)
+
+    return _LoopLocalTransport()
+
+
+http_client_pool = HTTPClientPool()
+
+
+def default_chat_model_factory(model_name: str, temperature: float, request_timeout: float = 60) -> Any:
+    if os.environ.get(LLM_BACKEND_ENV) == "fake":
+        from src_.core.fake_llm import FakeChatModel
+        return FakeChatModel(model_name=model_name)
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model=model_name,
+        temperature=temperature,
+        request_timeout=request_timeout,
+        http_client=http_client_pool.sync_client(),
+        http_async_client=http_client_pool.async_client(),
+    )
+
+
+ClientKey = Tuple[str, float, float]
+
+
+class ChatModelRegistry:
+    """
+    Process-wide chat models keyed by (model, temperature, timeout). Agents borrow the
+    model for their settings instead of building a client per call, so every agent with
+    the same settings shares one client and, through `http_client_pool`, one set of
+    keep-alive connections.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[ClientKey, Any] = {}
+
+    def get(self, model_name: str, temperature: float, request_timeout: float = 60) -> Any:
+        key = (model_name, float(temperature), float(request_timeout))
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                factory = _chat_model_factory or default_chat_model_factory
+                model = factory(model_name=model_name, temperature=temperature, request_timeout=request_timeout)
+                self._models[key] = model
+                metrics.inc("llm_clients_created_total", model=model_name)
+            else:
+                metrics.inc("llm_client_reuses_total", model=model_name)
+            return model
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._models)
+
+
+chat_model_registry = ChatModelRegistry()
+
+
+def set_chat_model_factory(factory: Optional[ChatModelFactory]):
+    """
+    Replace the factory used by `create_chat_model`, e.g. with
+    `fake_chat_model_factory(...)` for tests and benchmarks. None restores the default.
+    Models built by the previous factory are dropped from the registry.
+    """
+    global _chat_model_factory
+    _chat_model_factory = factory
+    chat_model_registry.clear()
+
+
+def create_chat_model(model_name: str, temperature: float, request_timeout: float = 60) -> Any:
+    """
+    The chat model for an agent or module. Every LLM client in the project goes through here;
+    models are shared per (model, temperature, timeout), see `ChatModelRegistry`.
+    """
+    return chat_model_registry.get(model_name, temperature, request_timeout)
+
+
+def llm_pool_stats() -> Dict[str, int]:
+    """
+    Shared chat models and open API connections, e.g. for the end-of-run metrics.
+    """
+    return {"clients": len(chat_model_registry), **http_client_pool.stats()}
+
+
+# Exception classes for except clauses. The libraries are imported on first use, and an
+# except clause only evaluates its expression once an exception reached it.
+
+@lru_cache(maxsize=None)
+def langchain_errors() -> Tuple[type, ...]:
+    """
+    Errors raised by LangChain chat models.
+    """
+    from langchain_core.exceptions import LangChainException
+    return (LangChainException,)
+
+
+@lru_cache(maxsize=None)
+def connection_errors() -> Tuple[type, ...]:
+    """
+    `langchain_errors()` plus the transport errors worth retrying a request for.
+    """
+    import socket
+
+    import requests
+    import urllib3
+    return langchain_errors() + (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, socket.error)
+
+
+@lru_cache(maxsize=None)
+def openai_errors() -> Tuple[type, ...]:
+    """
+    Errors raised by the OpenAI client.
+    """
+    import openai
+    return (openai.OpenAIError,)
+
+
+@dataclass
+class ContextWindow:
+    context_tokens: int
+    max_output_tokens: int
+
+
+# Published limits of the models this project uses; unknown models get the conservative default.
+CONTEXT_WINDOWS: Dict[str, ContextWindow] = {
+    "gpt-3.5-turbo": ContextWindow(context_tokens=16385, max_output_tokens=4096),
+    "gpt-4": ContextWindow(context_tokens=8192, max_output_tokens=4096),
+    "gpt-4-turbo": ContextWindow(context_tokens=128000, max_output_tokens=4096),
+    "gpt-4o": ContextWindow(context_tokens=128000, max_output_tokens=16384),
+    "gpt-4o-mini": ContextWindow(context_tokens=128000, max_output_tokens=16384),
+}
+DEFAULT_CONTEXT_WINDOW = ContextWindow(context_tokens=8192, max_output_tokens=4096)
+
+
+def context_window(model_name: str) -> ContextWindow:
+    return CONTEXT_WINDOWS.get(model_name, DEFAULT_CONTEXT_WINDOW)
@@ -0,0 +1,212 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+@dataclass
+class Timing:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    return ",".join(f"{name}={value}" for name, value in key)
+
+
+def _prometheus_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    escaped = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in key
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and timings, labelled like Prometheus metrics.
+
+    Counters (names ending in `_total`) count events or tokens; timings record count,
+    sum and max of durations in seconds. Everything is thread-safe, so sync code running
+    in worker threads and async code on the event loop can report into the same registry.
+
+    Usage:
+        metrics.inc("llm_retries_total", operation="crawl")
+        with metrics.timer("cache_save_seconds"):
+            ...
+        print(metrics.summary_table())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._timings: Dict[str, Dict[LabelKey, Timing]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._timings.setdefault(name, {})
+            timing = series.get(key)
+            if timing is None:
+                timing = series[key] = Timing()
+            timing.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """
+        Time the block into the `name` timing, also when it raises.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(name, {}).get(_label_key(labels), 0)
+
+    def timing(self, name: str, **labels) -> Timing:
+        with self._lock:
+            timing = self._timings.get(name, {}).get(_label_key(labels))
+            return Timing(**asdict(timing)) if timing else Timing()
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+
+    def snapshot(self) -> dict:
+        """
+        All metrics as plain data: {"counters": {name: [{labels, value}]}, "timings": {name: [{labels, count, sum, max}]}}.
+        """
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+                    for name, series in sorted(self._counters.items())
+                },
+                "timings": {
+                    name: [
+                        {"labels": dict(key), "count": t.count, "sum": round(t.total, 6), "max": round(t.max, 6)}
+                        for key, t in sorted(series.items())
+                    ]
+                    for name, series in sorted(self._timings.items())
+                },
+            }
+
+    def merge(self, snapshot: dict):
+        """
+        Add a `snapshot()` taken in another process (e.g. a sharded worker) into this registry.
+        """
+        with self._lock:
+            for name, samples in snapshot.get("counters", {}).items():
+                series = self._counters.setdefault(name, {})
+                for sample in samples:
+                    key = _label_key(sample["labels"])
+                    series[key] = series.get(key, 0) + sample["value"]
+            for name, samples in snapshot.get("timings", {}).items():
+                series = self._timings.setdefault(name, {})
+                for sample in samples:
+                    key = _label_key(sample["labels"])
+                    timing = series.get(key)
+                    if timing is None:
+                        timing = series[key] = Timing()
+                    timing.count += sample["count"]
+                    timing.total += sample["sum"]
+                    timing.max = max(timing.max, sample["max"])
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Prometheus text exposition format; timings are exported as summaries (`_count`, `_sum`).
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, series in snapshot["counters"].items():
+            lines.append(f"# TYPE {name} counter")
+            for sample in series:
+                lines.append(f"{name}{_prometheus_labels(_label_key(sample['labels']))} {sample['value']}")
+        for name, series in snapshot["timings"].items():
+            lines.append(f"# TYPE {name} summary")
+            for sample in series:
+                labels = _prometheus_labels(_label_key(sample["labels"]))
+                lines.append(f"{name}_count{labels} {sample['count']}")
+                lines.append(f"{name}_sum{labels} {sample['sum']}")
+        return "\n".join(lines) + "\n"
+
+    def summary_table(self) -> str:
+        """
+        Human-readable per-run summary: timings sorted by total time, then counters.
+        """
+        with self._lock:
+            timings = [
+                (name, key, Timing(**asdict(t)))
+                for name, series in self._timings.items() for key, t in series.items()
+            ]
+            counters = [
+                (name, key, value)
+                for name, series in sorted(self._counters.items()) for key, value in sorted(series.items())
+            ]
+        timings.sort(key=lambda row: row[2].total, reverse=True)
+
+        lines = [f"{'timing':<80} {'count':>8} {'total s':>10} {'mean s':>9} {'max s':>9}"]
+        for name, key, t in timings:
+            label = f"{name}{{{_format_labels(key)}}}" if key else name
+            lines.append(f"{label:<80} {t.count:>8} {t.total:>10.3f} {t.mean:>9.4f} {t.max:>9.4f}")
+        lines.append("")
+        lines.append(f"{'counter':<80} {'value':>8}")
+        for name, key, value in counters:
+            label = f"{name}{{{_format_labels(key)}}}" if key else name
+            lines.append(f"{label:<80} {value:>8g}")
+        return "\n".join(lines)
+
+
+# Shared by every component so one run reports into one place.
+metrics = MetricsRegistry()
+
+
+def record_llm_usage(response, **labels) -> int:
+    """
+    Count prompt/completion tokens reported on a LangChain chat response, when present.
+    Returns the total (0 if the response carries no usage).
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        prompt_tokens, completion_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    else:
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        prompt_tokens, completion_tokens = token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+    if prompt_tokens:
+        metrics.inc("llm_prompt_tokens_total", prompt_tokens, **labels)
+    if completion_tokens:
+        metrics.inc("llm_completion_tokens_total", completion_tokens, **labels)
+    return prompt_tokens + completion_tokens
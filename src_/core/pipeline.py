@@ -0,0 +1,342 @@
+import asyncio
+import hashlib
+import inspect
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src_.core.base_agent import ConcurrencyLimiter
+from src_.core.metrics import metrics
+from src_.entity.target_records import SECTIONS_BY_JSON_KEY, TargetRecord
+
+DONE = "done"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+# Targets started and not yet finished at any time. Targets are read from their iterable
+# only as slots free up, so a streamed playbook is never held in memory whole.
+DEFAULT_MAX_IN_FLIGHT = 1000
+
+
+class StageSkipped(Exception):
+    """
+    Raised by a stage function when there is nothing to do for this target.
+    Stages that depend on it are skipped as well; this is not reported as a failure.
+    """
+
+
+@dataclass
+class Stage:
+    """
+    One node of the pipeline DAG.
+
+    `func` receives the `PipelineTarget` and may be sync or async; sync functions run
+    in a worker thread. Its return value is stored in `target.outputs[name]`.
+    `concurrency` caps how many targets may be inside this stage at once (None = no cap).
+    `resume` rebuilds the output of a stage that finished in an earlier, journaled run
+    (e.g. from the cache); stages without it are re-run on resume when a later stage
+    still needs their output (see `Pipeline`).
+    """
+    name: str
+    func: Callable[["PipelineTarget"], Any]
+    depends_on: List[str] = field(default_factory=list)
+    concurrency: Optional[int] = None
+    resume: Optional[Callable[["PipelineTarget"], Any]] = None
+
+
+@dataclass
+class PipelineTarget:
+    """
+    One unit of work flowing through the pipeline (an account, industry, persona, ...).
+    """
+    section: str
+    name: str
+    info: Dict[str, Any] = field(default_factory=dict)
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    status: Dict[str, str] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    # Wall time from the first stage starting to the last one finishing, in seconds.
+    elapsed: Optional[float] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.section}:{self.name}"
+
+
+def target_digest(info: Dict[str, Any]) -> str:
+    """
+    Digest of a target's input; journal records made for other inputs are not trusted on resume.
+    """
+    encoded = json.dumps(info, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def no_output(target: PipelineTarget) -> None:
+    """
+    `Stage.resume` for stages whose work is persisted elsewhere and that return nothing.
+    """
+    return None
+
+
+def targets_from_grouped_info(
+    grouped_info: Dict[str, Dict[str, dict]], sections: Optional[Iterable[str]] = None
+) -> List[PipelineTarget]:
+    """
+    Build pipeline targets from `Playbook.target_info_grouping()`, optionally for some sections only.
+    """
+    wanted = set(sections) if sections is not None else None
+    return [
+        PipelineTarget(section=section_name, name=key, info=value_dict)
+        for section_name, section_data in grouped_info.items()
+        if wanted is None or section_name in wanted
+        for key, value_dict in section_data.items()
+    ]
+
+
+def targets_from_records(
+    records: Iterable[TargetRecord], sections: Optional[Iterable[str]] = None
+) -> Iterable[PipelineTarget]:
+    """
+    Lazily build pipeline targets from target records (e.g. `stream_target_records`), with the
+    same sections, names and info as `targets_from_grouped_info(playbook.target_info_grouping())`.
+    """
+    wanted = set(sections) if sections is not None else None
+    for record in records:
+        schema = SECTIONS_BY_JSON_KEY.get(record.section)
+        if schema is None or (wanted is not None and schema.section not in wanted):
+            continue
+        info = record.info()
+        if info is not None:
+            yield PipelineTarget(section=schema.section, name=record.name, info=info)
+
+
+class Pipeline:
+    """
+    Runs a DAG of stages over many targets.
+
+    Every target flows through the DAG on its own: a stage starts for a target as soon as
+    that target's dependencies are done, without waiting for other targets. If a stage
+    fails or is skipped, everything downstream of it is skipped for that target only.
+
+    With a `RunJournal`, every stage outcome is recorded as it happens. Units the journal
+    already has as finished for the same target input are not run again: their output is
+    restored with `Stage.resume`, or not needed because every later stage is restored too.
+    Failed units are retried until they failed `journal.max_attempts` times.
+
+    Usage:
+        pipeline = Pipeline([
+            Stage("crawl", crawl),
+            Stage("analyse", analyse, depends_on=["crawl"], concurrency=8),
+        ])
+        await pipeline.run(targets)
+    """
+
+    def __init__(self, stages: List[Stage], journal=None):
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+        for stage in stages:
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dependency}'")
+        self.order = self._topological_order()
+        self.journal = journal
+        self._dependents = {
+            name: [stage.name for stage in stages if name in stage.depends_on] for name in self.stages
+        }
+        self._limiters = {
+            stage.name: ConcurrencyLimiter(stage.concurrency)
+            for stage in stages
+            if stage.concurrency is not None
+        }
+
+    def _topological_order(self) -> List[str]:
+        remaining = {name: set(stage.depends_on) for name, stage in self.stages.items()}
+        order = []
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Pipeline has a dependency cycle between: {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    async def _call(self, stage: Stage, target: PipelineTarget) -> Any:
+        if inspect.iscoroutinefunction(stage.func):
+            return await stage.func(target)
+        return await asyncio.to_thread(stage.func, target)
+
+    def _resume_plan(self, target: PipelineTarget, digest: str) -> Dict[str, str]:
+        """
+        {stage: journaled status} of the stages that do not have to run again for this target.
+        """
+        plan = {}
+        for name in reversed(self.order):
+            status = self.journal.finished_status(target.key, name, digest)
+            if status is None:
+                continue
+            stage = self.stages[name]
+            if status == SKIPPED or stage.resume is not None or all(d in plan for d in self._dependents[name]):
+                plan[name] = status
+        return plan
+
+    async def _run_stage(
+        self,
+        stage: Stage,
+        target: PipelineTarget,
+        dependencies: List[asyncio.Task],
+        resumed: Optional[str] = None,
+        digest: Optional[str] = None,
+    ) -> str:
+        upstream = await asyncio.gather(*dependencies)
+        if any(status != DONE for status in upstream):
+            target.status[stage.name] = SKIPPED
+            return SKIPPED
+
+        if resumed is not None:
+            if resumed == DONE and stage.resume is not None:
+                target.outputs[stage.name] = stage.resume(target)
+            target.status[stage.name] = resumed
+            metrics.inc("pipeline_stage_runs_total", stage=stage.name, status="resumed")
+            return resumed
+        if self.journal is not None and self.journal.is_given_up(target.key, stage.name, digest):
+            target.errors[stage.name] = f"gave up after {self.journal.max_attempts} failed attempts"
+            target.status[stage.name] = FAILED
+            return FAILED
+
+        limiter = self._limiters.get(stage.name)
+        try:
+            if limiter is None:
+                with metrics.timer("pipeline_stage_seconds", stage=stage.name):
+                    target.outputs[stage.name] = await self._call(stage, target)
+            else:
+                async with limiter.slot():
+                    with metrics.timer("pipeline_stage_seconds", stage=stage.name):
+                        target.outputs[stage.name] = await self._call(stage, target)
+            status = DONE
+        except StageSkipped:
+            status = SKIPPED
+        except Exception as e:
+            print(f"[ERROR] {target.key} - Stage '{stage.name}' failed: {str(e)}")
+            target.errors[stage.name] = str(e)
+            status = FAILED
+        target.status[stage.name] = status
+        metrics.inc("pipeline_stage_runs_total", stage=stage.name, status=status)
+        if self.journal is not None:
+            self.journal.record(target.key, stage.name, status, digest, target.errors.get(stage.name))
+        return status
+
+    async def run_target(self, target: PipelineTarget) -> PipelineTarget:
+        """
+        Run every stage for one target, starting each as soon as its dependencies are done.
+        """
+        started = time.perf_counter()
+        digest = target_digest(target.info) if self.journal is not None else None
+        plan = self._resume_plan(target, digest) if self.journal is not None else {}
+        tasks = {}
+        for name in self.order:
+            stage = self.stages[name]
+            dependencies = [tasks[dependency] for dependency in stage.depends_on]
+            tasks[name] = asyncio.ensure_future(
+                self._run_stage(stage, target, dependencies, resumed=plan.get(name), digest=digest)
+            )
+        await asyncio.gather(*tasks.values())
+        target.elapsed = time.perf_counter() - started
+        return target
+
+    async def _run_window(
+        self, targets: Iterable[PipelineTarget], max_in_flight: int
+    ) -> AsyncIterator[Tuple[int, PipelineTarget]]:
+        """
+        Yield (input position, finished target) in completion order, starting a new target
+        from `targets` whenever one finishes.
+        """
+        iterator = iter(targets)
+        running: Dict[asyncio.Future, int] = {}
+        position = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(running) < max_in_flight:
+                    target = next(iterator, None)
+                    if target is None:
+                        exhausted = True
+                        break
+                    running[asyncio.ensure_future(self.run_target(target))] = position
+                    position += 1
+                if not running:
+                    return
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    yield running.pop(task), task.result()
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def stream(
+        self, targets: Iterable[PipelineTarget], max_in_flight: int = DEFAULT_MAX_IN_FLIGHT
+    ) -> AsyncIterator[PipelineTarget]:
+        """
+        Run the pipeline over targets read lazily from `targets` (a list or a generator),
+        yielding each target as it finishes. At most `max_in_flight` targets are in progress;
+        the next one is read only when a slot frees up, so processing starts right away and
+        memory does not grow with the number of targets.
+        """
+        async for _, target in self._run_window(targets, max_in_flight):
+            yield target
+
+    async def run(
+        self,
+        targets: Iterable[PipelineTarget],
+        summary: bool = True,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        collect: bool = True,
+        on_finished: Optional[Callable[[PipelineTarget], None]] = None,
+    ) -> List[PipelineTarget]:
+        """
+        Run the pipeline over all targets (see `stream`) and print a per-stage summary.
+        Returns the targets in input order; with `collect=False` finished targets are only
+        counted, not kept, and an empty list is returned. `on_finished` is called with each
+        target as it finishes.
+        """
+        counts = self.new_counts()
+        results = []
+        async for position, target in self._run_window(targets, max_in_flight):
+            self.add_to_counts(counts, target)
+            if on_finished is not None:
+                on_finished(target)
+            if collect:
+                results.append((position, target))
+        if summary:
+            self.print_counts(counts)
+        results.sort(key=lambda item: item[0])
+        return [target for _, target in results]
+
+    def new_counts(self) -> Dict[str, Dict[str, int]]:
+        return {name: {DONE: 0, SKIPPED: 0, FAILED: 0} for name in self.order}
+
+    def add_to_counts(self, counts: Dict[str, Dict[str, int]], target: PipelineTarget):
+        for name, stage_counts in counts.items():
+            status = target.status.get(name)
+            if status in stage_counts:
+                stage_counts[status] += 1
+
+    def print_counts(self, counts: Dict[str, Dict[str, int]]):
+        for name in self.order:
+            stage_counts = counts[name]
+            print(f"[PIPELINE] {name}: {stage_counts[DONE]} done, {stage_counts[SKIPPED]} skipped, "
+                  f"{stage_counts[FAILED]} failed")
+        if self.journal is not None:
+            print(self.journal.report())
+
+    def print_summary(self, targets: List[PipelineTarget]):
+        counts = self.new_counts()
+        for target in targets:
+            self.add_to_counts(counts, target)
+        self.print_counts(counts)
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from src_.core.metrics import metrics
+
+# Completion tokens assumed per request until the real usage is known.
+DEFAULT_COMPLETION_TOKENS = 1000
+
+
+@dataclass
+class ModelLimits:
+    requests_per_minute: float
+    tokens_per_minute: float
+
+
+class _Bucket:
+    """
+    Token bucket that may go negative: a negative level is the backlog already promised
+    to earlier callers, which is what makes reservations first-come, first-served.
+    """
+
+    def __init__(self, per_minute: float, now: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, cost: float, now: float) -> float:
+        """
+        Take `cost` from the bucket and return how long the caller must wait before using it.
+        """
+        self._refill(now)
+        # A single request larger than the whole budget would otherwise never be allowed.
+        self.level -= min(cost, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+    def credit(self, amount: float, now: float):
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Process-wide requests-per-minute and tokens-per-minute budget, per model.
+
+    Each call reserves one request and its estimated tokens up front. Reservations are
+    granted in arrival order, so callers queue fairly instead of all retrying into 429s;
+    the wait is the time until both buckets have refilled enough for that reservation.
+    Once the real token usage is known, `settle` returns (or charges) the difference.
+    Models without configured limits are not throttled.
+
+    Usage:
+        rate_limiter.set_limits("gpt-4o", ModelLimits(requests_per_minute=500, tokens_per_minute=30000))
+        reserved = await rate_limiter.aacquire("gpt-4o", estimated_tokens)
+        ...
+        rate_limiter.settle("gpt-4o", reserved, actual_tokens)
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._limits: Dict[str, ModelLimits] = {}
+        self._buckets: Dict[str, tuple] = {}
+
+    def set_limits(self, model_name: str, limits: Optional[ModelLimits]):
+        """
+        Configure (or with None, remove) the budget of one model. Resets its buckets.
+        """
+        with self._lock:
+            self._buckets.pop(model_name, None)
+            if limits is None:
+                self._limits.pop(model_name, None)
+            else:
+                self._limits[model_name] = limits
+
+    def limits(self, model_name: str) -> Optional[ModelLimits]:
+        return self._limits.get(model_name)
+
+    def _model_buckets(self, model_name: str, now: float):
+        buckets = self._buckets.get(model_name)
+        if buckets is None:
+            limits = self._limits[model_name]
+            buckets = (_Bucket(limits.requests_per_minute, now), _Bucket(limits.tokens_per_minute, now))
+            self._buckets[model_name] = buckets
+        return buckets
+
+    def reserve(self, model_name: str, tokens: int) -> float:
+        """
+        Reserve one request and `tokens` tokens; returns the delay in seconds before sending.
+        """
+        with self._lock:
+            if model_name not in self._limits:
+                return 0.0
+            now = self._clock()
+            requests, token_bucket = self._model_buckets(model_name, now)
+            return max(requests.reserve(1, now), token_bucket.reserve(tokens, now))
+
+    def settle(self, model_name: str, reserved_tokens: int, actual_tokens: int):
+        """
+        Correct a reservation with the real usage reported by the API.
+        """
+        with self._lock:
+            buckets = self._buckets.get(model_name)
+            if buckets is not None:
+                buckets[1].credit(reserved_tokens - actual_tokens, self._clock())
+
+    def acquire(self, model_name: str, tokens: int) -> int:
+        """
+        Block until the request fits the model's budget. Returns the reserved token count.
+        """
+        delay = self.reserve(model_name, tokens)
+        if delay > 0:
+            metrics.observe("rate_limit_wait_seconds", delay, model=model_name)
+            time.sleep(delay)
+        return tokens
+
+    async def aacquire(self, model_name: str, tokens: int) -> int:
+        """
+        Async counterpart of `acquire`; waits without blocking the event loop.
+        """
+        delay = self.reserve(model_name, tokens)
+        if delay > 0:
+            metrics.observe("rate_limit_wait_seconds", delay, model=model_name)
+            await asyncio.sleep(delay)
+        return tokens
+
+
+# Shared by every agent so the whole process stays under the provider's limits.
+rate_limiter = RateLimiter()
+
+
+def set_rate_limits(limits: Dict[str, ModelLimits]):
+    """
+    Configure the process-wide budget, {model_name: ModelLimits}.
+    """
+    for model_name, model_limits in limits.items():
+        rate_limiter.set_limits(model_name, model_limits)
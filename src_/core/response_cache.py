@@ -0,0 +1,161 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src_.utils.sqlite_utils import connect, immediate_transaction
+
+
+DEFAULT_MAX_ENTRIES = 2048
+DEFAULT_MAX_AGE_SECONDS = 7 * 24 * 3600
+# Hits whose `last_access` is written in one transaction: lookups are plain reads, and only
+# every this many hits (or the next `set`) takes the write lock shared by all processes.
+TOUCH_BATCH_SIZE = 256
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of raw LLM responses.
+
+    Entries are keyed by a hash of the model name, temperature and the fully rendered
+    messages, so an identical prompt (another account, a rerun, a retry) is answered locally.
+    Backed by SQLite: ':memory:' for a per-process cache, a file path to share across runs.
+    Entries older than `max_age_seconds` expire; beyond `max_entries` the least recently
+    used entries are evicted. A file cache can be shared by several processes: lookups
+    only read, and the access times of hits are written in batches.
+    """
+
+    def __init__(
+        self,
+        db_path: str = ":memory:",
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # {key: access time} of hits not written yet.
+        self._touched: Dict[str, float] = {}
+        self.conn = connect(db_path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access
+                ON llm_responses (last_access);
+            """
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, temperature: float, messages: List) -> str:
+        """
+        Hash the model name, temperature and rendered messages into a cache key.
+        """
+        payload = json.dumps(
+            {
+                "model": model_name,
+                "temperature": temperature,
+                "messages": [
+                    {"role": getattr(message, "type", message.__class__.__name__), "content": message.content}
+                    for message in messages
+                ],
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            # A plain read: hits from several processes do not queue on the write lock.
+            row = self.conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                if row is not None:
+                    with immediate_transaction(self.conn):
+                        # Unless another process stored a fresh response meanwhile.
+                        self.conn.execute(
+                            "DELETE FROM llm_responses WHERE key = ? AND created_at = ?", (key, row[1])
+                        )
+                    self._touched.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_BATCH_SIZE:
+                with immediate_transaction(self.conn):
+                    self._write_touches()
+            return row[0]
+
+    def set(self, key: str, response: str):
+        now = time.time()
+        with self._lock, immediate_transaction(self.conn):
+            self._write_touches()
+            self.conn.execute(
+                "INSERT INTO llm_responses (key, response, created_at, last_access) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET response = excluded.response, "
+                "created_at = excluded.created_at, last_access = excluded.last_access",
+                (key, response, now, now),
+            )
+            self._touched.pop(key, None)
+            self._evict(now)
+
+    def _write_touches(self):
+        """
+        Write the pending access times of hits; the caller holds the write transaction.
+        """
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE llm_responses SET last_access = MAX(last_access, ?) WHERE key = ?",
+                [(accessed, key) for key, accessed in self._touched.items()],
+            )
+            self._touched = {}
+
+    def _evict(self, now: float):
+        self.conn.execute(
+            "DELETE FROM llm_responses WHERE created_at < ?", (now - self.max_age_seconds,)
+        )
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM llm_responses WHERE key IN "
+                "(SELECT key FROM llm_responses ORDER BY last_access LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock, immediate_transaction(self.conn):
+            self.conn.execute("DELETE FROM llm_responses")
+            self._touched = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self.conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        return count
+
+
+_default_response_cache = ResponseCache()
+
+
+def get_default_response_cache() -> ResponseCache:
+    return _default_response_cache
+
+
+def set_default_response_cache(cache: ResponseCache):
+    """
+    Replace the cache used by agents that were not given their own,
+    e.g. with a file-backed one so responses survive across runs.
+    """
+    global _default_response_cache
+    _default_response_cache = cache
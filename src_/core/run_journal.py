@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src_.core.pipeline import DONE, FAILED, SKIPPED
+from src_.utils.file_lock import FileLock
+
+# Failed attempts of one (target, stage) unit, across resumed runs, before it is given up on.
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+class JournalState:
+    """
+    Latest outcome of every journaled (target, stage) unit, and its failed attempts.
+
+    `RunJournal` keeps it in step with the journal file; a sharded worker gets the part
+    that concerns its own targets (see `subset`) and reports new outcomes to the parent.
+    """
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        # (target key, stage) -> latest record, plus failed attempts per unit.
+        self._latest: Dict[Tuple[str, str], dict] = {}
+        self._failures: Dict[Tuple[str, str], int] = {}
+        # Units that finished in this run; counted, not kept (see `_record`).
+        self._finished = 0
+
+    def _apply(self, record: dict):
+        unit = (record["target"], record["stage"])
+        previous = self._latest.get(unit)
+        if previous is not None and previous["digest"] != record["digest"]:
+            # The target's input changed: earlier failures say nothing about the new one.
+            self._failures.pop(unit, None)
+        if record["status"] == FAILED:
+            self._failures[unit] = self._failures.get(unit, 0) + 1
+        elif unit in self._failures:
+            del self._failures[unit]
+        self._latest[unit] = record
+
+    def _record(self, record: dict):
+        """
+        Apply an outcome of the current run. A target runs once per run, so only failed
+        units (for their attempt counts and the report) are kept; finished ones are counted,
+        and memory does not grow with the number of targets.
+        """
+        self._apply(record)
+        if record["status"] != FAILED:
+            del self._latest[(record["target"], record["stage"])]
+            self._finished += 1
+
+    def subset(self, target_keys: Iterable[str], stages: Iterable[str]) -> "JournalState":
+        """
+        Copy of the state of the given targets' units only, looked up unit by unit.
+        """
+        units = [(key, stage) for key in target_keys for stage in stages]
+        state = JournalState(self.max_attempts)
+        state._latest = {unit: self._latest[unit] for unit in units if unit in self._latest}
+        state._failures = {unit: self._failures[unit] for unit in units if unit in self._failures}
+        return state
+
+    def finished_status(self, target_key: str, stage: str, digest: str) -> Optional[str]:
+        """
+        DONE or SKIPPED if the unit already finished for this target input, else None.
+        """
+        record = self._latest.get((target_key, stage))
+        if record and record["status"] in (DONE, SKIPPED) and record["digest"] == digest:
+            return record["status"]
+        return None
+
+    def is_given_up(self, target_key: str, stage: str, digest: str) -> bool:
+        """
+        True if the unit failed `max_attempts` times for this target input.
+        """
+        record = self._latest.get((target_key, stage))
+        return (
+            record is not None
+            and record["status"] == FAILED
+            and record["digest"] == digest
+            and self._failures.get((target_key, stage), 0) >= self.max_attempts
+        )
+
+    def permanent_failures(self) -> List[dict]:
+        return [
+            record for unit, record in sorted(self._latest.items())
+            if record["status"] == FAILED and self._failures.get(unit, 0) >= self.max_attempts
+        ]
+
+    def report(self) -> str:
+        failures = self.permanent_failures()
+        pending = [
+            record for unit, record in sorted(self._latest.items())
+            if record["status"] == FAILED and self._failures.get(unit, 0) < self.max_attempts
+        ]
+        lines = [
+            f"[JOURNAL] {self._finished + sum(1 for r in self._latest.values() if r['status'] != FAILED)} unit(s) finished, "
+            f"{len(pending)} failed and retryable with --resume, {len(failures)} permanently failed"
+        ]
+        for record in failures:
+            lines.append(
+                f"[FAILED] {record['target']} / {record['stage']} after {self._failures[(record['target'], record['stage'])]} "
+                f"attempt(s): {record.get('error', '')}"
+            )
+        return "\n".join(lines)
+
+
+class RunJournal(JournalState):
+    """
+    Append-only record of finished (target, stage) units, so an interrupted run can resume.
+
+    Each unit outcome is one JSON line, flushed and fsynced before the pipeline moves on,
+    so a crash loses at most the unit that was in flight. A torn last line is ignored on load.
+    Without `resume` the journal starts empty; with it, earlier records are loaded and
+    `Pipeline` skips units that finished for the same target input, retries failed ones,
+    and gives up on units that failed `max_attempts` times (see `permanent_failures`).
+    Of the units recorded during the run, only failed ones stay in memory.
+
+    Usage:
+        journal = RunJournal("cache/run_journal.jsonl", resume=True)
+        await Pipeline(stages, journal=journal).run(targets)
+        print(journal.report())
+    """
+
+    def __init__(self, path: str, resume: bool = False, max_attempts: int = DEFAULT_MAX_ATTEMPTS, fsync: bool = True):
+        super().__init__(max_attempts)
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # One run per journal: a second one fails fast instead of interleaving records.
+        self._file_lock = FileLock(f"{path}.lock", timeout=0)
+        self._file_lock.acquire()
+        torn = self._load() if resume else False
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        if torn:
+            # Terminate the torn line so the next record starts on a line of its own.
+            self._file.write("\n")
+
+    def _load(self) -> bool:
+        """
+        Read earlier records. Returns True if the file ends with a torn (unterminated) line.
+        """
+        if not os.path.exists(self.path):
+            return False
+        loaded = 0
+        line = ""
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"[WARN] Ignoring a torn record in {self.path}")
+                    continue
+                self._apply(record)
+                loaded += 1
+        print(f"[RESUME] Loaded {loaded} journal record(s) from {self.path}")
+        return bool(line) and not line.endswith("\n")
+
+    def record(self, target_key: str, stage: str, status: str, digest: str, error: Optional[str] = None):
+        record = {
+            "target": target_key,
+            "stage": stage,
+            "status": status,
+            "digest": digest,
+            "time": datetime.now().isoformat(),
+        }
+        if error is not None:
+            record["error"] = error
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._record(record)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._file_lock.release()
@@ -0,0 +1,318 @@
+import asyncio
+import json
+import math
+import multiprocessing
+import queue
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from src_.core.base_agent import DEFAULT_MAX_CONCURRENCY, set_max_concurrency
+from src_.core.landing_page_pipeline import LandingPageRun
+from src_.core.metrics import metrics
+from src_.core.pipeline import PipelineTarget
+from src_.core.rate_limiter import ModelLimits, set_rate_limits
+from src_.core.response_cache import ResponseCache, set_default_response_cache
+from src_.core.run_journal import JournalState
+from src_.entity.cache import Cache
+from src_.entity.field_template import FieldTemplate
+from src_.utils.compiled_template import load_compiled_template
+from src_.utils.file_lock import atomic_write
+
+# How long the parent waits on the result queue before checking whether a worker died.
+RESULT_POLL_SECONDS = 0.1
+# Targets handed to a worker at a time, and shards queued or running per worker: targets are
+# read from their iterable only as shards finish.
+SHARD_CHUNK_SIZE = 100
+MAX_PENDING_SHARDS_PER_WORKER = 2
+
+
+@dataclass
+class WorkerSettings:
+    """
+    Process-wide settings every worker applies before running its shard.
+
+    Attributes:
+        max_concurrency: In-flight LLM requests for the whole run; each worker gets an equal share.
+        rate_limits: Provider budgets for the whole run, {model: ModelLimits}; split the same way.
+        response_cache_path: Shared LLM response cache file (':memory:' keeps one per worker).
+        setup: Called first in every worker, e.g. to install a fake chat model factory.
+            Must be picklable (a module-level function).
+    """
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    rate_limits: Dict[str, ModelLimits] = field(default_factory=dict)
+    response_cache_path: str = ":memory:"
+    setup: Optional[Callable[[], None]] = None
+
+
+@dataclass
+class _ShardCache(Cache):
+    """
+    Worker-side cache holding the entries of one shard. The parent owns the store:
+    every write is sent back to it instead of being persisted here.
+    """
+    send: Optional[Callable[[tuple], None]] = None
+
+    def __post_init__(self):
+        self._persisted = {key: self._serialize(entry) for key, entry in self.cache_data.items()}
+        self._batch_depth = 0
+
+    def upsert(self, key: str, entry: FieldTemplate):
+        self.cache_data[key] = entry
+        data = self._serialize(entry)
+        self._persisted[key] = data
+        self.send(("entry", key, data))
+
+    def save_cache(self):
+        for key, entry in self.cache_data.items():
+            if self._persisted.get(key) != self._serialize(entry):
+                self.upsert(key, entry)
+
+
+class _ForwardingJournal(JournalState):
+    """
+    Journal state of one shard; new outcomes are recorded by the parent's RunJournal.
+    """
+
+    def __init__(self, state: JournalState, send: Callable[[tuple], None]):
+        super().__init__(state.max_attempts)
+        self._latest = state._latest
+        self._failures = state._failures
+        self._send = send
+
+    def record(self, target_key: str, stage: str, status: str, digest: str, error: Optional[str] = None):
+        record = {"target": target_key, "stage": stage, "status": status, "digest": digest}
+        if error is not None:
+            record["error"] = error
+        self._record(record)
+        self._send(("journal", target_key, stage, status, digest, error))
+
+
+# Set once per worker process by `_init_worker`.
+_worker_run: Optional[LandingPageRun] = None
+_worker_queue = None
+
+
+def _init_worker(run: LandingPageRun, settings: WorkerSettings, workers: int, results):
+    """
+    Runs once in every worker: applies its share of the LLM budgets and pre-loads the
+    compiled template, so shards only pay for per-target work.
+    """
+    global _worker_run, _worker_queue
+    if settings.setup is not None:
+        settings.setup()
+    set_max_concurrency(max(1, math.ceil(settings.max_concurrency / workers)))
+    set_rate_limits({
+        model: ModelLimits(
+            requests_per_minute=limits.requests_per_minute / workers,
+            tokens_per_minute=limits.tokens_per_minute / workers,
+        )
+        for model, limits in settings.rate_limits.items()
+    })
+    set_default_response_cache(ResponseCache(settings.response_cache_path))
+    load_compiled_template(run.html_path)
+    _worker_run = run
+    _worker_queue = results
+
+
+def _send(message: tuple):
+    _worker_queue.put(message)
+
+
+def _run_shard(index: int, targets: List[PipelineTarget], entries: Dict[str, str], journal: Optional[JournalState]):
+    """
+    Run one shard in a worker. Cache entries, output files and journal records are streamed
+    to the parent as they are produced; the last message carries the per-target results.
+    """
+    metrics.reset()
+    cache = _ShardCache(
+        cache_file=_worker_run.cache.cache_file,
+        cache_data={key: FieldTemplate(**json.loads(data)) for key, data in entries.items()},
+        send=_send,
+    )
+    run = replace(
+        _worker_run,
+        cache=cache,
+        journal=_ForwardingJournal(journal, _send) if journal is not None else None,
+        write_output=lambda path, data: _send(("output", path, data)),
+    )
+    results = asyncio.run(run.run(targets, summary=False))
+    summaries = [
+        PipelineTarget(
+            section=target.section,
+            name=target.name,
+            status=target.status,
+            errors=target.errors,
+            elapsed=target.elapsed,
+        )
+        for target in results
+    ]
+    _send(("done", index, summaries, metrics.snapshot()))
+
+
+def partition_targets(targets: List[PipelineTarget], shards: int) -> List[List[PipelineTarget]]:
+    """
+    Split targets round-robin into at most `shards` non-empty shards of near-equal size.
+    """
+    return [shard for shard in (targets[i::shards] for i in range(shards)) if shard]
+
+
+def run_sharded(
+    run: LandingPageRun,
+    targets: Iterable[PipelineTarget],
+    workers: int,
+    settings: Optional[WorkerSettings] = None,
+    chunk_size: int = SHARD_CHUNK_SIZE,
+    collect: bool = True,
+    on_finished: Optional[Callable[[PipelineTarget], None]] = None,
+) -> List[PipelineTarget]:
+    """
+    Run the landing page pipeline over `targets` on a pool of `workers` processes.
+
+    Each worker has the run's configuration and compiled template pre-loaded, and gets
+    shards of targets with their cache entries. Workers do the per-target work (prompting,
+    parsing, rendering) and stream their results back; this process alone writes the cache,
+    the output files and the journal, as results arrive.
+
+    `targets` is read lazily: shards of `chunk_size` targets are handed out as they are read,
+    with at most `MAX_PENDING_SHARDS_PER_WORKER` per worker queued or running, so a streamed
+    playbook is never held whole. Inputs that fit in one round of shards are split evenly
+    across the workers instead.
+
+    Args:
+        run (LandingPageRun): Configured run; its cache and journal stay in this process.
+        targets (Iterable[PipelineTarget]): Targets to process, e.g. a generator.
+        workers (int): Number of worker processes.
+        settings (WorkerSettings): LLM budgets and setup applied in every worker.
+        chunk_size (int): Targets per shard.
+        collect (bool): Keep and return the results; False returns an empty list.
+        on_finished: Called with the result of each target as its shard finishes.
+
+    Returns:
+        List[PipelineTarget]: One result per target with status, errors and elapsed time
+        (stage outputs stay in the workers), in shard order.
+    """
+    settings = settings or WorkerSettings()
+    iterator = iter(targets)
+    first_round = list(islice(iterator, workers * chunk_size))
+    if len(first_round) < workers * chunk_size:
+        # Everything was read already: spread it evenly rather than in full shards.
+        shards = iter(partition_targets(first_round, workers))
+        pool_size = max(1, min(workers, len(first_round)))
+    else:
+        shards = chain(_chunks(first_round, chunk_size), _chunks(iterator, chunk_size))
+        pool_size = workers
+    del first_round
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    # The parent's cache and journal are not shipped with the run configuration.
+    worker_config = replace(run, cache=_ShardCache(cache_file=run.cache.cache_file), journal=None)
+    company_keys = [key for key in run.cache.cache_data if key.startswith("company:")]
+    pipeline = run.build_pipeline()
+    counts = pipeline.new_counts()
+
+    collected: Dict[int, List[PipelineTarget]] = {}
+    futures: Dict[int, Future] = {}
+    submitted = processed = 0
+    exhausted = False
+    writes: List[Future] = []
+
+    def on_shard(index: int, summaries: List[PipelineTarget]):
+        nonlocal processed
+        del futures[index]
+        processed += len(summaries)
+        for target in summaries:
+            pipeline.add_to_counts(counts, target)
+            if on_finished is not None:
+                on_finished(target)
+        if collect:
+            collected[index] = summaries
+
+    print(f"[SHARD] Up to {pool_size} worker(s), {chunk_size} target(s) per shard")
+    # Output files are written off the result loop, as many at once as the render stage would.
+    with ThreadPoolExecutor(max_workers=run.render_concurrency) as writer, ProcessPoolExecutor(
+        max_workers=pool_size,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(worker_config, settings, pool_size, results),
+    ) as executor:
+        while True:
+            while not exhausted and len(futures) < pool_size * MAX_PENDING_SHARDS_PER_WORKER:
+                shard = next(shards, None)
+                if shard is None:
+                    exhausted = True
+                    break
+                keys = [target.key for target in shard]
+                entries = {
+                    key: Cache._serialize(run.cache.cache_data[key])
+                    for key in keys + company_keys if key in run.cache.cache_data
+                }
+                journal = run.journal.subset(keys, pipeline.order) if run.journal is not None else None
+                futures[submitted] = executor.submit(_run_shard, submitted, shard, entries, journal)
+                submitted += 1
+            if exhausted and not futures:
+                break
+            messages = _drain(results)
+            if not messages:
+                for future in futures.values():
+                    if future.done() and future.exception() is not None:
+                        raise future.exception()
+                continue
+            _apply_messages(run, messages, on_shard, writer, writes)
+    for write in writes:
+        write.result()
+
+    print(f"[SHARD] {processed} target(s) in {submitted} shard(s) across {pool_size} worker(s)")
+    pipeline.print_counts(counts)
+    return [target for index in sorted(collected) for target in collected[index]]
+
+
+def _chunks(targets: Iterable[PipelineTarget], size: int) -> Iterator[List[PipelineTarget]]:
+    iterator = iter(targets)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _drain(results) -> List[tuple]:
+    """
+    Wait for the next message, then take whatever else is already queued.
+    """
+    try:
+        messages = [results.get(timeout=RESULT_POLL_SECONDS)]
+    except queue.Empty:
+        return []
+    while True:
+        try:
+            messages.append(results.get_nowait())
+        except queue.Empty:
+            return messages
+
+
+def _apply_messages(
+    run: LandingPageRun,
+    messages: List[tuple],
+    on_shard: Callable[[int, List[PipelineTarget]], None],
+    writer: ThreadPoolExecutor,
+    writes: List[Future],
+):
+    # Entries that arrived together are committed in one transaction.
+    with run.cache.batch():
+        for message in messages:
+            kind = message[0]
+            if kind == "entry":
+                _, key, data = message
+                run.cache.upsert(key, FieldTemplate(**json.loads(data)))
+            elif kind == "output":
+                _, path, data = message
+                writes.append(writer.submit(atomic_write, path, data))
+            elif kind == "journal":
+                if run.journal is not None:
+                    run.journal.record(*message[1:])
+            elif kind == "done":
+                _, index, summaries, snapshot = message
+                metrics.merge(snapshot)
+                on_shard(index, summaries)
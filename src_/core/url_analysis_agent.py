@@ -2,6 +2,17 @@
 from typing import Any, Dict
 from src_.core.base_agent import BaseGPTAgent
 
+# Characters of a page's HTML the analysis prompt includes.
+ANALYSED_HTML_CHARS = 3000
+
+
+def analysed_html(raw_html: str) -> str:
+    """
+    The part of a page's HTML the analysis sees; a page whose prefix is unchanged
+    analyses the same.
+    """
+    return raw_html[:ANALYSED_HTML_CHARS]
+
 
 class URLAnalysisAgent(BaseGPTAgent):
     """
@@ -19,7 +30,7 @@ class URLAnalysisAgent(BaseGPTAgent):
             Given the following webpage:
 
             URL: {url}
-            HTML Content (truncated to 3000 chars): {raw_html[:3000]}
+            HTML Content (truncated to {ANALYSED_HTML_CHARS} chars): {analysed_html(raw_html)}
             Context: {context}
 
             Please extract the following in JSON format:
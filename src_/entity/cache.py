@@ -1,46 +1,198 @@
+from contextlib import contextmanager
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 import json
-from typing import Dict, Optional
-from src_.utils.gen_marketing_pitch import generate_marketing_pitch
+import os
+from typing import Dict, Iterable, Optional
 from src_.entity.playbook import CompanyInfo
 from src_.entity.field_template import FieldTemplate
+from src_.entity.cache_store import SQLiteCacheStore
+from src_.core.metrics import metrics
+from src_.utils.file_lock import FileLock
 from src_.utils.url_content_crawler import crawl_content_from_url
+from src_.utils.recrawl import apply_page_validators
 
 # this is a simple cache designed for this project only.
-# It only supports single thread operation.
+# Entries live in an embedded SQLite database, one row per cache key,
+# so saving only writes the entries that actually changed.
+# Several processes may share one cache file: each writes only the keys it changed
+# (merge-on-write), and `refresh` picks up entries written by the others.
 
 @dataclass
 class Cache:
-    cache_file: str = "cache.json"
+    cache_file: str = "cache.db"
     cache_data: Dict[str, FieldTemplate] = field(default_factory=dict)
 
     def __post_init__(self):
+        self._store = SQLiteCacheStore(self.cache_file)
+        # Serialized form of every entry as last read from / written to the store.
+        self._persisted: Dict[str, str] = {}
+        self._batch_depth = 0
         self.cache_data = self.load_cache()
 
+    @staticmethod
+    def _serialize(entry: FieldTemplate) -> str:
+        return json.dumps(entry.__dict__, ensure_ascii=False)
+
     def load_cache(self) -> Dict[str, FieldTemplate]:
         """
-        Load the cache data from the file.
-        If the cache file does not exist, return an empty dictionary.
+        Load the cache data from the store.
+        If the store is empty, return an empty dictionary.
         """
-        try:
-            with open(self.cache_file, "r") as file:
-                raw_data = json.load(file)
-                return {key: FieldTemplate(**value) for key, value in raw_data.items()}
-        except FileNotFoundError:
-            return {}
+        with metrics.timer("cache_load_seconds"):
+            self._persisted = self._store.load_all()
+            return {key: FieldTemplate(**json.loads(data)) for key, data in self._persisted.items()}
 
     def save_cache(self):
         """
-        Save the cache data to the file.
-        Converts the cache data into a dictionary format suitable for JSON serialization.
+        Persist the cache data to the store.
+        Only entries that were added, modified or removed since the last save are written,
+        all in a single transaction. Inside a `batch()` block the write is deferred until the block exits.
         """
-        with open(self.cache_file, "w") as file:
-            json.dump(
-                {key: value.__dict__ for key, value in self.cache_data.items()},
-                file,
-                indent=4,
-            )
+        if self._batch_depth:
+            return
+        with metrics.timer("cache_save_seconds"):
+            upserts = {}
+            for key, value in self.cache_data.items():
+                data = self._serialize(value)
+                if self._persisted.get(key) != data:
+                    upserts[key] = (data, value.last_updated)
+            deletes = [key for key in self._persisted if key not in self.cache_data]
+            if not upserts and not deletes:
+                return
+            self._store.write(upserts, deletes)
+        metrics.inc("cache_entries_written_total", len(upserts) + len(deletes))
+        for key, (data, _) in upserts.items():
+            self._persisted[key] = data
+        for key in deletes:
+            del self._persisted[key]
+
+    def refresh(self) -> int:
+        """
+        Merge in entries other processes wrote since this cache was loaded or last saved.
+        Entries changed locally and not saved yet are kept. Returns the number of entries updated.
+        """
+        stored = self._store.load_all()
+        updated = 0
+        for key, data in stored.items():
+            if self._persisted.get(key) == data:
+                continue
+            local = self.cache_data.get(key)
+            if local is not None and self._serialize(local) != self._persisted.get(key):
+                continue  # Unsaved local change wins; it is written on the next save.
+            self.cache_data[key] = FieldTemplate(**json.loads(data))
+            self._persisted[key] = data
+            updated += 1
+        for key in [key for key in self._persisted if key not in stored]:
+            # Removed by another process; drop it unless changed here since.
+            local = self.cache_data.get(key)
+            if local is None or self._serialize(local) == self._persisted[key]:
+                self.cache_data.pop(key, None)
+                del self._persisted[key]
+                updated += 1
+        return updated
+
+    def upsert(self, key: str, entry: FieldTemplate):
+        """
+        Insert or replace a single entry and persist just that entry.
+        """
+        self.cache_data[key] = entry
+        if self._batch_depth:
+            return
+        with metrics.timer("cache_upsert_seconds"):
+            data = self._serialize(entry)
+            self._store.write({key: (data, entry.last_updated)})
+        metrics.inc("cache_entries_written_total")
+        self._persisted[key] = data
+
+    def get(self, key: str) -> Optional[FieldTemplate]:
+        """
+        Look up a single entry by its 'section:name' key directly from the store.
+        """
+        data = self._store.get(key)
+        return FieldTemplate(**json.loads(data)) if data is not None else None
+
+    def keys_in_section(self, section: str):
+        """
+        Return the cache keys of one section (e.g. 'accounts') using the section index.
+        """
+        return self._store.keys_in_section(section)
+
+    def load_target_digests(self, sections: Optional[Iterable[str]] = None) -> Dict[str, bytes]:
+        """
+        Snapshot of the playbook as last processed: {cache key: digest} (see src_.entity.playbook_diff).
+        A target is recorded only once every stage of the pipeline finished without failing for it.
+        """
+        return self._store.load_digests(sections)
+
+    def record_target_digests(self, digests: Dict[str, bytes]):
+        self._store.write_digests(digests)
+
+    def clear_target_digests(self):
+        self._store.clear_digests()
+
+    def remove_targets(self, keys: Iterable[str]) -> int:
+        """
+        Drop the entries and digests of targets removed from the playbook. Returns the number of entries dropped.
+        """
+        keys = list(keys)
+        removed = 0
+        for key in keys:
+            if self.cache_data.pop(key, None) is not None:
+                removed += 1
+            self._persisted.pop(key, None)
+        self._store.delete_targets(keys)
+        return removed
+
+    def get_meta(self, key: str) -> Optional[str]:
+        return self._store.get_meta(key)
+
+    def set_meta(self, key: str, value: str):
+        self._store.set_meta(key, value)
+
+    @contextmanager
+    def batch(self):
+        """
+        Group many updates into one transactional commit:
+
+            with cache.batch():
+                cache.upsert(...)
+                cache.save_cache()
+
+        Nothing is written until the outermost block exits.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+        if not self._batch_depth:
+            self.save_cache()
+
+    def import_json_cache(self, json_path: str) -> int:
+        """
+        One-time import of a legacy cache.json file into the store.
+        Keys already present in the store are kept. Returns the number of imported entries.
+        """
+        marker = f"imported:{os.path.abspath(json_path)}"
+        if not os.path.exists(json_path) or self._store.get_meta(marker):
+            return 0
+        # Processes starting together must not both import.
+        with FileLock(f"{self.cache_file}.lock"):
+            if self._store.get_meta(marker):
+                self.refresh()
+                return 0
+            with open(json_path, "r") as file:
+                raw_data = json.load(file)
+            imported = 0
+            with self.batch():
+                for key, value in raw_data.items():
+                    if key not in self.cache_data:
+                        self.cache_data[key] = FieldTemplate(**value)
+                        imported += 1
+            self._store.set_meta(marker, datetime.now().isoformat())
+        print(f"[CACHE] Imported {imported} entries from {json_path}")
+        return imported
 
     def check_field_update(self, key: str, new_text: str, new_url: str) -> bool:
         """
@@ -117,11 +269,14 @@ class Cache:
         self.save_cache()
         
     def update_cache_with_grouped_target_info(
-        self, grouped_info: Dict[str, Dict[str, dict]]
+        self, grouped_info: Dict[str, Dict[str, dict]], changed_pages: Optional[Dict[str, dict]] = None
     ):
         """
         Update the cache using grouped target information (accounts, personas, etc.).
+        `changed_pages` ({cache_key: fetch result}, see `detect_changed_pages`) forces a
+        re-crawl of entries whose page content changed even though their URL did not.
         """
+        changed_pages = changed_pages or {}
         # print(f"[CACHE] cache_key: {self.cache_data.keys()}")
         NEW_ENTRY_COUNT = 0
         UPDATED_ENTRY_COUNT = 0
@@ -158,6 +313,15 @@ class Cache:
                             # marketing_pitch = generate_marketing_pitch(new_entry.text, crawled_content)
                             # new_entry.marketing_pitch = marketing_pitch
                         self.cache_data[cache_key] = new_entry
+                    elif cache_key in changed_pages:
+                        print(f"[UPDATE] {cache_key} page content changed")
+                        UPDATED_ENTRY_COUNT += 1
+                        page = changed_pages[cache_key]
+                        cached_entry.crawled_content = crawl_content_from_url(
+                            cached_entry.url, raw_html=page.get("raw_html")
+                        )
+                        apply_page_validators(cached_entry, page)
+                        cached_entry.last_updated = datetime.now().isoformat()
                     else:
                         print(f"[SKIP] {cache_key} unchanged")
                         SKIPPED_ENTRY_COUNT += 1
@@ -170,7 +334,8 @@ class Cache:
     def clear_cache(self):
         """
         Clear all the cached data.
-        Resets the cache and saves an empty cache to the file.
+        Resets the cache and removes every entry from the store.
         """
         self.cache_data = {}
-        self.save_cache()
+        self._store.clear()
+        self._persisted = {}
@@ -0,0 +1,147 @@
+from typing import Dict, Iterable, List, Optional
+
+from src_.utils.sqlite_utils import connect, immediate_transaction
+
+
+class SQLiteCacheStore:
+    """
+    Embedded SQLite storage behind `Cache`.
+    Each cache entry is one row keyed by its `section:name` cache key, holding the
+    FieldTemplate serialized as JSON, so a single changed entry is a single-row upsert.
+    Several processes may share one database file (WAL mode, writers queue on the lock).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            key TEXT PRIMARY KEY,
+            section TEXT NOT NULL,
+            name TEXT NOT NULL,
+            data TEXT NOT NULL,
+            last_updated TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_cache_entries_section_name
+            ON cache_entries (section, name);
+        CREATE TABLE IF NOT EXISTS cache_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS target_digests (
+            key TEXT PRIMARY KEY,
+            section TEXT NOT NULL,
+            digest BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_target_digests_section
+            ON target_digests (section);
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = connect(db_path)
+        with immediate_transaction(self.conn):
+            for statement in self.SCHEMA.split(";"):
+                if statement.strip():
+                    self.conn.execute(statement)
+
+    @staticmethod
+    def split_key(key: str):
+        """
+        Split a cache key such as 'accounts:YMCA' into ('accounts', 'YMCA').
+        """
+        section, _, name = key.partition(":")
+        return section, name
+
+    def load_all(self) -> Dict[str, str]:
+        rows = self.conn.execute("SELECT key, data FROM cache_entries")
+        return {key: data for key, data in rows}
+
+    def get(self, key: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT data FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def keys_in_section(self, section: str) -> List[str]:
+        rows = self.conn.execute(
+            "SELECT key FROM cache_entries WHERE section = ? ORDER BY name", (section,)
+        )
+        return [row[0] for row in rows]
+
+    def write(self, upserts: Dict[str, tuple], deletes: Iterable[str] = ()):
+        """
+        Apply upserts ({key: (data, last_updated)}) and deletes in one transaction.
+        """
+        rows = []
+        for key, (data, last_updated) in upserts.items():
+            section, name = self.split_key(key)
+            rows.append((key, section, name, data, last_updated))
+        with immediate_transaction(self.conn):
+            self.conn.executemany(
+                """
+                INSERT INTO cache_entries (key, section, name, data, last_updated)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    data = excluded.data,
+                    last_updated = excluded.last_updated
+                """,
+                rows,
+            )
+            self.conn.executemany(
+                "DELETE FROM cache_entries WHERE key = ?", [(key,) for key in deletes]
+            )
+
+    def load_digests(self, sections: Optional[Iterable[str]] = None) -> Dict[str, bytes]:
+        """
+        {key: digest} of the targets last processed successfully, optionally for some sections only.
+        """
+        if sections is None:
+            rows = self.conn.execute("SELECT key, digest FROM target_digests")
+            return {key: digest for key, digest in rows}
+        digests = {}
+        for section in sections:
+            rows = self.conn.execute("SELECT key, digest FROM target_digests WHERE section = ?", (section,))
+            digests.update(rows)
+        return digests
+
+    def write_digests(self, upserts: Dict[str, bytes]):
+        rows = [(key, self.split_key(key)[0], digest) for key, digest in upserts.items()]
+        with immediate_transaction(self.conn):
+            self.conn.executemany(
+                "INSERT INTO target_digests (key, section, digest) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET digest = excluded.digest",
+                rows,
+            )
+
+    def clear_digests(self):
+        with immediate_transaction(self.conn):
+            self.conn.execute("DELETE FROM target_digests")
+
+    def delete_targets(self, keys: Iterable[str]):
+        """
+        Delete the cache entries and digests of the given keys in one transaction.
+        """
+        rows = [(key,) for key in keys]
+        with immediate_transaction(self.conn):
+            self.conn.executemany("DELETE FROM cache_entries WHERE key = ?", rows)
+            self.conn.executemany("DELETE FROM target_digests WHERE key = ?", rows)
+
+    def clear(self):
+        with immediate_transaction(self.conn):
+            self.conn.execute("DELETE FROM cache_entries")
+            self.conn.execute("DELETE FROM target_digests")
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT value FROM cache_meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with immediate_transaction(self.conn):
+            self.conn.execute(
+                "INSERT INTO cache_meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    def close(self):
+        self.conn.close()
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import Optional, Any
+from typing import Dict, Optional, Any
 from datetime import datetime
 import json  # used for deep comparison
 
@@ -12,6 +12,14 @@ class FieldTemplate:
     content: Optional[Any] = None   # New: store full structured content (e.g. dict)
     last_updated: Optional[str] = None  
     tofu_insight: Optional[str] = None
+    # HTTP validators and body hash of the last fetched page, used for conditional re-crawls.
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    # Rewritten landing page sections {tag_id: html} generated from the marketing pitch.
+    rewritten_content: Optional[Dict[str, str]] = None
+    # Fingerprint of the inputs each artifact ("crawl", "pitch", "rewrite") was built from.
+    fingerprints: Optional[Dict[str, str]] = None
 
     def has_changed(self, other: "FieldTemplate", compare_content: bool = False) -> bool:
         """
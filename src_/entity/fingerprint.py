@@ -0,0 +1,87 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+
+from src_.core.customized_web_content_agent import CustomizedWebContentAgent
+from src_.core.marketing_pitch_generation_agent import MarketingPitchGenerationAgent
+from src_.core.url_analysis_agent import URLAnalysisAgent
+from src_.entity.field_template import FieldTemplate
+from src_.utils import gen_customized_web_content, gen_marketing_pitch, url_content_crawler
+
+# Artifacts cached on a FieldTemplate, each built from its own set of inputs:
+#   crawl   -> crawled_content    (url, URL analysis prompt, model)
+#   pitch   -> marketing_pitch    (target, text, crawled_content, company info, pitch prompt, model)
+#   rewrite -> rewritten_content  (target, marketing_pitch, template sections, rewrite prompt, model)
+# An artifact is recomputed only when the fingerprint of its inputs differs from the recorded one.
+# Downstream artifacts hash upstream *outputs*, so an upstream recompute that yields the
+# same result does not cascade.
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Stable hash of JSON-serializable parts.
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def crawl_fingerprint(
+    url: str,
+    model_name: str = url_content_crawler.DEFAULT_MODEL_NAME,
+    temperature: float = url_content_crawler.DEFAULT_TEMPERATURE,
+) -> str:
+    return fingerprint("crawl", url, URLAnalysisAgent.prompt_version(), model_name, temperature)
+
+
+def pitch_fingerprint(
+    target_audience: str,
+    text: Optional[str],
+    crawled_content: Any,
+    company_info: str,
+    model_name: str = gen_marketing_pitch.DEFAULT_MODEL_NAME,
+    temperature: float = gen_marketing_pitch.DEFAULT_TEMPERATURE,
+) -> str:
+    return fingerprint(
+        "pitch", target_audience, text, crawled_content, company_info,
+        MarketingPitchGenerationAgent.prompt_version(), model_name, temperature,
+    )
+
+
+def rewrite_fingerprint(
+    target_audience: str,
+    marketing_pitch: str,
+    positions: List[Dict[str, str]],
+    model_name: str = gen_customized_web_content.DEFAULT_MODEL_NAME,
+    temperature: float = gen_customized_web_content.DEFAULT_TEMPERATURE,
+) -> str:
+    return fingerprint(
+        "rewrite", target_audience, marketing_pitch, positions,
+        CustomizedWebContentAgent.prompt_version(), model_name, temperature,
+    )
+
+
+def is_stale(entry: FieldTemplate, artifact: str, inputs_fingerprint: str) -> bool:
+    """
+    True if the artifact was never recorded or was built from different inputs.
+    """
+    return (entry.fingerprints or {}).get(artifact) != inputs_fingerprint
+
+
+def record_fingerprint(entry: FieldTemplate, artifact: str, inputs_fingerprint: str):
+    if entry.fingerprints is None:
+        entry.fingerprints = {}
+    entry.fingerprints[artifact] = inputs_fingerprint
+
+
+def context_fingerprint(company_info: str, template_html: str, positions: List[Dict[str, str]]) -> str:
+    """
+    Hash of the inputs every target shares: company profile, landing page template,
+    placeholders, prompts and models. Targets unchanged in the playbook are only skipped
+    while it stays the same (see src_.core.incremental).
+    """
+    return fingerprint(
+        "context", company_info, template_html, positions,
+        URLAnalysisAgent.prompt_version(), url_content_crawler.DEFAULT_MODEL_NAME,
+        MarketingPitchGenerationAgent.prompt_version(), gen_marketing_pitch.DEFAULT_MODEL_NAME,
+        CustomizedWebContentAgent.prompt_version(), gen_customized_web_content.DEFAULT_MODEL_NAME,
+    )
@@ -2,6 +2,9 @@ from typing import Dict
 from dataclasses import dataclass
 import json
 
+from src_.entity.playbook_diff import PlaybookDiff, diff_snapshots, iter_record_digests
+from src_.entity.target_records import PlaybookTargets
+
 @dataclass
 class CompanyInfo:
     company_name: str
@@ -41,34 +44,27 @@ class CompanyInfo:
 
 @dataclass
 class TargetInfo:
-    accounts: Dict[str, dict]
-    personas: Dict[str, dict]
-    industries: Dict[str, dict]
-    healthcare_subverticals: Dict[str, dict]
+    """
+    Targets of target_info.json, parsed once into compact records (see `PlaybookTargets`).
+    The section accessors return {name: {"url", "text"}}.
+    """
+    targets: PlaybookTargets
 
     @classmethod
     def from_json(cls, path: str):
-        with open(path, "r", encoding="utf-8") as f:
-            target_data = json.load(f)
-
-        accounts = target_data["Accounts"]
-        personas = target_data["Personas"]
-        industries = target_data["Industries"]
-        healthcare_subverticals = target_data["Healthcare Subverticals"]
-        
-        return cls(accounts, personas, industries, healthcare_subverticals)
+        return cls(PlaybookTargets.from_json(path))
 
     def get_accounts(self):
-        return self.accounts
+        return self.targets.grouped_section("Accounts")
 
     def get_personas(self):
-        return self.personas
+        return self.targets.grouped_section("Personas")
 
     def get_industries(self):
-        return self.industries
-    
+        return self.targets.grouped_section("Industries")
+
     def get_healthcare_subverticals(self):
-        return self.healthcare_subverticals
+        return self.targets.grouped_section("Healthcare Subverticals")
 
 @dataclass
 class Playbook:
@@ -84,12 +80,7 @@ class Playbook:
     def to_dict(self) -> dict:
         return {
             "company_info": self.company_info.get_all_fields(),
-            "target_info": {
-                "accounts": self.target_info.get_accounts(),
-                "personas": self.target_info.get_personas(),
-                "industries": self.target_info.get_industries(),
-                "healthcare_subverticals": self.target_info.get_healthcare_subverticals()
-            },
+            "target_info": self.target_info.targets.flattened(),
             "target_info_grouping": self.target_info_grouping()
         }
 
@@ -98,62 +89,19 @@ class Playbook:
         Group the target info by account, industry, persona, and healthcare subvertical.
         Only include relevant fields: 'text' and 'url' values.
         """
-        grouped_info = {
-            "accounts": {},
-            "industries": {},
-            "personas": {},
-            "healthcare_subverticals": {}
-        }
+        return self.target_info.targets.grouping()
 
-        # Group accounts: Only include URL and text values
-        for account_name, account_data in self.target_info.get_accounts().items():
-            account_values = {}
-            for entry in account_data.get("data", []):
-                if "value" in entry:
-                    if entry["type"] == "url":
-                        account_values["url"] = entry["value"]
-                    elif entry["type"] == "text":
-                        account_values["text"] = entry["value"]
-            if account_values:  # Only include accounts with data
-                grouped_info["accounts"][account_name] = account_values
-
-        # Group industries: Only include URL and text values
-        for industry_name, industry_data in self.target_info.get_industries().items():
-            industry_values = {}
-            for entry in industry_data.get("data", []):
-                if "value" in entry:
-                    if entry["type"] == "url":
-                        industry_values["url"] = entry["value"]
-                    elif entry["type"] == "text":
-                        industry_values["text"] = entry["value"]
-            if industry_values:  # Only include industries with data
-                grouped_info["industries"][industry_name] = industry_values
-
-        # Group personas: Only include URL and text values
-        for persona_name, persona_data in self.target_info.get_personas().items():
-            persona_values = {}
-            for entry in persona_data.get("data", []):
-                if "value" in entry:
-                    if entry["type"] == "url":
-                        persona_values["url"] = entry["value"]
-                    elif entry["type"] == "text":
-                        persona_values["text"] = entry["value"]
-            if persona_values:  # Only include personas with data
-                grouped_info["personas"][persona_name] = persona_values
-
-        # Group healthcare subverticals: Only include URL and text values
-        for subvertical_name, subvertical_data in self.target_info.get_healthcare_subverticals().items():
-            subvertical_values = {}
-            for entry in subvertical_data.get("data", []):
-                if "value" in entry:
-                    if entry["type"] == "url":
-                        subvertical_values["url"] = entry["value"]
-                    elif entry["type"] == "text":
-                        subvertical_values["text"] = entry["value"]
-            if subvertical_values:  # Only include healthcare subverticals with data
-                grouped_info["healthcare_subverticals"][subvertical_name] = subvertical_values
-
-        return grouped_info
+    def snapshot(self) -> Dict[str, bytes]:
+        """
+        {cache key: digest of the target's url and text} for every target the pipeline processes.
+        """
+        return dict(iter_record_digests(self.target_info.targets))
+
+    def diff(self, previous: "Playbook") -> PlaybookDiff:
+        """
+        Targets added, removed and changed (with the changed fields) since `previous`.
+        """
+        return diff_snapshots(previous.snapshot(), iter_record_digests(self.target_info.targets))
 
 # # Example usage
 # playbook = Playbook.load("../../data/company_info.json", "../../data/target_info.json")
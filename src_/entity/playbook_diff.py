@@ -0,0 +1,140 @@
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+from src_.entity.target_records import SECTIONS_BY_JSON_KEY, TargetRecord
+
+# Target fields that drive regeneration, in digest order.
+DIFF_FIELDS = ("url", "text")
+# Bytes of hash per field: a target digest is len(DIFF_FIELDS) * FIELD_DIGEST_SIZE bytes.
+FIELD_DIGEST_SIZE = 8
+ADDED = "added"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+
+
+def _field_digest(value: Optional[str]) -> bytes:
+    # A missing field hashes differently from an empty one.
+    data = b"\x00" if value is None else b"\x01" + value.encode("utf-8")
+    return hashlib.blake2b(data, digest_size=FIELD_DIGEST_SIZE).digest()
+
+
+def digest_target(info: Mapping[str, Optional[str]]) -> bytes:
+    """
+    Digest of one target's {"url", "text"}: the field hashes concatenated, so two digests
+    compare in one step and the fields that differ can still be told apart.
+    """
+    return b"".join(_field_digest(info.get(name)) for name in DIFF_FIELDS)
+
+
+def changed_fields(old: bytes, new: bytes) -> Tuple[str, ...]:
+    """
+    Names of the fields whose hashes differ between two target digests.
+    """
+    size = FIELD_DIGEST_SIZE
+    return tuple(
+        name for i, name in enumerate(DIFF_FIELDS)
+        if old[i * size:(i + 1) * size] != new[i * size:(i + 1) * size]
+    )
+
+
+def iter_record_digests(records: Iterable[TargetRecord]) -> Iterator[Tuple[str, bytes]]:
+    """
+    (cache key, digest) of every target the pipeline would process, e.g. ("accounts:YMCA", ...).
+    Targets of unknown sections or without a url or text are left out, as in `targets_from_records`.
+    """
+    for record in records:
+        schema = SECTIONS_BY_JSON_KEY.get(record.section)
+        if schema is None:
+            continue
+        info = record.info()
+        if info is not None:
+            yield f"{schema.section}:{record.name}", digest_target(info)
+
+
+@dataclass
+class PlaybookDiff:
+    """
+    What changed between two playbook versions, by cache key ("section:name").
+
+    Attributes:
+        added: Targets only in the new version.
+        removed: Targets only in the old version.
+        changed: Targets in both whose inputs differ, with the fields that changed ("url", "text").
+        unchanged: Number of targets identical in both.
+    """
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    unchanged: int = 0
+
+    @property
+    def affected(self) -> Set[str]:
+        """
+        Targets whose artifacts have to be (re)built: the added and changed ones.
+        """
+        return set(self.added).union(self.changed)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def summary(self) -> str:
+        return (f"{len(self.added)} added, {len(self.removed)} removed, "
+                f"{len(self.changed)} changed, {self.unchanged} unchanged")
+
+
+class PlaybookDiffer:
+    """
+    Diffs a playbook against a previous snapshot one target at a time, so a streamed
+    playbook is never held whole: only the previous snapshot ({key: digest}) is.
+
+    Usage:
+        differ = PlaybookDiffer(previous_snapshot)
+        for key, digest in iter_record_digests(stream_target_records(path)):
+            if differ.compare(key, digest) != UNCHANGED:
+                ...
+        diff = differ.finish()
+    """
+
+    def __init__(self, previous: Mapping[str, bytes]):
+        self._remaining = dict(previous)
+        self.diff = PlaybookDiff()
+
+    def compare(self, key: str, digest: bytes) -> str:
+        """
+        Classify one target of the new version as ADDED, CHANGED or UNCHANGED.
+        """
+        old = self._remaining.pop(key, None)
+        if old is None:
+            self.diff.added.append(key)
+            return ADDED
+        if old == digest:
+            self.diff.unchanged += 1
+            return UNCHANGED
+        self.diff.changed[key] = changed_fields(old, digest)
+        return CHANGED
+
+    def finish(self) -> PlaybookDiff:
+        """
+        The complete diff; previous targets that were never compared are the removed ones.
+        """
+        self.diff.removed = list(self._remaining)
+        self._remaining = {}
+        return self.diff
+
+
+def diff_snapshots(previous: Mapping[str, bytes], current: Iterable[Tuple[str, bytes]]) -> PlaybookDiff:
+    """
+    Diff two playbook snapshots of (cache key, digest) pairs in O(n).
+
+    Args:
+        previous: {cache key: digest} of the old version.
+        current: (cache key, digest) of the new version, e.g. `iter_record_digests(...)`.
+
+    Returns:
+        PlaybookDiff: Added, removed and changed targets, with the fields that changed.
+    """
+    differ = PlaybookDiffer(previous)
+    for key, digest in current:
+        differ.compare(key, digest)
+    return differ.finish()
@@ -0,0 +1,284 @@
+import gc
+import json
+import sys
+from contextlib import contextmanager
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from src_.utils.json_stream import iter_nested_items
+
+# Keys in target_info.json (and in each section) that hold metadata, not targets.
+METADATA_KEY = "meta"
+
+
+class SectionSchema(NamedTuple):
+    """
+    How one section of target_info.json is named by each consumer.
+
+    Attributes:
+        json_key: Key in target_info.json, also PlaybookParser's "target_type" ("Healthcare Subverticals").
+        section: Pipeline and cache section name ("healthcare_subverticals").
+        category: Key used by the content generation modules ("subverticals").
+    """
+    json_key: str
+    section: str
+    category: str
+
+
+TARGET_SECTIONS: Tuple[SectionSchema, ...] = (
+    SectionSchema("Accounts", "accounts", "accounts"),
+    SectionSchema("Industries", "industries", "industries"),
+    SectionSchema("Personas", "personas", "personas"),
+    SectionSchema("Healthcare Subverticals", "healthcare_subverticals", "subverticals"),
+)
+SECTIONS_BY_JSON_KEY: Dict[str, SectionSchema] = {schema.json_key: schema for schema in TARGET_SECTIONS}
+# Files read as JSON Lines, one target per line; anything else is read as target_info.json.
+JSON_LINES_SUFFIXES = (".jsonl", ".ndjson")
+
+
+class TargetRecord(NamedTuple):
+    """
+    One target of the playbook, with only the values any consumer reads.
+
+    Attributes:
+        section: Section key in target_info.json (interned, shared by every record of the section).
+        name: Target name.
+        url: Value of the last "url" entry, None without one.
+        text: Value of the last "text" entry, None without one.
+        values: Every "text" and "url" value in file order (the same string objects as url/text).
+    """
+    section: str
+    name: str
+    url: Optional[str]
+    text: Optional[str]
+    values: Tuple[str, ...]
+
+    @property
+    def context(self) -> str:
+        """
+        All non-blank values joined by spaces, as PlaybookParser flattens a target.
+        """
+        return " ".join(value.strip() for value in self.values if value.strip())
+
+    def info(self) -> Optional[Dict[str, str]]:
+        """
+        The target's {"url", "text"} as in `Playbook.target_info_grouping()`, None without either.
+        """
+        if self.url is not None:
+            return {"url": self.url, "text": self.text} if self.text is not None else {"url": self.url}
+        if self.text is not None:
+            return {"text": self.text}
+        return None
+
+
+# Builds a TargetRecord without the Python-level NamedTuple.__new__ frame.
+_new_record = tuple.__new__
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Allocate many small containers without cyclic GC passes. Decoded JSON, records and
+    their views cannot form reference cycles, but every few hundred allocations would
+    otherwise trigger a collection that walks everything still alive.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def parse_target(section: str, name: str, target_data: dict) -> TargetRecord:
+    """
+    Build the record of one target from its target_info.json entry ({"data": [{"type", "value"}, ...]}).
+    """
+    url = text = None
+    values = []
+    for entry in target_data.get("data") or ():
+        value = entry.get("value")
+        if not isinstance(value, str):
+            continue
+        kind = entry.get("type")
+        if kind == "url":
+            url = value
+        elif kind == "text":
+            text = value
+        else:
+            continue
+        values.append(value)
+    return _new_record(TargetRecord, (section, name, url, text, tuple(values)))
+
+
+def iter_target_records(target_info: dict) -> Iterator[TargetRecord]:
+    """
+    Walk a loaded target_info.json once, yielding a record per target in file order.
+    Metadata entries and anything that is not a target object are skipped.
+    """
+    for section_key, targets in target_info.items():
+        if section_key == METADATA_KEY or not isinstance(targets, dict):
+            continue
+        section = sys.intern(section_key)
+        for name, target_data in targets.items():
+            if name == METADATA_KEY or not isinstance(target_data, dict):
+                continue
+            yield parse_target(section, name, target_data)
+
+
+def iter_json_lines_records(fp: IO[str]) -> Iterator[TargetRecord]:
+    """
+    Read targets from JSON Lines, one object per line with the target's section key,
+    name and data: {"section": "Accounts", "name": "YMCA", "data": [{"type": "url", "value": ...}]}.
+    """
+    for line_number, line in enumerate(fp, 1):
+        if not line.strip():
+            continue
+        target = json.loads(line)
+        if not isinstance(target, dict) or "section" not in target or "name" not in target:
+            raise ValueError(f"Line {line_number}: expected an object with 'section', 'name' and 'data'")
+        yield parse_target(sys.intern(target["section"]), target["name"], target)
+
+
+def stream_target_records(path: str) -> Iterator[TargetRecord]:
+    """
+    Yield the targets of a playbook one at a time, in file order, without loading the file.
+
+    `.jsonl` / `.ndjson` files are read as JSON Lines (see `iter_json_lines_records`), anything
+    else as target_info.json, decoded one target at a time. Memory stays bounded by the
+    largest target whatever the playbook size, and the first records are available as soon as
+    they have been read.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(JSON_LINES_SUFFIXES):
+            yield from iter_json_lines_records(f)
+            return
+        for section_key, name, target_data in iter_nested_items(f):
+            if section_key == METADATA_KEY or name is None or name == METADATA_KEY:
+                continue
+            if isinstance(target_data, dict):
+                yield parse_target(sys.intern(section_key), name, target_data)
+
+
+class PlaybookTargets:
+    """
+    Every target of a playbook, parsed once into compact records grouped by section,
+    with the shapes the different consumers expect available as views.
+
+    Views:
+        grouping()      -> Playbook.target_info_grouping()   {section: {name: {"url", "text"}}}
+        descriptions()  -> parse_target_info()                {category: [{"name", "description", "url"}]}
+        flattened()     -> PlaybookParser.parse_targets()     [{"target_type", "name", "context"}]
+        categorized()   -> categorize_playbook_data()         {category: [{"name", "context"}]}
+
+    Usage:
+        targets = PlaybookTargets.from_json("data/target_info.json")
+        grouped_info = targets.grouping()
+    """
+
+    __slots__ = ("_sections",)
+
+    def __init__(self, records: Iterable[TargetRecord] = ()):
+        self._sections: Dict[str, List[TargetRecord]] = {}
+        with _gc_paused():
+            for record in records:
+                self.add(record)
+
+    @classmethod
+    def from_dict(cls, target_info: dict) -> "PlaybookTargets":
+        return cls(iter_target_records(target_info))
+
+    @classmethod
+    def from_json(cls, path: str) -> "PlaybookTargets":
+        with open(path, "r", encoding="utf-8") as f, _gc_paused():
+            return cls.from_dict(json.load(f))
+
+    def add(self, record: TargetRecord):
+        section = self._sections.get(record.section)
+        if section is None:
+            section = self._sections[record.section] = []
+        section.append(record)
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self._sections.values())
+
+    def __iter__(self) -> Iterator[TargetRecord]:
+        for records in self._sections.values():
+            yield from records
+
+    def section(self, json_key: str) -> List[TargetRecord]:
+        """
+        Records of one section ("Accounts", ...), in file order.
+        """
+        return self._sections.get(json_key, [])
+
+    def grouping(self) -> Dict[str, Dict[str, dict]]:
+        """
+        {section: {name: {"url": ..., "text": ...}}} for the four known sections; targets
+        without a url or text are left out, and so are absent keys.
+        """
+        with _gc_paused():
+            return {schema.section: self.grouped_section(schema.json_key) for schema in TARGET_SECTIONS}
+
+    def grouped_section(self, json_key: str) -> Dict[str, dict]:
+        """
+        One section of `grouping()`: {name: {"url": ..., "text": ...}}.
+        """
+        grouped = {}
+        with _gc_paused():
+            for record in self.section(json_key):
+                info = record.info()
+                if info is not None:
+                    grouped[record.name] = info
+        return grouped
+
+    def descriptions(self) -> Dict[str, List[Dict[str, str]]]:
+        """
+        {"accounts": [{"name", "url"}], "industries" | "personas" | "subverticals":
+        [{"name", "description", "url"}]}, with "" for missing values.
+        """
+        parsed = {}
+        with _gc_paused():
+            for schema in TARGET_SECTIONS:
+                records = self.section(schema.json_key)
+                if schema.category == "accounts":
+                    parsed[schema.category] = [{"name": r.name, "url": r.url or ""} for r in records]
+                else:
+                    parsed[schema.category] = [
+                        {"name": r.name, "description": r.text or "", "url": r.url or ""} for r in records
+                    ]
+        return parsed
+
+    def flattened(self) -> List[Dict[str, str]]:
+        """
+        [{"target_type", "name", "context"}] for every target with a non-blank value, in file order.
+        """
+        results = []
+        with _gc_paused():
+            for record in self:
+                context = record.context
+                if context:
+                    results.append({"target_type": record.section, "name": record.name, "context": context})
+        return results
+
+    def categorized(self) -> Dict[str, List[Dict[str, str]]]:
+        """
+        {category: [{"name", "context"}]} for the four known sections.
+        """
+        return categorize_targets(self.flattened())
+
+
+def categorize_targets(targets: Iterable[Dict[str, str]]) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Group flattened targets ({"target_type", "name", "context"}) by content generation category.
+    Targets of unknown sections are dropped.
+    """
+    categorized = {schema.category: [] for schema in TARGET_SECTIONS}
+    for target in targets:
+        schema = SECTIONS_BY_JSON_KEY.get(target.get("target_type", "Unknown"))
+        if schema is not None:
+            categorized[schema.category].append({
+                "name": target.get("name", "Unnamed"),
+                "context": target.get("context", ""),
+            })
+    return categorized
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from src_.core.metrics import metrics
+from src_.utils.crawler_utils import DEFAULT_HEADERS, parse_webpage_html
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class AsyncFetcher:
+    """
+    Async webpage fetcher sharing one pooled HTTP/1.1 client with keep-alive.
+
+    Connections are reused per host across requests. At most `max_concurrency` requests
+    are in flight overall and at most `per_host_concurrency` against any single host.
+    Results have the same shape as `fetch_webpage_with_html`.
+
+    Usage:
+        async with AsyncFetcher() as fetcher:
+            results = await fetcher.fetch_many(urls)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 20,
+        per_host_concurrency: int = 4,
+        timeout: float = 10.0,
+        keepalive_expiry: float = 30.0,
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.timeout = timeout
+        self.keepalive_expiry = keepalive_expiry
+        self.headers = headers or DEFAULT_HEADERS
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        import httpx
+
+        self._client = httpx.AsyncClient(
+            http1=True,
+            http2=False,
+            headers=self.headers,
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+        )
+        self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._host_semaphores = {}
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_concurrency)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> "httpx.Response":
+        """
+        Issue a GET under the global and per-host concurrency caps.
+        """
+        if self._client is None:
+            raise RuntimeError("AsyncFetcher must be used as an async context manager.")
+        # Per-host slot first: requests queued behind a busy host must not hold global slots
+        # that fetches to other hosts could use.
+        async with self._host_semaphore(url), self._global_semaphore:
+            return await self._client.get(url, headers=headers)
+
+    async def fetch(
+        self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> dict:
+        """
+        Fetch and parse one page. Network and HTTP errors are returned, not raised.
+
+        When `etag` / `last_modified` from a previous fetch are given, a conditional GET is sent;
+        a 304 answer yields {"success": True, "not_modified": True, ...} without a body.
+        Full results also carry the page's validators and a SHA-256 `content_hash` of the body.
+        """
+        import httpx
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        try:
+            with metrics.timer("http_fetch_seconds"):
+                response = await self.get(url, headers=headers or None)
+            if response.status_code == 304:
+                metrics.inc("http_fetches_total", outcome="not_modified")
+                return {
+                    "success": True,
+                    "url": url,
+                    "not_modified": True,
+                    "etag": response.headers.get("ETag", etag),
+                    "last_modified": response.headers.get("Last-Modified", last_modified),
+                }
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            metrics.inc("http_fetches_total", outcome="error")
+            return {"success": False, "url": url, "error": str(e)}
+        metrics.inc("http_fetches_total", outcome="ok")
+        # HTML parsing is CPU-bound, keep it off the event loop.
+        result = await asyncio.to_thread(parse_webpage_html, url, response.text)
+        result.update({
+            "not_modified": False,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_hash": hashlib.sha256(response.content).hexdigest(),
+        })
+        return result
+
+    async def fetch_many(self, urls: Iterable[str]) -> Dict[str, dict]:
+        """
+        Fetch many pages concurrently. Duplicate URLs are fetched once.
+        Returns {url: result}.
+        """
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        results = await asyncio.gather(*(self.fetch(url) for url in unique_urls))
+        return dict(zip(unique_urls, results))
+
+
+async def fetch_grouped_target_urls(
+    grouped_info: Dict[str, Dict[str, dict]], **fetcher_kwargs
+) -> Dict[str, dict]:
+    """
+    Fetch the URL of every account, industry, persona and subvertical in one batch.
+
+    Args:
+        grouped_info: Output of `Playbook.target_info_grouping()`.
+        **fetcher_kwargs: Passed to `AsyncFetcher`.
+
+    Returns:
+        Dict[str, dict]: {cache_key ("section:name"): fetch result} for targets with a URL.
+    """
+    target_urls = {
+        f"{section_name}:{key}": value_dict["url"]
+        for section_name, section_data in grouped_info.items()
+        for key, value_dict in section_data.items()
+        if value_dict.get("url")
+    }
+    async with AsyncFetcher(**fetcher_kwargs) as fetcher:
+        results = await fetcher.fetch_many(target_urls.values())
+    return {cache_key: results[url] for cache_key, url in target_urls.items()}
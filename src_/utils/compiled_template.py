@@ -0,0 +1,235 @@
+import html
+import os
+import re
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
+
+from src_.core.metrics import metrics
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+
+# Elements that never have a closing tag or inner content.
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+
+class PlaceholderSpan(NamedTuple):
+    """
+    Offsets of one element in the template source:
+    source[outer_start:outer_end] is the whole element, source[inner_start:inner_end] its content.
+    """
+    outer_start: int
+    inner_start: int
+    inner_end: int
+    outer_end: int
+
+
+class _PlaceholderOffsetParser(HTMLParser):
+    """
+    Single pass over the template recording the span of every element that has an id.
+    Unclosed elements are closed implicitly by the end tag of an enclosing element,
+    mirroring how BeautifulSoup's html.parser builder nests them.
+    """
+
+    def __init__(self, source: str):
+        super().__init__(convert_charrefs=True)
+        self.source = source
+        self.line_starts = [0] + [match.end() for match in re.finditer("\n", source)]
+        self.stack: List[Tuple[str, Optional[str], int, int]] = []
+        self.spans: Dict[str, PlaceholderSpan] = {}
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self.line_starts[line - 1] + column
+
+    def _record(self, element_id: Optional[str], span: PlaceholderSpan):
+        # Like soup.find(id=...), the first element with a given id wins.
+        if element_id and element_id not in self.spans:
+            self.spans[element_id] = span
+
+    def handle_starttag(self, tag, attrs):
+        start = self._offset()
+        inner_start = start + len(self.get_starttag_text())
+        element_id = dict(attrs).get("id")
+        if tag in VOID_ELEMENTS:
+            self._record(element_id, PlaceholderSpan(start, inner_start, inner_start, inner_start))
+            return
+        self.stack.append((tag, element_id, start, inner_start))
+
+    def handle_startendtag(self, tag, attrs):
+        start = self._offset()
+        end = start + len(self.get_starttag_text())
+        self._record(dict(attrs).get("id"), PlaceholderSpan(start, end, end, end))
+
+    def handle_endtag(self, tag):
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                break
+        else:
+            return  # stray end tag without a matching start tag
+        end_tag_start = self._offset()
+        end_tag_end = self.source.index(">", end_tag_start) + 1
+        # Elements left open inside this one end where it ends.
+        for _, element_id, outer_start, inner_start in self.stack[index + 1:]:
+            self._record(element_id, PlaceholderSpan(outer_start, inner_start, end_tag_start, end_tag_start))
+        _, element_id, outer_start, inner_start = self.stack[index]
+        self._record(element_id, PlaceholderSpan(outer_start, inner_start, end_tag_start, end_tag_end))
+        del self.stack[index:]
+
+    def close(self):
+        super().close()
+        for _, element_id, outer_start, inner_start in self.stack:
+            end = len(self.source)
+            self._record(element_id, PlaceholderSpan(outer_start, inner_start, end, end))
+        self.stack = []
+
+
+class CompiledTemplate:
+    """
+    A landing page template parsed once, with the offsets of every element id.
+
+    Extracting placeholder sections and rendering a personalised page are plain
+    string slicing and splicing, so per-account work does not re-parse the HTML.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        parser = _PlaceholderOffsetParser(source)
+        parser.feed(source)
+        parser.close()
+        self.spans: Dict[str, PlaceholderSpan] = parser.spans
+        self._texts: Dict[str, str] = {}
+        self._soup = None
+
+    @classmethod
+    def from_file(cls, html_path: str) -> "CompiledTemplate":
+        with open(html_path, "r", encoding="utf-8") as f:
+            return cls(f.read())
+
+    def __contains__(self, placeholder_id: str) -> bool:
+        return placeholder_id in self.spans
+
+    def outer_html(self, placeholder_id: str) -> str:
+        span = self.spans[placeholder_id]
+        return self.source[span.outer_start:span.outer_end]
+
+    def inner_html(self, placeholder_id: str) -> str:
+        span = self.spans[placeholder_id]
+        return self.source[span.inner_start:span.inner_end]
+
+    def text(self, placeholder_id: str) -> str:
+        """
+        Visible text of the element, stripped like BeautifulSoup's get_text(strip=True).
+        Only the element's own snippet is parsed, once per placeholder.
+        """
+        if placeholder_id not in self._texts:
+            from bs4 import BeautifulSoup
+            snippet = BeautifulSoup(self.outer_html(placeholder_id), "html.parser")
+            self._texts[placeholder_id] = snippet.get_text(strip=True)
+        return self._texts[placeholder_id]
+
+    @property
+    def soup(self) -> "BeautifulSoup":
+        """
+        Full BeautifulSoup tree, parsed lazily for lookups that are not by id.
+        """
+        if self._soup is None:
+            from bs4 import BeautifulSoup
+            self._soup = BeautifulSoup(self.source, "html.parser")
+        return self._soup
+
+    def extract_positions(self, positions: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Return [{tag_id: outer HTML}] for each {"placeholder": id} found in the template.
+        """
+        extracted_positions = []
+        for position in positions:
+            placeholder_id = position.get("placeholder")
+            if not placeholder_id:
+                continue
+            if placeholder_id in self.spans:
+                extracted_positions.append({placeholder_id: self.outer_html(placeholder_id)})
+            else:
+                print(f"[WARN] ID '{placeholder_id}' not found in HTML. Skipping.")
+        return extracted_positions
+
+    def tag_infos(self, positions: List[Dict[str, str]]) -> List[Dict[str, object]]:
+        """
+        Return placeholder, original text, text length and outer HTML for each position found.
+        """
+        tag_infos = []
+        for position in positions:
+            placeholder_id = position["placeholder"]
+            if placeholder_id not in self.spans:
+                continue
+            original_text = self.text(placeholder_id)
+            tag_infos.append({
+                "placeholder": placeholder_id,
+                "original": original_text,
+                "length": len(original_text),
+                "html": self.outer_html(placeholder_id),
+            })
+        return tag_infos
+
+    def is_text_only(self, placeholder_id: str) -> bool:
+        """
+        Whether the element holds only text (no child tags), like `tag.string` being a string.
+        """
+        inner = self.inner_html(placeholder_id)
+        return bool(inner) and "<" not in inner
+
+    def render(self, replacements: Dict[str, str], outer: bool = False) -> str:
+        """
+        Replace the inner content of each placeholder id, keeping the element's own tag and
+        everything else in the template byte-for-byte. As the BeautifulSoup renderer did,
+        a replacement for a text-only element is inserted as escaped text, and one for an
+        element with nested markup as HTML.
+        With outer=True the whole element is replaced instead, for replacements that carry
+        their own wrapping tag (like the snippets from `extract_positions`).
+        A replacement nested inside another replaced element is skipped.
+        """
+        with metrics.timer("template_render_seconds"):
+            return self._render(replacements, outer)
+
+    def _render(self, replacements: Dict[str, str], outer: bool) -> str:
+        targets = []
+        for key in replacements:
+            if key in self.spans:
+                targets.append((self.spans[key], key))
+            else:
+                print(f"Warning: ID '{key}' not found in HTML. Skipped.")
+        targets.sort()
+
+        parts = []
+        cursor = 0
+        for span, key in targets:
+            start, end = (span.outer_start, span.outer_end) if outer else (span.inner_start, span.inner_end)
+            if start < cursor:
+                print(f"Warning: ID '{key}' is nested inside another replaced element. Skipped.")
+                continue
+            parts.append(self.source[cursor:start])
+            replacement = replacements[key]
+            if not outer and self.is_text_only(key):
+                replacement = html.escape(replacement, quote=False)
+            parts.append(replacement)
+            cursor = end
+        parts.append(self.source[cursor:])
+        return "".join(parts)
+
+
+@lru_cache(maxsize=16)
+def _load_compiled_template(html_path: str, mtime_ns: int, size: int) -> CompiledTemplate:
+    return CompiledTemplate.from_file(html_path)
+
+
+def load_compiled_template(html_path: str) -> CompiledTemplate:
+    """
+    Return the compiled template for a file, compiling it only when the file changed.
+    """
+    stat = os.stat(html_path)
+    return _load_compiled_template(os.path.abspath(html_path), stat.st_mtime_ns, stat.st_size)
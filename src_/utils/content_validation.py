@@ -0,0 +1,132 @@
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+from src_.utils.compiled_template import VOID_ELEMENTS
+
+# Rewritten text may differ from the original text length by this fraction.
+LENGTH_TOLERANCE = 0.10
+
+
+class _HTMLCheckParser(HTMLParser):
+    """
+    Collects visible text and checks that every opened element is closed in order.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text_parts: List[str] = []
+        self.stack: List[str] = []
+        self.problems: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS:
+            return
+        if not self.stack or self.stack[-1] != tag:
+            expected = f"</{self.stack[-1]}>" if self.stack else "no closing tag"
+            self.problems.append(f"unexpected </{tag}> (expected {expected})")
+            if tag in self.stack:
+                del self.stack[len(self.stack) - 1 - self.stack[::-1].index(tag):]
+            return
+        self.stack.pop()
+
+    def handle_data(self, data):
+        self.text_parts.append(data)
+
+
+def _parse(html: str) -> _HTMLCheckParser:
+    parser = _HTMLCheckParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def visible_text(html: str) -> str:
+    """
+    Text content of an HTML fragment with whitespace collapsed.
+    """
+    return " ".join("".join(_parse(html).text_parts).split())
+
+
+def html_problems(html: str) -> List[str]:
+    """
+    Well-formedness problems of an HTML fragment: mismatched or unclosed elements.
+    """
+    parser = _parse(html)
+    problems = list(parser.problems)
+    if parser.stack:
+        problems.append("unclosed " + ", ".join(f"<{tag}>" for tag in parser.stack))
+    return problems
+
+
+def validate_placeholder(
+    content: str,
+    original_length: int,
+    account_name: str,
+    tolerance: float = LENGTH_TOLERANCE,
+) -> List[str]:
+    """
+    Check one rewritten placeholder.
+
+    Args:
+        content: Rewritten content (HTML or plain text).
+        original_length: Length of the original placeholder's visible text.
+        account_name: Name that must be mentioned.
+        tolerance: Allowed relative length difference (default ±10%).
+
+    Returns:
+        List[str]: Human-readable problems, empty if the placeholder passes.
+    """
+    if not content or not content.strip():
+        return ["content is empty"]
+    problems = []
+    text = visible_text(content)
+    if account_name and account_name.lower() not in text.lower():
+        problems.append(f'does not mention "{account_name}"')
+    if original_length:
+        low = int(original_length * (1 - tolerance))
+        high = int(original_length * (1 + tolerance)) + 1
+        if not low <= len(text) <= high:
+            problems.append(f"text is {len(text)} characters, it must be between {low} and {high}")
+    problems.extend(f"malformed HTML: {problem}" for problem in html_problems(content))
+    return problems
+
+
+def validate_replacements(
+    replacements: Dict[str, str],
+    original_lengths: Dict[str, int],
+    account_name: str,
+    tolerance: float = LENGTH_TOLERANCE,
+) -> Dict[str, List[str]]:
+    """
+    Validate every expected placeholder. Placeholders missing from `replacements` fail too.
+
+    Args:
+        replacements: {placeholder id: rewritten content}.
+        original_lengths: {placeholder id: original visible text length} for every expected placeholder.
+        account_name: Name that must be mentioned in each placeholder.
+        tolerance: Allowed relative length difference.
+
+    Returns:
+        Dict[str, List[str]]: {placeholder id: problems} for the failing placeholders only.
+    """
+    failures = {}
+    for placeholder, original_length in original_lengths.items():
+        content: Optional[str] = replacements.get(placeholder)
+        if content is None:
+            failures[placeholder] = ["missing from the response"]
+            continue
+        problems = validate_placeholder(content, original_length, account_name, tolerance)
+        if problems:
+            failures[placeholder] = problems
+    return failures
+
+
+def format_feedback(failures: Dict[str, List[str]]) -> str:
+    """
+    Follow-up prompt lines telling the model what was wrong with each placeholder.
+    """
+    return "\n".join(f"- {placeholder}: {'; '.join(problems)}" for placeholder, problems in failures.items())
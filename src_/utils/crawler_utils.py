@@ -1,19 +1,20 @@
-import requests
-from bs4 import BeautifulSoup
+from src_.core.metrics import metrics
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+}
 
-def fetch_webpage_with_html(url):
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        return {"success": False, "error": str(e)}
 
-    soup = BeautifulSoup(response.text, 'html.parser')
+def parse_webpage_html(url, html):
+    """
+    Extract title, meta description and main paragraph text from a fetched page.
+    """
+    from bs4 import BeautifulSoup
 
-    title = soup.title.string.strip() if soup.title else ""
+    with metrics.timer("html_parse_seconds"):
+        soup = BeautifulSoup(html, 'html.parser')
+
+    title = soup.title.string.strip() if soup.title and soup.title.string else ""
     meta_desc = ""
     meta_tag = soup.find("meta", attrs={"name": "description"})
     if meta_tag and "content" in meta_tag.attrs:
@@ -28,9 +29,24 @@ def fetch_webpage_with_html(url):
         "title": title,
         "meta_description": meta_desc,
         "main_text": main_text[:2000],
-        "raw_html": response.text
+        "raw_html": html
     }
 
+
+def fetch_webpage_with_html(url):
+    import requests
+
+    try:
+        with metrics.timer("http_fetch_seconds"):
+            response = requests.get(url, headers=DEFAULT_HEADERS, timeout=10)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        metrics.inc("http_fetches_total", outcome="error")
+        return {"success": False, "error": str(e)}
+    metrics.inc("http_fetches_total", outcome="ok")
+
+    return parse_webpage_html(url, response.text)
+
 # # 示例调用
 # if __name__ == "__main__":
 #     url = "https://www.ymca.org/"
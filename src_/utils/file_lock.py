@@ -0,0 +1,106 @@
+import os
+import tempfile
+import time
+from typing import Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLockTimeout(TimeoutError):
+    pass
+
+
+class FileLock:
+    """
+    Advisory inter-process lock on a lock file (flock on POSIX, msvcrt.locking on Windows).
+
+    Only processes that use the same lock file are coordinated; the lock is released when
+    the block exits or the process dies, so a crashed worker never leaves it held.
+
+    Usage:
+        with FileLock("cache/cache.db.lock"):
+            ...
+        with FileLock("cache/run_journal.jsonl.lock", timeout=0):  # fail fast if held
+            ...
+    """
+
+    def __init__(self, path: str, timeout: Optional[float] = None, poll_interval: float = 0.05):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not self._try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                raise FileLockTimeout(f"Could not lock {self.path} within {self.timeout} seconds.")
+            time.sleep(self.poll_interval)
+        self._fd = fd
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def atomic_write(path: str, data: Union[str, bytes], encoding: str = "utf-8"):
+    """
+    Write a file so readers see either the old or the new content, never a partial one.
+
+    The data goes to a temporary file in the same directory, is fsynced, and then renamed
+    over `path` (os.replace is atomic on POSIX and Windows). A crash mid-write leaves the
+    old file intact.
+
+    Args:
+        path (str): Destination file.
+        data (str | bytes): New content; str is encoded with `encoding`.
+        encoding (str): Encoding for str data.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data.encode(encoding) if isinstance(data, str) else data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
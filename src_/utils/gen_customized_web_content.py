@@ -1,9 +1,20 @@
-from src_.core.customized_web_content_agent import CustomizedWebContentAgent
-import time
-from typing import List, Dict
+from src_.core.customized_web_content_agent import BatchedCustomizedWebContentAgent, CustomizedWebContentAgent
+from src_.core.llm_backend import context_window
+from src_.core.metrics import metrics
+import asyncio
+from typing import List, Dict, Union
 
-from typing import List, Dict
-from bs4 import BeautifulSoup
+from src_.utils.compiled_template import load_compiled_template
+from src_.utils.content_validation import format_feedback, validate_replacements, visible_text
+from src_.utils.retry_policy import Call, RetryPolicy, Sleep, arun_with_retries, run_with_retries
+from src_.utils.token_counter import approx_tokens
+
+DEFAULT_MODEL_NAME = "gpt-3.5-turbo"
+DEFAULT_TEMPERATURE = 0.3
+# Instruction text of the batched prompt, in tokens.
+BATCH_PROMPT_OVERHEAD_TOKENS = 600
+# More targets per request than this tends to blur pitches together.
+MAX_BATCH_TARGETS = 10
 
 
 def extract_tagged_content_from_html(
@@ -11,6 +22,7 @@ def extract_tagged_content_from_html(
 ) -> List[Dict[str, str]]:
     """
     Extract HTML content blocks based on placeholder IDs from a local HTML file.
+    The file is compiled once (see `CompiledTemplate`) and later calls only slice the source.
 
     Args:
         positions (List[Dict[str, str]]): List of {"placeholder": id_string}.
@@ -19,75 +31,297 @@ def extract_tagged_content_from_html(
     Returns:
         List[Dict[str, str]]: Each dict maps {tag_id: HTML snippet (including original tag)}.
     """
-    with open(html_file_path, "r", encoding="utf-8") as f:
-        html_content = f.read()
+    return load_compiled_template(html_file_path).extract_positions(positions)
+
+
+class _RewriteSession:
+    """
+    Tracks which placeholders of one rewrite still need work.
+
+    Each response is validated per placeholder (target mention, length within ±10% of the
+    original text, well-formed HTML). Passing placeholders are kept; only the failing ones are
+    sent again, together with what was wrong, so follow-up prompts shrink with every pass.
+    """
 
-    soup = BeautifulSoup(html_content, "html.parser")
-    extracted_positions = []
+    def __init__(self, target_audience: str, positions: List[Dict[str, str]], marketing_pitch: str):
+        self.target_audience = target_audience
+        self.marketing_pitch = marketing_pitch
+        self.positions = positions
+        self.original_lengths = {
+            tag_id: len(visible_text(html)) for position in positions for tag_id, html in position.items()
+        }
+        self.accepted: Dict[str, str] = {}
+        self.latest: Dict[str, str] = {}
+        self.failures: Dict[str, List[str]] = {}
 
-    for position in positions:
-        placeholder_id = position.get("placeholder")
-        if not placeholder_id:
+    def input_data(self) -> dict:
+        pending = [position for position in self.positions if next(iter(position)) not in self.accepted]
+        return {
+            "target_audience": self.target_audience,
+            "positions": pending,
+            "marketing_pitch": self.marketing_pitch,
+            "feedback": format_feedback(self.failures),
+        }
+
+    def accept(self, rewritten_content: Dict[str, str]) -> bool:
+        """
+        Validate a response; returns True once every placeholder passed.
+        """
+        pending = {
+            tag_id: length for tag_id, length in self.original_lengths.items() if tag_id not in self.accepted
+        }
+        rewritten_content = {
+            tag_id: html for tag_id, html in rewritten_content.items() if tag_id in pending and isinstance(html, str)
+        }
+        self.latest.update(rewritten_content)
+        self.failures = validate_replacements(rewritten_content, pending, self.target_audience)
+        for tag_id in pending:
+            if tag_id not in self.failures:
+                self.accepted[tag_id] = rewritten_content[tag_id]
+        if self.failures:
+            metrics.inc("placeholder_validation_failures_total", len(self.failures))
+            print(f"[RETRY] {len(self.failures)}/{len(self.original_lengths)} placeholder(s) failed validation: {self.failures}")
+        return not self.failures
+
+    def result(self) -> Dict[str, str]:
+        """
+        Rewritten content in template order. Placeholders that never passed keep their last
+        rewrite, or the original HTML if the model never returned them.
+        """
+        if not self.latest:
+            raise RuntimeError("Agent returned no rewritten sections.")
+        content = {}
+        for position in self.positions:
+            for tag_id, original_html in position.items():
+                if tag_id in self.accepted:
+                    content[tag_id] = self.accepted[tag_id]
+                elif tag_id in self.latest:
+                    print(f"[WARN] Keeping last rewrite of {tag_id} despite: {self.failures.get(tag_id)}")
+                    content[tag_id] = self.latest[tag_id]
+                else:
+                    print(f"[WARN] No rewrite for {tag_id}, keeping the original section.")
+                    content[tag_id] = original_html
+        return content
+
+
+def _rewrite_retries(session: _RewriteSession, max_retries: int, retry_delay: float) -> RetryPolicy:
+    """
+    Retry policy of a rewrite: errors are retried after `retry_delay`, placeholders that fail
+    validation right away, up to `max_retries` times in all. Exhausted retries keep what the
+    session has, or raise RuntimeError if the model never answered.
+    """
+    attempt = 0
+    while attempt <= max_retries:
+        try:
+            # Retries bypass the response cache so they get a fresh completion.
+            result = yield Call(use_cache=attempt == 0)
+            if not result.get("success"):
+                raise RuntimeError(f"Agent failed: {result.get('error')}")
+        except Exception as e:
+            attempt += 1
+            if attempt > max_retries:
+                if session.latest:
+                    return session.result()
+                raise RuntimeError(
+                    f"Customized web content generation failed after {max_retries} retries: {str(e)}"
+                ) from e
+            metrics.inc("llm_retries_total", operation="rewrite")
+            print(
+                f"[RETRY] Error on attempt {attempt}/{max_retries}: {e}. Retrying after {retry_delay} seconds..."
+            )
+            yield Sleep(retry_delay)
             continue
 
-        element = soup.find(id=placeholder_id)
-        if element:
-            tag_id = placeholder_id
-            full_tag_html = str(element)
-            extracted_positions.append({tag_id: full_tag_html})
-        else:
-            print(f"[WARN] ID '{placeholder_id}' not found in HTML. Skipping.")
+        if session.accept(result["rewritten_content"]):
+            break
+        attempt += 1
+        if attempt <= max_retries:
+            metrics.inc("llm_retries_total", operation="rewrite")
+    return session.result()
+
 
-    return extracted_positions
+def _rewrite(agent: CustomizedWebContentAgent, session: _RewriteSession, max_retries: int, retry_delay: float) -> Dict[str, str]:
+    return run_with_retries(
+        _rewrite_retries(session, max_retries, retry_delay),
+        lambda use_cache: agent.run(session.input_data(), use_cache=use_cache),
+    )
+
+
+async def _arewrite(agent: CustomizedWebContentAgent, session: _RewriteSession, max_retries: int, retry_delay: float) -> Dict[str, str]:
+    return await arun_with_retries(
+        _rewrite_retries(session, max_retries, retry_delay),
+        lambda use_cache: agent.arun(session.input_data(), use_cache=use_cache),
+    )
 
 
 def generate_customized_web_content(
     target_audience: str,
     positions: List[Dict[str, str]],
     marketing_pitch: str,
-    model_name: str = "gpt-3.5-turbo",
-    temperature: float = 0.3,
+    model_name: str = DEFAULT_MODEL_NAME,
+    temperature: float = DEFAULT_TEMPERATURE,
     max_retries: int = 3,
     retry_delay: float = 3,
 ) -> Dict[str, str]:
     """
     Use CustomizedWebContentAgent to generate rewritten webpage content for each tag + html snippet.
+    Every placeholder is validated on its own; retries only re-request the ones that failed
+    (see `_RewriteSession`).
 
     Args:
         positions (List[Dict[str, str]]): List of {tag_id: original_html_fragment}.
         marketing_pitch (str): The new marketing pitch text.
         model_name (str): Model to use.
         temperature (float): Temperature for generation.
-        max_retries (int): Maximum retries on API errors.
-        retry_delay (float): Delay between retries in seconds.
+        max_retries (int): Maximum retries on API errors or failed placeholders.
+        retry_delay (float): Delay between retries after an API error, in seconds.
 
     Returns:
         Dict[str, str]: Mapping {tag_id: rewritten_html_fragment}.
     """
     agent = CustomizedWebContentAgent(model_name=model_name, temperature=temperature)
+    session = _RewriteSession(target_audience, positions, marketing_pitch)
+    return _rewrite(agent, session, max_retries, retry_delay)
 
-    input_data = {
-        "target_audience": target_audience,
-        "positions": positions,
-        "marketing_pitch": marketing_pitch,
-    }
 
-    attempt = 0
-    while attempt <= max_retries:
+async def agenerate_customized_web_content(
+    target_audience: str,
+    positions: List[Dict[str, str]],
+    marketing_pitch: str,
+    model_name: str = DEFAULT_MODEL_NAME,
+    temperature: float = DEFAULT_TEMPERATURE,
+    max_retries: int = 3,
+    retry_delay: float = 3,
+) -> Dict[str, str]:
+    """
+    Async version of `generate_customized_web_content`, sharing the same retry policy.
+    The LLM call goes through `BaseGPTAgent.arun` and the process-wide concurrency limit.
+    """
+    agent = CustomizedWebContentAgent(model_name=model_name, temperature=temperature)
+    session = _RewriteSession(target_audience, positions, marketing_pitch)
+    return await _arewrite(agent, session, max_retries, retry_delay)
+
+
+def rewrite_batch_fits(
+    targets: List[Dict[str, str]],
+    positions: List[Dict[str, str]],
+    model_name: str = DEFAULT_MODEL_NAME,
+) -> bool:
+    """
+    Whether one batched rewrite request for `targets` fits the model's context window and output limit.
+
+    Args:
+        targets (List[Dict[str, str]]): List of {"target_audience": name, "marketing_pitch": pitch}.
+        positions (List[Dict[str, str]]): List of {tag_id: original_html_fragment}.
+        model_name (str): Model the batch is sent to.
+
+    Returns:
+        bool: True if the batch can be sent as one request.
+    """
+    names = [target["target_audience"] for target in targets]
+    if len(targets) > MAX_BATCH_TARGETS or len(set(names)) != len(names):
+        return False
+    window = context_window(model_name)
+    sections_tokens = approx_tokens("".join(html for position in positions for html in position.values()))
+    # Every target gets all sections back: ±10% length, JSON escaping and keys on top.
+    output_tokens = len(targets) * int(sections_tokens * 1.3)
+    input_tokens = BATCH_PROMPT_OVERHEAD_TOKENS + sections_tokens + sum(
+        approx_tokens(target["target_audience"] + target["marketing_pitch"]) for target in targets
+    )
+    return output_tokens <= window.max_output_tokens and input_tokens + output_tokens <= window.context_tokens
+
+
+def plan_rewrite_batches(
+    targets: List[Dict[str, str]],
+    positions: List[Dict[str, str]],
+    model_name: str = DEFAULT_MODEL_NAME,
+) -> List[List[Dict[str, str]]]:
+    """
+    Split targets, in order, into the fewest consecutive batches that each fit one request
+    (see `rewrite_batch_fits`). A target that does not fit even alone gets a batch of its own.
+    """
+    batches: List[List[Dict[str, str]]] = []
+    for target in targets:
+        if batches and rewrite_batch_fits(batches[-1] + [target], positions, model_name):
+            batches[-1].append(target)
+        else:
+            batches.append([target])
+    return batches
+
+
+async def _arewrite_batch(
+    targets: List[Dict[str, str]],
+    positions: List[Dict[str, str]],
+    model_name: str,
+    temperature: float,
+    max_retries: int,
+    retry_delay: float,
+) -> List[Union[Dict[str, str], Exception]]:
+    sessions = [_RewriteSession(target["target_audience"], positions, target["marketing_pitch"]) for target in targets]
+    if len(targets) > 1:
+        agent = BatchedCustomizedWebContentAgent(model_name=model_name, temperature=temperature)
         try:
-            result = agent.run(input_data)
-            if result.get("success"):
-                return result["rewritten_content"]
-            else:
+            result = await agent.arun({"targets": targets, "positions": positions})
+            if not result.get("success"):
                 raise RuntimeError(f"Agent failed: {result.get('error')}")
-
+            rewritten_content = result["rewritten_content"]
         except Exception as e:
-            attempt += 1
-            if attempt > max_retries:
-                raise RuntimeError(
-                    f"Customized web content generation failed after {max_retries} retries: {str(e)}"
-                ) from e
-            print(
-                f"[RETRY] Error on attempt {attempt}/{max_retries}: {e}. Retrying after {retry_delay} seconds..."
-            )
-            time.sleep(retry_delay)
+            print(f"[WARN] Batched rewrite of {len(targets)} targets failed: {e}. Falling back to one request per target.")
+            rewritten_content = {}
+        for session in sessions:
+            if session.target_audience in rewritten_content:
+                session.accept(rewritten_content[session.target_audience])
+
+    # Targets missing from the batch answer, or with failing placeholders, continue on their own;
+    # their sessions keep the placeholders that already passed.
+    results: List[Union[Dict[str, str], Exception]] = [
+        session.result() if session.latest and not session.failures else None for session in sessions
+    ]
+    unfinished = [i for i, result in enumerate(results) if result is None]
+    if len(targets) > 1 and unfinished:
+        metrics.inc("rewrite_batch_fallbacks_total", len(unfinished))
+    single_agent = CustomizedWebContentAgent(model_name=model_name, temperature=temperature)
+    outcomes = await asyncio.gather(
+        *(_arewrite(single_agent, sessions[i], max_retries, retry_delay) for i in unfinished),
+        return_exceptions=True,
+    )
+    for i, outcome in zip(unfinished, outcomes):
+        results[i] = outcome
+    return results
+
+
+async def agenerate_customized_web_content_batch(
+    targets: List[Dict[str, str]],
+    positions: List[Dict[str, str]],
+    model_name: str = DEFAULT_MODEL_NAME,
+    temperature: float = DEFAULT_TEMPERATURE,
+    max_retries: int = 3,
+    retry_delay: float = 3,
+) -> List[Union[Dict[str, str], Exception]]:
+    """
+    Rewrite the same sections for many targets with as few requests as possible.
+
+    Targets are packed into batches that fit the model's context window (see
+    `plan_rewrite_batches`); each batch is one BatchedCustomizedWebContentAgent request that
+    sends the instructions and original sections once. Every target's answer is validated
+    like a single rewrite. If the batch answer cannot be parsed, or a target is missing from
+    it or has failing placeholders, that target falls back to single-target requests.
+
+    Args:
+        targets (List[Dict[str, str]]): List of {"target_audience": name, "marketing_pitch": pitch}.
+        positions (List[Dict[str, str]]): List of {tag_id: original_html_fragment}.
+        model_name (str): Model to use.
+        temperature (float): Temperature for generation.
+        max_retries (int): Maximum retries of the single-target fallback.
+        retry_delay (float): Delay between fallback retries after an API error, in seconds.
+
+    Returns:
+        List[Union[Dict[str, str], Exception]]: {tag_id: rewritten_html_fragment} per target, in input
+        order; a target whose rewrite failed gets the exception instead.
+    """
+    batches = plan_rewrite_batches(targets, positions, model_name)
+    metrics.inc("rewrite_batches_total", len(batches))
+    batch_results = await asyncio.gather(*(
+        _arewrite_batch(batch, positions, model_name, temperature, max_retries, retry_delay) for batch in batches
+    ))
+    return [result for results in batch_results for result in results]
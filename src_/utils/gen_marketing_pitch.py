@@ -1,18 +1,51 @@
 from src_.core.marketing_pitch_generation_agent import MarketingPitchGenerationAgent
-from langchain_core.exceptions import LangChainException
-import time
+from src_.core.metrics import metrics
+from src_.core.llm_backend import connection_errors
+from src_.utils.retry_policy import Call, RetryPolicy, Sleep, arun_with_retries, run_with_retries
 import traceback
-import requests
-import socket
-import urllib3
+
+DEFAULT_MODEL_NAME = "gpt-3.5-turbo"
+DEFAULT_TEMPERATURE = 0.4
+
+
+def _pitch_retries(max_retries: int, retry_delay: float) -> RetryPolicy:
+    """
+    Retry policy of the pitch generation: connection errors are retried up to `max_retries`
+    times; a failed result or any other error raises RuntimeError right away.
+    """
+    attempt = 0
+    while attempt <= max_retries:
+        try:
+            # Retries bypass the response cache so they get a fresh completion.
+            result = yield Call(use_cache=attempt == 0)
+
+            if result.get('success'):
+                return result['marketing_pitch']
+            else:
+                raise RuntimeError(f"Failed to generate marketing pitch: {result.get('error')}")
+
+        except connection_errors() as conn_err:
+            attempt += 1
+            if attempt > max_retries:
+                print(f"[FAILED] Max retries exceeded. Last error: {conn_err}")
+                raise RuntimeError(f"LLM invocation failed after {max_retries} retries: {str(conn_err)}") from conn_err
+
+            metrics.inc("llm_retries_total", operation="pitch")
+            print(f"[RETRY] Connection-related error on attempt {attempt}/{max_retries}: {conn_err}. Retrying after {retry_delay} seconds...")
+            yield Sleep(retry_delay)
+
+        except Exception as e:
+            print(f"[Unexpected Error] {traceback.format_exc()}")
+            raise RuntimeError(f"Unexpected error during marketing pitch generation: {str(e)}") from e
+
 
 def generate_marketing_pitch(
     text: str, 
     target_audience: str,
     crawled_content: dict, 
     company_info: str,    
-    model_name: str = "gpt-3.5-turbo", 
-    temperature: float = 0.4,
+    model_name: str = DEFAULT_MODEL_NAME, 
+    temperature: float = DEFAULT_TEMPERATURE,
     max_retries: int = 3,
     retry_delay: float = 1.5
 ) -> str:
@@ -42,31 +75,35 @@ def generate_marketing_pitch(
     }
 
     agent = MarketingPitchGenerationAgent(model_name=model_name, temperature=temperature)
+    return run_with_retries(
+        _pitch_retries(max_retries, retry_delay),
+        lambda use_cache: agent.run(input_data, use_cache=use_cache),
+    )
 
-    attempt = 0
-    while attempt <= max_retries:
-        try:
-            result = agent.run(input_data)
-
-            if result.get('success'):
-                return result['marketing_pitch']
-            else:
-                raise RuntimeError(f"Failed to generate marketing pitch: {result.get('error')}")
-
-        except (
-            LangChainException,
-            requests.exceptions.RequestException,
-            urllib3.exceptions.HTTPError,
-            socket.error
-        ) as conn_err:
-            attempt += 1
-            if attempt > max_retries:
-                print(f"[FAILED] Max retries exceeded. Last error: {conn_err}")
-                raise RuntimeError(f"LLM invocation failed after {max_retries} retries: {str(conn_err)}") from conn_err
 
-            print(f"[RETRY] Connection-related error on attempt {attempt}/{max_retries}: {conn_err}. Retrying after {retry_delay} seconds...")
-            time.sleep(retry_delay)
+async def agenerate_marketing_pitch(
+    text: str,
+    target_audience: str,
+    crawled_content: dict,
+    company_info: str,
+    model_name: str = DEFAULT_MODEL_NAME,
+    temperature: float = DEFAULT_TEMPERATURE,
+    max_retries: int = 3,
+    retry_delay: float = 1.5
+) -> str:
+    """
+    Async version of `generate_marketing_pitch`. The LLM call goes through `BaseGPTAgent.arun`,
+    so concurrent callers share the process-wide concurrency limit.
+    """
+    input_data = {
+        "target_audience": target_audience,
+        "text": text,
+        "crawled_content": crawled_content,
+        "company_info": company_info
+    }
 
-        except Exception as e:
-            print(f"[Unexpected Error] {traceback.format_exc()}")
-            raise RuntimeError(f"Unexpected error during marketing pitch generation: {str(e)}") from e
+    agent = MarketingPitchGenerationAgent(model_name=model_name, temperature=temperature)
+    return await arun_with_retries(
+        _pitch_retries(max_retries, retry_delay),
+        lambda use_cache: agent.arun(input_data, use_cache=use_cache),
+    )
@@ -0,0 +1,126 @@
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class JSONStreamError(ValueError):
+    """
+    The streamed text can no longer become a valid JSON object.
+    """
+
+
+class TruncatedJSONError(JSONStreamError):
+    """
+    The stream ended before the JSON object was closed.
+    """
+
+
+class IncrementalJSONParser:
+    """
+    Parses a streamed JSON object one top-level field at a time.
+
+    `feed` returns the fields completed by the new text, so a caller can use "summary" while
+    the model is still writing the next field. Text that cannot be the start of an object,
+    a field that does not parse, or anything after the closing brace raises JSONStreamError
+    right away, so the request can be aborted instead of streamed to the end. A leading
+    markdown code fence (```json) is tolerated.
+
+    Usage:
+        parser = IncrementalJSONParser()
+        for chunk in stream:
+            for key, value in parser.feed(chunk):
+                ...
+        data = parser.close()
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields: Dict[str, Any] = {}
+        self._pos = 0
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._field_start = 0
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        self.text += chunk
+        completed: List[Tuple[str, Any]] = []
+        text = self.text
+        pos = self._pos
+        while pos < len(text):
+            if self._in_string:
+                special = _STRING_SPECIAL.search(text, pos)
+                if special is None:
+                    pos = len(text)
+                    break
+                if special.group() == "\\":
+                    if special.end() >= len(text):
+                        # The escaped character has not arrived yet.
+                        pos = special.start()
+                        break
+                    pos = special.end() + 1
+                    continue
+                self._in_string = False
+                pos = special.end()
+                continue
+
+            char = text[pos]
+            if self._done:
+                if not char.isspace() and char != "`":
+                    raise JSONStreamError(f"Unexpected text after the JSON object: {text[pos:pos + 40]!r}")
+            elif not self._started:
+                if char == "`":
+                    newline = text.find("\n", pos)
+                    if newline == -1:
+                        break
+                    pos = newline
+                elif char == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._field_start = pos + 1
+                elif not char.isspace():
+                    raise JSONStreamError(f"Expected a JSON object, got {text[pos:pos + 40]!r}")
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.extend(self._complete_field(pos, last=True))
+                    self._done = True
+            elif char == "," and self._depth == 1:
+                completed.extend(self._complete_field(pos, last=False))
+            pos += 1
+        self._pos = pos
+        return completed
+
+    def _complete_field(self, end: int, last: bool) -> List[Tuple[str, Any]]:
+        segment = self.text[self._field_start:end]
+        self._field_start = end + 1
+        if last and not segment.strip():
+            return []  # "{}" or a trailing comma the model sometimes emits.
+        try:
+            parsed = json.loads("{" + segment + "}")
+        except json.JSONDecodeError as e:
+            raise JSONStreamError(f"Invalid field {segment.strip()[:60]!r}: {e}") from e
+        self.fields.update(parsed)
+        return list(parsed.items())
+
+    def close(self) -> Dict[str, Any]:
+        """
+        The complete object. Raises TruncatedJSONError if the stream stopped before it closed.
+        """
+        if not self._done:
+            raise TruncatedJSONError(
+                f"Output ended inside the JSON object after {len(self.text)} characters "
+                f"({len(self.fields)} complete field(s))."
+            )
+        return dict(self.fields)
@@ -0,0 +1,153 @@
+import json
+import re
+from typing import IO, Any, Iterator, Optional, Tuple
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# A member name without escapes and its colon (and the whitespace up to the value),
+# matched without going through the decoder.
+_PLAIN_KEY = re.compile(r'[ \t\n\r]*"([^"\\]*)"[ \t\n\r]*:[ \t\n\r]*')
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+class _Scanner:
+    """
+    Reads a JSON document from a file in chunks; whole values are decoded with
+    `JSONDecoder.raw_decode`, so only the structure around them is scanned in Python.
+    """
+
+    def __init__(self, fp: IO[str], chunk_size: int):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self._scan_once = self.decoder.scan_once
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """
+        Drop the consumed text and append at least as much as is still pending, so a value
+        spanning many chunks is re-decoded a logarithmic number of times. False at end of file.
+        """
+        chunk = self.fp.read(max(self.chunk_size, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        The next non-whitespace character ("" at end of file), without consuming it.
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting {char!r}", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Most likely the value continues in the next chunk.
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next chunk ("12" + "34").
+            if end == len(self.buf) and isinstance(value, (int, float)) and not isinstance(value, bool):
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
+
+    def key(self) -> str:
+        plain = _PLAIN_KEY.match(self.buf, self.pos)
+        if plain is not None:
+            self.pos = plain.end()
+            return plain.group(1)
+        if self.peek() != '"':
+            raise json.JSONDecodeError("Expecting property name enclosed in double quotes", self.buf, self.pos)
+        key = self.value()
+        self.expect(":")
+        return key
+
+    def member(self) -> Tuple[str, Any]:
+        """
+        The next `"name": value` pair. Usually both are already in the buffer and are read
+        with one regex match and one call into the C scanner.
+        """
+        plain = _PLAIN_KEY.match(self.buf, self.pos)
+        if plain is not None:
+            try:
+                value, end = self._scan_once(self.buf, plain.end())
+            except (StopIteration, json.JSONDecodeError):
+                pass
+            else:
+                # Anything ending at the end of the buffer may be a number cut short.
+                if end < len(self.buf):
+                    self.pos = end
+                    return plain.group(1), value
+        return self.key(), self.value()
+
+    def separator(self, closing: str) -> bool:
+        """
+        Consume "," (True: another member follows) or the closing bracket (False).
+        """
+        if self.peek() == ",":
+            self.pos += 1
+            return True
+        self.expect(closing)
+        return False
+
+
+def iter_nested_items(fp: IO[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, Optional[str], Any]]:
+    """
+    Stream a JSON object of objects, {outer: {inner: value}}, one inner value at a time.
+
+    Memory is bounded by the largest inner value rather than by the document, and the first
+    values are available as soon as they have been read. Top-level values that are not
+    objects are yielded whole, with `inner` None.
+
+    Args:
+        fp: Text file positioned at the start of the document.
+        chunk_size: Characters read at a time.
+
+    Yields:
+        Tuple[str, Optional[str], Any]: (outer key, inner key, decoded inner value).
+
+    Raises:
+        json.JSONDecodeError: The document is malformed or truncated.
+    """
+    scanner = _Scanner(fp, chunk_size)
+    scanner.expect("{")
+    if scanner.peek() == "}":
+        scanner.pos += 1
+    else:
+        while True:
+            outer = scanner.key()
+            if scanner.peek() == "{":
+                scanner.pos += 1
+                if scanner.peek() == "}":
+                    scanner.pos += 1
+                else:
+                    while True:
+                        inner, value = scanner.member()
+                        yield outer, inner, value
+                        if not scanner.separator("}"):
+                            break
+            else:
+                yield outer, None, scanner.value()
+            if not scanner.separator("}"):
+                break
+    if scanner.peek():
+        raise json.JSONDecodeError("Extra data", scanner.buf, scanner.pos)
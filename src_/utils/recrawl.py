@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+from typing import Dict, Iterable, Optional
+
+from src_.core.url_analysis_agent import analysed_html
+from src_.entity.field_template import FieldTemplate
+from src_.utils.async_fetcher import AsyncFetcher
+
+
+def analysed_content_hash(page: dict) -> str:
+    """
+    SHA-256 of the part of a fetched page the URL analysis reads (see `analysed_html`).
+    Edits past it would not change the analysis, so they do not count as changes.
+    """
+    return hashlib.sha256(analysed_html(page["raw_html"]).encode("utf-8")).hexdigest()
+
+
+def apply_page_validators(entry: FieldTemplate, page: dict):
+    """
+    Copy the HTTP validators and analysed content hash of a fetch result onto a cache entry.
+    """
+    entry.etag = page.get("etag")
+    entry.last_modified = page.get("last_modified")
+    if page.get("raw_html") is not None:
+        entry.content_hash = analysed_content_hash(page)
+
+
+async def detect_changed_pages(
+    cache_data: Dict[str, FieldTemplate],
+    grouped_info: Dict[str, Dict[str, dict]],
+    sections: Optional[Iterable[str]] = None,
+    **fetcher_kwargs,
+) -> Dict[str, dict]:
+    """
+    Issue conditional GETs for every cached target that was already crawled and
+    report which pages actually changed since.
+
+    A page counts as unchanged when the server answers 304 or the hash of the content the
+    analysis reads (`analysed_content_hash`) matches the stored `content_hash`; validators of unchanged pages are refreshed in place. Entries
+    crawled before hashes were stored get their first hash recorded as a baseline.
+    Changed pages keep their old validators until the caller has re-analysed them
+    (see `apply_page_validators`), so a failed re-analysis is retried on the next refresh.
+
+    Args:
+        cache_data: Cache entries keyed by "section:name"; updated in place.
+        grouped_info: Output of `Playbook.target_info_grouping()`.
+        sections: Only re-fetch the pages of these sections (e.g. ["accounts"]); None for all.
+        **fetcher_kwargs: Passed to `AsyncFetcher`.
+
+    Returns:
+        Dict[str, dict]: {cache_key: fetch result (including raw_html)} for changed pages.
+    """
+    wanted = set(sections) if sections is not None else None
+    candidates = {}
+    for section_name, section_data in grouped_info.items():
+        if wanted is not None and section_name not in wanted:
+            continue
+        for key, value_dict in section_data.items():
+            cache_key = f"{section_name}:{key}"
+            entry = cache_data.get(cache_key)
+            url = value_dict.get("url")
+            # New targets and changed URLs are crawled by the regular pass anyway.
+            if url and entry and entry.url == url and entry.crawled_content:
+                candidates[cache_key] = entry
+
+    changed = {}
+    async with AsyncFetcher(**fetcher_kwargs) as fetcher:
+        pages = await asyncio.gather(*(
+            fetcher.fetch(entry.url, etag=entry.etag, last_modified=entry.last_modified)
+            for entry in candidates.values()
+        ))
+
+    for (cache_key, entry), page in zip(candidates.items(), pages):
+        if not page["success"]:
+            print(f"[WARN] {cache_key} - Could not re-fetch {entry.url}: {page['error']}. Keeping cached data.")
+        elif page["not_modified"]:
+            print(f"[SKIP] {cache_key} - Not modified (304).")
+            apply_page_validators(entry, page)
+        elif entry.content_hash is None:
+            print(f"[BASELINE] {cache_key} - Recorded content hash.")
+            apply_page_validators(entry, page)
+        elif analysed_content_hash(page) == entry.content_hash:
+            print(f"[SKIP] {cache_key} - Content unchanged.")
+            apply_page_validators(entry, page)
+        else:
+            print(f"[CHANGED] {cache_key} - Page content changed, re-analysing.")
+            changed[cache_key] = page
+    return changed
@@ -0,0 +1,137 @@
+import re
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+from src_.core.metrics import metrics
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# BM25 term-frequency saturation and document-length normalisation.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Words too common in playbook descriptions to say anything about relevance.
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in into is it its of on or our that the their "
+    "them they this to we with who will your you can more than all also not but such these those".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased word tokens without stopwords; a trailing plural "s" is dropped so
+    "hospitals" and "hospital" match.
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS or len(token) < 2:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class RelevanceIndex:
+    """
+    Offline BM25 index over a small set of named descriptions (industries, personas,
+    healthcare subverticals), used to send only the relevant ones to the LLM.
+
+    The per-term BM25 weights of every document are precomputed into one matrix,
+    so scoring a query is a single matrix-vector product.
+
+    Usage:
+        index = RelevanceIndex([("Healthcare", "Hospitals and clinics ..."), ("Retail", "...")])
+        index.top_k("YMCA runs community health programs", k=3)
+    """
+
+    def __init__(self, documents: Sequence[Tuple[str, str]], k1: float = BM25_K1, b: float = BM25_B):
+        import numpy as np
+
+        self.names = [name for name, _ in documents]
+        tokenized = [tokenize(text) for _, text in documents]
+        self.vocabulary: Dict[str, int] = {}
+        for tokens in tokenized:
+            for token in tokens:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+
+        term_counts = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        for row, tokens in enumerate(tokenized):
+            for token in tokens:
+                term_counts[row, self.vocabulary[token]] += 1
+
+        lengths = term_counts.sum(axis=1, keepdims=True)
+        average_length = lengths.mean() if len(documents) else 0.0
+        document_frequency = (term_counts > 0).sum(axis=0)
+        idf = np.log1p((len(documents) - document_frequency + 0.5) / (document_frequency + 0.5))
+        norm = k1 * (1 - b + b * lengths / average_length) if average_length else k1
+        self.weights = idf * term_counts * (k1 + 1) / (term_counts + norm)
+
+    def scores(self, query: str) -> "np.ndarray":
+        """
+        BM25 score of every document for the query, in document order.
+        """
+        import numpy as np
+
+        query_vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for token in tokenize(query):
+            column = self.vocabulary.get(token)
+            if column is not None:
+                query_vector[column] += 1
+        return self.weights @ query_vector
+
+    def top_k(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        Up to `k` (name, score) pairs with a positive score, best first.
+        """
+        scores = self.scores(query)
+        order = (-scores).argsort(kind="stable")[:k]
+        return [(self.names[i], float(scores[i])) for i in order if scores[i] > 0]
+
+
+@lru_cache(maxsize=32)
+def _cached_index(documents: Tuple[Tuple[str, str], ...]) -> RelevanceIndex:
+    return RelevanceIndex(documents)
+
+
+def select_relevant(
+    query: str,
+    descriptions: List[Dict[str, str]],
+    k: int,
+    label: str,
+    text_key: str = "description",
+    keep_all_if_no_match: bool = True,
+) -> List[Dict[str, str]]:
+    """
+    The `k` descriptions most relevant to `query`, with their scores logged.
+
+    Args:
+        query (str): Account summary or knowledge to match against.
+        descriptions (List[Dict[str, str]]): Candidates, each with a "name" and a `text_key` field.
+        k (int): Maximum number of descriptions to keep.
+        label (str): What the candidates are, for the log line (e.g. "industries").
+        text_key (str): Field holding the description text.
+        keep_all_if_no_match (bool): Return every description when nothing matches the query
+            (e.g. an empty account summary), instead of none.
+
+    Returns:
+        List[Dict[str, str]]: The selected descriptions, best match first.
+    """
+    documents = tuple((d["name"], f"{d['name']} {d.get(text_key) or ''}") for d in descriptions)
+    if len(documents) <= k and keep_all_if_no_match:
+        return list(descriptions)
+    matches = _cached_index(documents).top_k(query, k)
+    metrics.inc("relevance_candidates_total", len(documents), kind=label)
+    if not matches:
+        if keep_all_if_no_match:
+            print(f"[RELEVANCE] {label}: no match, keeping all {len(documents)}")
+            return list(descriptions)
+        print(f"[RELEVANCE] {label}: no match")
+        return []
+    metrics.inc("relevance_selected_total", len(matches), kind=label)
+    print(f"[RELEVANCE] {label}: " + ", ".join(f"{name} ({score:.2f})" for name, score in matches)
+          + f" of {len(documents)}")
+    by_name = {d["name"]: d for d in descriptions}
+    return [by_name[name] for name, _ in matches]
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Generator, NamedTuple, Union
+
+
+class Call(NamedTuple):
+    """
+    Step of a retry policy: call the agent once. The result, or the exception the call
+    raised, is sent back into the policy.
+    """
+    use_cache: bool
+
+
+class Sleep(NamedTuple):
+    """
+    Step of a retry policy: wait before the next attempt.
+    """
+    seconds: float
+
+
+# A retry policy is a generator that yields Call and Sleep steps and returns the final result.
+# It holds the whole retry logic (result checks, cache bypass, retry metrics, error results),
+# so the sync and async entry points only differ in how they call the agent and sleep.
+RetryPolicy = Generator[Union[Call, Sleep], Any, Any]
+
+
+def run_with_retries(policy: RetryPolicy, call: Callable[[bool], Any]) -> Any:
+    """
+    Drive a retry policy with blocking calls.
+
+    Args:
+        policy: The retry policy generator.
+        call: Calls the agent once; gets whether the response cache may be used.
+
+    Returns:
+        Any: What the policy returns. Exceptions the policy raises propagate.
+    """
+    outcome, error = None, None
+    while True:
+        try:
+            step = policy.throw(error) if error is not None else policy.send(outcome)
+        except StopIteration as stop:
+            return stop.value
+        outcome, error = None, None
+        if isinstance(step, Sleep):
+            time.sleep(step.seconds)
+            continue
+        try:
+            outcome = call(step.use_cache)
+        except Exception as e:
+            error = e
+
+
+async def arun_with_retries(policy: RetryPolicy, call: Callable[[bool], Awaitable[Any]]) -> Any:
+    """
+    Async version of `run_with_retries`: `call` is awaited and sleeps do not block the loop.
+    """
+    outcome, error = None, None
+    while True:
+        try:
+            step = policy.throw(error) if error is not None else policy.send(outcome)
+        except StopIteration as stop:
+            return stop.value
+        outcome, error = None, None
+        if isinstance(step, Sleep):
+            await asyncio.sleep(step.seconds)
+            continue
+        try:
+            outcome = await call(step.use_cache)
+        except Exception as e:
+            error = e
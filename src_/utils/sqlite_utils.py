@@ -0,0 +1,41 @@
+import sqlite3
+from contextlib import contextmanager
+
+# How long a connection waits for another process's write lock before failing, in milliseconds.
+BUSY_TIMEOUT_MS = 30000
+
+
+def connect(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Open a SQLite database for use by several processes at once.
+
+    File databases are switched to WAL mode, so readers never block the single writer and
+    vice versa; `busy_timeout` makes a writer wait for another process's lock instead of
+    failing with "database is locked". The connection is in autocommit mode: group writes
+    with `immediate_transaction`.
+    """
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=check_same_thread)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    if db_path != ":memory:":
+        conn.execute("PRAGMA journal_mode = WAL")
+        # Durable at every checkpoint; a power loss may drop the last commits but never corrupts.
+        conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+@contextmanager
+def immediate_transaction(conn: sqlite3.Connection):
+    """
+    Write transaction that takes the database write lock up front (BEGIN IMMEDIATE).
+
+    A deferred transaction that reads first and writes later can fail with SQLITE_BUSY
+    without waiting when another process committed in between; taking the lock at BEGIN
+    makes concurrent writers queue on `busy_timeout` instead.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
@@ -0,0 +1,202 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+from src_.core.metrics import metrics
+
+DEFAULT_MODEL_NAME = "gpt-3.5-turbo"
+DEFAULT_ENCODING_NAME = "cl100k_base"
+# Distinct texts whose token counts are remembered.
+TOKEN_COUNT_CACHE_SIZE = 50000
+
+# Roughly one token per word fragment of up to four characters, with its leading whitespace.
+_APPROX_TOKEN_PATTERN = re.compile(r"\s*[^\s]{1,4}|\s+")
+
+
+class ApproximateEncoding:
+    """
+    Stand-in for a tiktoken encoding when the real one cannot be loaded (e.g. offline,
+    since tiktoken downloads its BPE files on first use). "Tokens" are short text pieces,
+    so counts land close to the real ones for English text and decode(encode(text)) == text.
+    """
+
+    name = "approximate"
+
+    def encode(self, text: str, **kwargs) -> List[str]:
+        return _APPROX_TOKEN_PATTERN.findall(text)
+
+    def encode_batch(self, texts: List[str], **kwargs) -> List[List[str]]:
+        return [self.encode(text) for text in texts]
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+def _encoding_name_for_model(model_name: str) -> str:
+    try:
+        from tiktoken.model import encoding_name_for_model
+        return encoding_name_for_model(model_name)
+    except (ImportError, KeyError):
+        return DEFAULT_ENCODING_NAME
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(encoding_name: str) -> Any:
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        print(f"[WARN] Could not load tiktoken encoding {encoding_name} ({e}). Using approximate token counts.")
+        return ApproximateEncoding()
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str = DEFAULT_MODEL_NAME) -> Any:
+    """
+    The tokenizer of a model, loaded once per process and shared by every caller.
+
+    Args:
+        model_name (str): OpenAI model name; unknown models use cl100k_base.
+
+    Returns:
+        The tiktoken Encoding, or an `ApproximateEncoding` if tiktoken cannot load it.
+    """
+    return _load_encoding(_encoding_name_for_model(model_name))
+
+
+class _TokenCountCache:
+    """
+    LRU of token counts keyed by (encoding, text digest), so long texts are not kept alive.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_COUNT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._counts: "OrderedDict[Tuple[str, bytes], int]" = OrderedDict()
+
+    @staticmethod
+    def key(encoding: Any, text: str) -> Tuple[str, bytes]:
+        return encoding.name, hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[int]:
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+            return count
+
+    def set(self, key: Tuple[str, bytes], count: int):
+        with self._lock:
+            self._counts[key] = count
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+_token_counts = _TokenCountCache()
+
+
+def count_tokens(text: str, model_name: str = DEFAULT_MODEL_NAME) -> int:
+    """
+    Exact token count of `text` for the model. Counts are memoised by text hash,
+    so the same company profile or prompt is tokenised once per process.
+    """
+    if not text:
+        return 0
+    encoding = get_encoding(model_name)
+    key = _token_counts.key(encoding, text)
+    count = _token_counts.get(key)
+    if count is None:
+        metrics.inc("token_count_cache_misses_total")
+        count = len(encoding.encode(text, disallowed_special=()))
+        _token_counts.set(key, count)
+    else:
+        metrics.inc("token_count_cache_hits_total")
+    return count
+
+
+def count_tokens_batch(texts: List[str], model_name: str = DEFAULT_MODEL_NAME) -> List[int]:
+    """
+    Token counts of many texts. Texts not seen before are encoded together with
+    `encode_batch`, which tiktoken spreads over threads.
+
+    Args:
+        texts (List[str]): Texts to count.
+        model_name (str): Model whose tokenizer is used.
+
+    Returns:
+        List[int]: One count per text, in order.
+    """
+    encoding = get_encoding(model_name)
+    keys = [_token_counts.key(encoding, text) for text in texts]
+    counts = [_token_counts.get(key) if text else 0 for key, text in zip(keys, texts)]
+    missing = [i for i, count in enumerate(counts) if count is None]
+    if missing:
+        metrics.inc("token_count_cache_misses_total", len(missing))
+        encoded = encoding.encode_batch([texts[i] for i in missing], disallowed_special=())
+        for i, tokens in zip(missing, encoded):
+            counts[i] = len(tokens)
+            _token_counts.set(keys[i], counts[i])
+    hits = len(texts) - len(missing)
+    if hits:
+        metrics.inc("token_count_cache_hits_total", hits)
+    return counts
+
+
+def count_prompt_tokens(prompt: str, model_name: str = DEFAULT_MODEL_NAME) -> int:
+    """
+    Token count of a prompt assembled from recurring blocks (company profile, instructions,
+    page sections), counted per paragraph. Paragraphs seen in earlier prompts come from the
+    memo, so only the target-specific parts are tokenised. The result can differ from
+    `count_tokens(prompt)` by a token or two per paragraph break.
+    """
+    paragraphs = prompt.split("\n\n")
+    return sum(count_tokens_batch(paragraphs, model_name)) + len(paragraphs) - 1
+
+
+def approx_tokens(text: str) -> int:
+    """
+    Constant-time estimate, about four characters per token for English text.
+    Good enough for budget checks that only need to be in the right ballpark.
+    """
+    return len(text) // 4 + 1
+
+
+def split_text_by_tokens(
+    text: str,
+    chunk_size: int,
+    chunk_overlap: int = 0,
+    model_name: str = DEFAULT_MODEL_NAME,
+) -> List[Tuple[str, int]]:
+    """
+    Split text into chunks of at most `chunk_size` tokens, tokenising the text only once.
+
+    Args:
+        text (str): Text to split.
+        chunk_size (int): Maximum tokens per chunk.
+        chunk_overlap (int): Tokens repeated at the start of the next chunk.
+        model_name (str): Model whose tokenizer is used.
+
+    Returns:
+        List[Tuple[str, int]]: (chunk text, chunk token count) pairs, in order.
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap must be smaller than chunk_size.")
+    encoding = get_encoding(model_name)
+    tokens = encoding.encode(text, disallowed_special=())
+    chunks = []
+    start = 0
+    while start < len(tokens):
+        window = tokens[start:start + chunk_size]
+        chunks.append((encoding.decode(window), len(window)))
+        if start + chunk_size >= len(tokens):
+            break
+        start += chunk_size - chunk_overlap
+    return chunks
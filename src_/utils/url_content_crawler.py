@@ -1,38 +1,26 @@
-import time
-from src_.core.url_analysis_agent import URLAnalysisAgent
-from langchain_core.exceptions import LangChainException
 import traceback
+from typing import Any, Callable, Optional
 
-def crawl_content_from_url(
-    url: str, 
-    model_name: str = "gpt-4o", 
-    temperature: float = 0.3,
-    max_retry: int = 3,
-    retry_delay: float = 1.0  # seconds
-) -> dict:
-    """
-    Use URLAnalysisAgent to crawl and summarize a URL content, with retry mechanism and exception handling.
+from src_.core.metrics import metrics
+from src_.core.url_analysis_agent import URLAnalysisAgent
+from src_.core.llm_backend import langchain_errors
+from src_.utils.retry_policy import Call, RetryPolicy, Sleep, arun_with_retries, run_with_retries
 
-    Args:
-        url (str): The URL to analyze.
-        raw_html (str): (Optional) The raw HTML content if already fetched.
-        context (str): (Optional) The context or domain info to guide the summarization.
-        model_name (str): Model name to use (default: gpt-4).
-        temperature (float): Sampling temperature (default: 0.3).
-        max_retry (int): Maximum number of retries if invalid response detected.
-        retry_delay (float): Delay between retries (in seconds).
+DEFAULT_MODEL_NAME = "gpt-4o"
+DEFAULT_TEMPERATURE = 0.3
 
-    Returns:
-        dict: Structured output from the Agent, including success flag, data, etc.
+
+def _crawl_retries(url: str, max_retry: int, retry_delay: float) -> RetryPolicy:
+    """
+    Retry policy of the URL analysis: an "Unable to determine" answer or a LangChain error
+    is retried up to `max_retry` times. Exhausted retries return the last result, or an
+    error result for LangChain errors.
     """
-    agent = URLAnalysisAgent(model_name=model_name, temperature=temperature)
-    
     attempt = 0
     while attempt <= max_retry:
         try:
-            result = agent.run({
-                "url": url,
-            })
+            # Retries bypass the response cache so they get a fresh completion.
+            result = yield Call(use_cache=attempt == 0)
 
             # Result template:
             # {
@@ -48,10 +36,11 @@ def crawl_content_from_url(
                 if attempt > max_retry:
                     print(f"[FAILED] Max retries reached for {url}. Returning last result.")
                     return result
+                metrics.inc("llm_retries_total", operation="crawl")
                 print(f"[RETRY] Received 'Unable to determine' for {url}. Retrying (attempt {attempt}/{max_retry})...")
-                time.sleep(retry_delay)
+                yield Sleep(retry_delay)
 
-        except LangChainException as lc_err:
+        except langchain_errors() as lc_err:
             attempt += 1
             if attempt > max_retry:
                 print(f"[FAILED] Max retries reached due to LangChain error for {url}. Last error: {lc_err}")
@@ -61,9 +50,77 @@ def crawl_content_from_url(
                     "data": None,
                     "error": str(lc_err)
                 }
+            metrics.inc("llm_retries_total", operation="crawl")
             print(f"[RETRY] LangChain error on attempt {attempt}/{max_retry} for {url}: {lc_err}. Retrying after {retry_delay} seconds...")
-            time.sleep(retry_delay)
+            yield Sleep(retry_delay)
 
         except Exception as e:
             print(f"[Unexpected Error] {traceback.format_exc()}")
             raise RuntimeError(f"Unexpected error during URL content crawling for {url}: {str(e)}") from e
+
+
+def crawl_content_from_url(
+    url: str, 
+    model_name: str = DEFAULT_MODEL_NAME, 
+    temperature: float = DEFAULT_TEMPERATURE,
+    max_retry: int = 3,
+    retry_delay: float = 1.0,  # seconds
+    raw_html: Optional[str] = None
+) -> dict:
+    """
+    Use URLAnalysisAgent to crawl and summarize a URL content, with retry mechanism and exception handling.
+
+    Args:
+        url (str): The URL to analyze.
+        raw_html (str): (Optional) The raw HTML content if already fetched.
+        context (str): (Optional) The context or domain info to guide the summarization.
+        model_name (str): Model name to use (default: gpt-4).
+        temperature (float): Sampling temperature (default: 0.3).
+        max_retry (int): Maximum number of retries if invalid response detected.
+        retry_delay (float): Delay between retries (in seconds).
+
+    Returns:
+        dict: Structured output from the Agent, including success flag, data, etc.
+    """
+    agent = URLAnalysisAgent(model_name=model_name, temperature=temperature)
+    inputs = {
+        "url": url,
+        "raw_html": raw_html or "",
+    }
+    return run_with_retries(
+        _crawl_retries(url, max_retry, retry_delay),
+        lambda use_cache: agent.run(inputs, use_cache=use_cache),
+    )
+
+
+async def acrawl_content_from_url(
+    url: str,
+    model_name: str = DEFAULT_MODEL_NAME,
+    temperature: float = DEFAULT_TEMPERATURE,
+    max_retry: int = 3,
+    retry_delay: float = 1.0,  # seconds
+    raw_html: Optional[str] = None,
+    stream: bool = False,
+    on_field: Optional[Callable[[str, Any], None]] = None,
+) -> dict:
+    """
+    Async version of `crawl_content_from_url`, sharing the same retry policy.
+    The LLM call goes through `BaseGPTAgent.arun` and the process-wide concurrency limit.
+
+    With stream=True (implied by on_field) the response is parsed while it streams
+    (`BaseGPTAgent.arun_stream`): `on_field(key, value)` gets each analysis field as soon as
+    it is complete, and malformed or truncated output is aborted and retried early.
+    A retry may deliver fields again; the latest value wins.
+    """
+    agent = URLAnalysisAgent(model_name=model_name, temperature=temperature)
+    inputs = {
+        "url": url,
+        "raw_html": raw_html or "",
+    }
+
+    async def call(use_cache: bool) -> dict:
+        if stream or on_field is not None:
+            return await agent.arun_stream(inputs, on_field=on_field, use_cache=use_cache)
+        return await agent.arun(inputs, use_cache=use_cache)
+
+    return await arun_with_retries(_crawl_retries(url, max_retry, retry_delay), call)
@@ -1,9 +1,10 @@
-import time
+import asyncio
 import traceback
-from typing import Optional
+from typing import Any, Callable, Optional
 
 from src_.core.insight_agent import InsightAgent  # 请确保路径正确
-from langchain_core.exceptions import LangChainException
+from src_.core.metrics import metrics
+from src_.core.llm_backend import langchain_errors
 
 async def crawl_content_from_url(
     url: str, 
@@ -12,7 +13,9 @@ async def crawl_content_from_url(
     max_retry: int = 3,
     retry_delay: float = 1.0,  # seconds
     raw_html: Optional[str] = None,
-    context: Optional[str] = None
+    context: Optional[str] = None,
+    stream: bool = False,
+    on_field: Optional[Callable[[str, Any], None]] = None,
 ) -> dict:
     """
     Use InsightAgent to deeply analyze and summarize the content of a URL or raw HTML.
@@ -25,6 +28,9 @@ async def crawl_content_from_url(
         temperature (float): LLM generation temperature.
         max_retry (int): Max retries on invalid output.
         retry_delay (float): Seconds to wait between retries.
+        stream (bool): Parse the response while it streams; malformed or truncated output is retried early.
+        on_field (callable, optional): Called with (field, value) as soon as each insight field is complete
+            (implies stream). A retry may deliver fields again; the latest value wins.
 
     Returns:
         dict: {
@@ -46,7 +52,11 @@ async def crawl_content_from_url(
             if context:
                 inputs["context"] = context
 
-            result = agent.run(inputs)
+            # Retries bypass the response cache so they get a fresh completion.
+            if stream or on_field is not None:
+                result = await agent.arun_stream(inputs, on_field=on_field, use_cache=attempt == 0)
+            else:
+                result = await agent.arun(inputs, use_cache=attempt == 0)
 
             if result.get("success") and result.get("data"):
                 return result
@@ -56,10 +66,11 @@ async def crawl_content_from_url(
                 print(f"[FAILED] Max retries reached for {url}. Returning last result.")
                 return result
 
+            metrics.inc("llm_retries_total", operation="insight")
             print(f"[RETRY] InsightAgent returned invalid/empty result. Retrying ({attempt}/{max_retry})...")
-            time.sleep(retry_delay)
+            await asyncio.sleep(retry_delay)
 
-        except LangChainException as lc_err:
+        except langchain_errors() as lc_err:
             attempt += 1
             if attempt > max_retry:
                 print(f"[FAILED] LangChain error max retries exceeded for {url}. Error: {lc_err}")
@@ -69,8 +80,9 @@ async def crawl_content_from_url(
                     "data": None,
                     "error": str(lc_err)
                 }
+            metrics.inc("llm_retries_total", operation="insight")
             print(f"[RETRY] LangChain error ({attempt}/{max_retry}): {lc_err}")
-            time.sleep(retry_delay)
+            await asyncio.sleep(retry_delay)
 
         except Exception as e:
             print(f"[Unexpected Error] {traceback.format_exc()}")
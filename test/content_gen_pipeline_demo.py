@@ -31,6 +31,7 @@ if __name__ == "__main__":
         account_info = account
         industry_descriptions = categorized_playbook_data["industries"]
         persona_descriptions = categorized_playbook_data["personas"]
+        subvertical_descriptions = categorized_playbook_data["subverticals"]
 
         # Define the positions (placeholders) in the HTML template
         positions = [
@@ -52,6 +53,7 @@ if __name__ == "__main__":
             persona_descriptions,
             positions,
             "data/landing_page.html",
+            subvertical_descriptions,
         )
 
         # Use the account name to create a unique output file
@@ -0,0 +1,234 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from src_.entity.field_template import FieldTemplate
+from src_.utils.async_fetcher import AsyncFetcher, fetch_grouped_target_urls
+from src_.utils.recrawl import detect_changed_pages
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+            server.connections.add(self.client_address)
+            server.requested.append(self.path)
+        time.sleep(0.05)
+        with server.lock:
+            server.in_flight -= 1
+
+        if self.path == "/missing":
+            body, status = b"not found", 404
+        elif self.path == "/etag" and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        else:
+            name = self.path.strip("/") or "home"
+            body = (
+                f"<html><head><title>{name}</title></head>"
+                f"<body><p>{'This paragraph is long enough to be kept as main text. ' * 2}</p></body></html>"
+            ).encode()
+            status = 200
+        if self.path == "/changing":
+            body += server.version.encode()
+        elif self.path == "/footer":
+            # Changes only past what the URL analysis reads.
+            body += b" " * 3000 + server.version.encode()
+        self.send_response(status)
+        if self.path == "/etag":
+            self.send_header("ETag", '"v1"')
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.peak = 0
+    server.connections = set()
+    server.requested = []
+    server.version = "1"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_many_respects_per_host_cap_and_reuses_connections(stand_in_server):
+    server, base_url = stand_in_server
+    urls = [f"{base_url}/page{i}" for i in range(12)] + [f"{base_url}/page0"]
+
+    async def run():
+        async with AsyncFetcher(max_concurrency=10, per_host_concurrency=3) as fetcher:
+            return await fetcher.fetch_many(urls)
+
+    results = asyncio.run(run())
+
+    assert len(results) == 12
+    assert results[f"{base_url}/page3"]["title"] == "page3"
+    assert results[f"{base_url}/page3"]["main_text"]
+    assert server.peak <= 3
+    # Keep-alive: 12 requests over at most 3 pooled connections.
+    assert len(server.connections) <= 3
+
+
+class _HostHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        totals = self.server.totals
+        with totals.lock:
+            totals.in_flight += 1
+            totals.peak = max(totals.peak, totals.in_flight)
+        time.sleep(self.server.delay)
+        with totals.lock:
+            totals.in_flight -= 1
+        body = b"<html><head><title>host</title></head><body><p>hello</p></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_slow_host_does_not_hold_global_slots_of_other_hosts():
+    # One server per host (distinct ports are distinct hosts to the fetcher).
+    totals = SimpleNamespace(lock=threading.Lock(), in_flight=0, peak=0)
+    servers = []
+    for delay in (0.5, 0.05, 0.05, 0.05):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _HostHandler)
+        server.totals, server.delay = totals, delay
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    slow, *fast = [f"http://127.0.0.1:{server.server_address[1]}" for server in servers]
+
+    async def run():
+        async with AsyncFetcher(max_concurrency=4, per_host_concurrency=2) as fetcher:
+            started = time.perf_counter()
+
+            async def timed(url):
+                result = await fetcher.fetch(url)
+                return result["success"], time.perf_counter() - started
+
+            slow_tasks = [asyncio.ensure_future(timed(f"{slow}/{i}")) for i in range(8)]
+            await asyncio.sleep(0)
+            fast_results = await asyncio.gather(*(timed(f"{base}/{i}") for base in fast for i in range(4)))
+            return await asyncio.gather(*slow_tasks), fast_results
+
+    try:
+        slow_results, fast_results = asyncio.run(run())
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    assert all(ok for ok, _ in slow_results + fast_results)
+    assert totals.peak <= 4
+    # The six slow requests queued on their host leave the other two global slots to the fast hosts.
+    assert max(elapsed for _, elapsed in fast_results) < 0.5
+
+
+def test_http_errors_are_returned_not_raised(stand_in_server):
+    _, base_url = stand_in_server
+
+    async def run():
+        async with AsyncFetcher() as fetcher:
+            return await fetcher.fetch(f"{base_url}/missing")
+
+    result = asyncio.run(run())
+
+    assert result["success"] is False
+    assert "404" in result["error"]
+
+
+def test_fetch_grouped_target_urls_maps_cache_keys(stand_in_server):
+    _, base_url = stand_in_server
+    grouped_info = {
+        "accounts": {"YMCA": {"url": f"{base_url}/ymca"}, "Apex Oil": {"text": "no url"}},
+        "industries": {"Healthcare": {"url": f"{base_url}/ymca", "text": "same page"}},
+    }
+
+    results = asyncio.run(fetch_grouped_target_urls(grouped_info))
+
+    assert set(results) == {"accounts:YMCA", "industries:Healthcare"}
+    assert results["industries:Healthcare"]["title"] == "ymca"
+
+
+def test_conditional_get_returns_not_modified(stand_in_server):
+    _, base_url = stand_in_server
+
+    async def run():
+        async with AsyncFetcher() as fetcher:
+            first = await fetcher.fetch(f"{base_url}/etag")
+            second = await fetcher.fetch(f"{base_url}/etag", etag=first["etag"])
+            return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first["not_modified"] is False and first["content_hash"]
+    assert second["not_modified"] is True
+
+
+def test_detect_changed_pages_only_reports_changed_content(stand_in_server):
+    server, base_url = stand_in_server
+    grouped_info = {"accounts": {
+        "Static": {"url": f"{base_url}/etag"},
+        "Changing": {"url": f"{base_url}/changing"},
+        "New": {"url": f"{base_url}/new"},
+        "Footer": {"url": f"{base_url}/footer"},
+    }}
+    cache_data = {
+        "accounts:Static": FieldTemplate(url=f"{base_url}/etag", crawled_content={"success": True}),
+        "accounts:Changing": FieldTemplate(url=f"{base_url}/changing", crawled_content={"success": True}),
+        "accounts:Footer": FieldTemplate(url=f"{base_url}/footer", crawled_content={"success": True}),
+    }
+
+    # First refresh records baselines, nothing is reported as changed.
+    assert asyncio.run(detect_changed_pages(cache_data, grouped_info)) == {}
+    assert cache_data["accounts:Static"].etag == '"v1"'
+
+    server.version = "2"
+    changed = asyncio.run(detect_changed_pages(cache_data, grouped_info))
+
+    assert list(changed) == ["accounts:Changing"]
+    assert "2" in changed["accounts:Changing"]["raw_html"]
+
+
+def test_refresh_limited_to_sections_only_fetches_their_pages(stand_in_server):
+    server, base_url = stand_in_server
+    grouped_info = {
+        "accounts": {"YMCA": {"url": f"{base_url}/changing"}},
+        "personas": {"CFO": {"url": f"{base_url}/cfo"}},
+    }
+    cache_data = {
+        "accounts:YMCA": FieldTemplate(url=f"{base_url}/changing", crawled_content={"success": True}, content_hash="old"),
+        "personas:CFO": FieldTemplate(url=f"{base_url}/cfo", crawled_content={"success": True}, content_hash="old"),
+    }
+
+    changed = asyncio.run(detect_changed_pages(cache_data, grouped_info, sections=["accounts"]))
+
+    assert list(changed) == ["accounts:YMCA"]
+    assert server.requested == ["/changing"]
+    assert cache_data["personas:CFO"].content_hash == "old"
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from src_.core.batcher import MicroBatcher
+from src_.core.fake_llm import FakeChatModel, schema_shaped_response
+from src_.core.llm_backend import set_chat_model_factory
+from src_.core.response_cache import ResponseCache, get_default_response_cache, set_default_response_cache
+from src_.utils.gen_customized_web_content import (
+    MAX_BATCH_TARGETS,
+    agenerate_customized_web_content_batch,
+    plan_rewrite_batches,
+)
+
+POSITIONS = [
+    {"banner": '<div id="banner">Old banner text</div>'},
+    {"intro": '<p id="intro">Old intro paragraph</p>'},
+]
+
+
+@pytest.fixture
+def prompts():
+    sent = []
+    previous_cache = get_default_response_cache()
+    set_default_response_cache(ResponseCache())
+    set_chat_model_factory(lambda **kwargs: FakeChatModel(responder=lambda prompt: sent.append(prompt) or respond(prompt)))
+    yield sent
+    set_chat_model_factory(None)
+    set_default_response_cache(previous_cache)
+
+
+def respond(prompt):
+    return schema_shaped_response(prompt)
+
+
+def _targets(count):
+    return [{"target_audience": f"Account {i}", "marketing_pitch": f"Pitch for account {i}."} for i in range(count)]
+
+
+def test_plan_rewrite_batches_respects_limits():
+    batches = plan_rewrite_batches(_targets(25), POSITIONS)
+    assert [len(batch) for batch in batches] == [MAX_BATCH_TARGETS, MAX_BATCH_TARGETS, 5]
+
+    # Huge sections leave room for one target per request only.
+    huge = [{"banner": "<p>" + "x" * 20000 + "</p>"}]
+    assert [len(batch) for batch in plan_rewrite_batches(_targets(3), huge)] == [1, 1, 1]
+
+    # Target names key the batched output, so duplicates go to separate batches.
+    duplicates = _targets(2) + _targets(1)
+    assert [len(batch) for batch in plan_rewrite_batches(duplicates, POSITIONS)] == [2, 1]
+
+
+def test_batch_sends_sections_once(prompts):
+    results = asyncio.run(agenerate_customized_web_content_batch(_targets(4), POSITIONS))
+
+    assert len(prompts) == 1
+    assert prompts[0].count("Old banner text") == 1
+    assert [list(result) for result in results] == [["banner", "intro"]] * 4
+    assert all(f"Account {i}" in results[i]["banner"] for i in range(4))
+
+
+def test_batch_falls_back_to_single_requests_on_parse_failure(prompts, monkeypatch):
+    monkeypatch.setattr(
+        __name__ + ".respond",
+        lambda prompt: "not json" if "### Target:" in prompt else schema_shaped_response(prompt),
+    )
+    results = asyncio.run(agenerate_customized_web_content_batch(_targets(3), POSITIONS))
+
+    assert len(prompts) == 4
+    assert all(f"Account {i}" in results[i]["intro"] for i in range(3))
+
+
+def test_micro_batcher_groups_concurrent_calls():
+    batches = []
+
+    async def process(items):
+        batches.append(items)
+        return [ValueError(item) if item == 3 else item * 10 for item in items]
+
+    async def main():
+        batcher = MicroBatcher(process, max_size=4, max_wait=0.01)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(6)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert batches == [[0, 1, 2, 3], [4, 5]]
+    assert results[:3] == [0, 10, 20] and isinstance(results[3], ValueError) and results[4:] == [40, 50]
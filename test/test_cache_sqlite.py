@@ -0,0 +1,39 @@
+import json
+
+from src_.entity.cache import Cache
+from src_.entity.field_template import FieldTemplate
+
+
+def test_save_cache_only_writes_changed_entries(tmp_path):
+    cache = Cache(str(tmp_path / "cache.db"))
+    cache.cache_data["accounts:YMCA"] = FieldTemplate(text="a", url="https://www.ymca.org/")
+    cache.cache_data["accounts:Apex Oil"] = FieldTemplate(text="b", url="https://apexoil.com/")
+    cache.save_cache()
+
+    cache.cache_data["accounts:YMCA"].marketing_pitch = "pitch"
+    del cache.cache_data["accounts:Apex Oil"]
+    cache.save_cache()
+
+    reloaded = Cache(str(tmp_path / "cache.db"))
+    assert set(reloaded.cache_data) == {"accounts:YMCA"}
+    assert reloaded.get("accounts:YMCA").marketing_pitch == "pitch"
+    assert reloaded.keys_in_section("accounts") == ["accounts:YMCA"]
+
+
+def test_batch_defers_writes_until_exit(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = Cache(db_path)
+    with cache.batch():
+        cache.upsert("personas:CFO", FieldTemplate(text="cfo"))
+        assert Cache(db_path).get("personas:CFO") is None
+    assert Cache(db_path).get("personas:CFO").text == "cfo"
+
+
+def test_import_json_cache_runs_once(tmp_path):
+    legacy_path = tmp_path / "cache.json"
+    legacy_path.write_text(json.dumps({"accounts:YMCA": {"text": "a", "url": "u"}}))
+    cache = Cache(str(tmp_path / "cache.db"))
+
+    assert cache.import_json_cache(str(legacy_path)) == 1
+    assert cache.import_json_cache(str(legacy_path)) == 0
+    assert Cache(str(tmp_path / "cache.db")).get("accounts:YMCA").url == "u"
@@ -0,0 +1,57 @@
+from bs4 import BeautifulSoup
+
+from src_.utils.compiled_template import CompiledTemplate, load_compiled_template
+
+HTML_PATH = "data/landing_page.html"
+PLACEHOLDERS = [
+    "hs_cos_wrapper_banner",
+    "hs_cos_wrapper_widget_1611686344563",
+    "hs_cos_wrapper_widget_1609866779313",
+]
+
+
+def test_placeholder_text_matches_beautifulsoup():
+    template = load_compiled_template(HTML_PATH)
+    soup = BeautifulSoup(template.source, "html.parser")
+
+    for placeholder in PLACEHOLDERS:
+        assert template.text(placeholder) == soup.find(id=placeholder).get_text(strip=True)
+
+
+def test_render_only_replaces_inner_content():
+    template = CompiledTemplate(
+        '<div id="a"><p>old <b>bold</b></p><br></div><span id="b">keep</span>'
+    )
+
+    html = template.render({"a": "<p>new</p>", "missing": "x"})
+
+    assert html == '<div id="a"><p>new</p></div><span id="b">keep</span>'
+
+
+def test_render_escapes_replacements_of_text_only_elements():
+    template = CompiledTemplate('<h1 id="t">Old</h1><div id="d"><p>x</p></div><p id="e"></p>')
+
+    html = template.render({"t": "A & B <C>", "d": "<p>new &amp; more</p>", "e": "<b>bold</b>"})
+
+    assert html == (
+        '<h1 id="t">A &amp; B &lt;C&gt;</h1><div id="d"><p>new &amp; more</p></div><p id="e"><b>bold</b></p>'
+    )
+
+
+def test_unclosed_elements_end_with_their_parent():
+    template = CompiledTemplate('<div id="outer"><p id="inner">text</div>tail')
+
+    assert template.inner_html("inner") == "text"
+    assert template.outer_html("outer") == '<div id="outer"><p id="inner">text</div>'
+
+
+def test_extract_positions_skips_unknown_ids():
+    template = load_compiled_template(HTML_PATH)
+
+    extracted = template.extract_positions(
+        [{"placeholder": PLACEHOLDERS[0]}, {"placeholder": "does_not_exist"}]
+    )
+
+    assert list(extracted[0]) == [PLACEHOLDERS[0]]
+    assert extracted[0][PLACEHOLDERS[0]].startswith('<div id="hs_cos_wrapper_banner"')
+    assert len(extracted) == 1
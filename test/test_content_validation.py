@@ -0,0 +1,60 @@
+import json
+import re
+
+from src_.core.fake_llm import FakeChatModel, schema_shaped_response
+from src_.core.llm_backend import set_chat_model_factory
+from src_.core.response_cache import ResponseCache, get_default_response_cache, set_default_response_cache
+from src_.utils.content_validation import validate_placeholder, validate_replacements
+from src_.utils.gen_customized_web_content import generate_customized_web_content
+
+
+def test_validate_placeholder():
+    assert validate_placeholder("<p>YMCA helps families</p>", 20, "YMCA") == []
+    assert validate_placeholder("<p>ymca helps families</p>", 20, "YMCA") == []
+
+    problems = validate_placeholder("<p>Helps families</p>", 15, "YMCA")
+    assert problems == ['does not mention "YMCA"']
+
+    problems = validate_placeholder("<p>YMCA helps families and friends everywhere</p>", 20, "YMCA")
+    assert len(problems) == 1 and problems[0].startswith("text is 42 characters")
+
+    problems = validate_placeholder("<div><p>YMCA helps families</div>", 20, "YMCA")
+    assert any(problem.startswith("malformed HTML") for problem in problems)
+
+
+def test_validate_replacements_reports_missing_placeholders():
+    failures = validate_replacements({"a": "<p>YMCA</p>"}, {"a": 4, "b": 4}, "YMCA")
+    assert failures == {"b": ["missing from the response"]}
+
+
+def test_retry_only_rerequests_failing_placeholders():
+    prompts = []
+
+    def responder(prompt):
+        prompts.append(prompt)
+        rewritten = json.loads(schema_shaped_response(prompt))
+        if len(prompts) == 1:
+            rewritten["intro"] = "<p>Nobody in particular</p>"
+        return json.dumps(rewritten)
+
+    previous_cache = get_default_response_cache()
+    set_default_response_cache(ResponseCache())
+    set_chat_model_factory(lambda **kwargs: FakeChatModel(responder=responder))
+    try:
+        rewritten = generate_customized_web_content(
+            target_audience="YMCA",
+            positions=[
+                {"banner": '<div id="banner">Old banner text</div>'},
+                {"intro": '<p id="intro">Old intro paragraph</p>'},
+            ],
+            marketing_pitch="pitch",
+        )
+    finally:
+        set_chat_model_factory(None)
+        set_default_response_cache(previous_cache)
+
+    assert len(prompts) == 2
+    assert re.findall(r"- Tag: (\S+)", prompts[1]) == ["intro"]
+    assert "does not mention" in prompts[1]
+    assert list(rewritten) == ["banner", "intro"]
+    assert all("YMCA" in html for html in rewritten.values())
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src_.core.fake_llm import FakeChatModel, constant_latency, fake_chat_model_factory
+from src_.core.landing_page_pipeline import LandingPageRun
+from src_.core.llm_backend import set_chat_model_factory
+from src_.core.pipeline import targets_from_grouped_info
+from src_.core.response_cache import ResponseCache, get_default_response_cache, set_default_response_cache
+from src_.entity.cache import Cache
+from src_.utils.gen_customized_web_content import generate_customized_web_content
+from src_.utils.url_content_crawler import crawl_content_from_url
+
+
+@pytest.fixture
+def fake_backend():
+    previous_cache = get_default_response_cache()
+    set_default_response_cache(ResponseCache())
+    set_chat_model_factory(fake_chat_model_factory())
+    yield
+    set_chat_model_factory(None)
+    set_default_response_cache(previous_cache)
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"<html><head><title>page</title></head><body><p>hello</p></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_canned_responses_and_latency():
+    model = FakeChatModel(responses={"ping": "pong"}, latency=constant_latency(0.05))
+
+    started = time.perf_counter()
+    assert model.invoke("say ping").content == "pong"
+    assert time.perf_counter() - started >= 0.05
+    assert asyncio.run(model.ainvoke("ping again")).content == "pong"
+    assert model.call_count == 2
+
+
+def test_agents_run_offline_with_schema_shaped_responses(fake_backend):
+    positions = [{"banner": "<div id=\"banner\">Old</div>"}, {"intro": "<p id=\"intro\">Old</p>"}]
+
+    analysis = crawl_content_from_url("https://example.com", raw_html="<p>hi</p>")
+    rewritten = generate_customized_web_content(
+        target_audience="YMCA", positions=positions, marketing_pitch="pitch"
+    )
+
+    assert analysis["success"] and "summary" in analysis["data"]
+    assert list(rewritten) == ["banner", "intro"]
+    assert "YMCA" in rewritten["banner"]
+
+
+def test_landing_page_run_end_to_end(fake_backend, tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    grouped_info = {"accounts": {
+        "YMCA": {"url": f"{base_url}/ymca", "text": "Community centers"},
+        "No URL": {"text": "nothing to crawl"},
+    }}
+    run = LandingPageRun(
+        cache=Cache(str(tmp_path / "cache.db")),
+        company_info_text="Stampli",
+        html_path="data/landing_page.html",
+        positions=[{"placeholder": "hs_cos_wrapper_banner"}],
+        output_dir=str(tmp_path / "output"),
+    )
+    try:
+        ymca, no_url = asyncio.run(run.run(targets_from_grouped_info(grouped_info)))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert set(ymca.status.values()) == {"done"}
+    assert no_url.status["crawl"] == "skipped"
+    assert (tmp_path / "output" / "accounts:YMCA.json").exists()
+    assert "YMCA" in (tmp_path / "output" / "accounts:YMCA.html").read_text()
+    assert run.cache.get("accounts:YMCA").fingerprints.keys() == {"crawl", "pitch", "rewrite"}
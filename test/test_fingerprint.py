@@ -0,0 +1,35 @@
+from src_.entity.field_template import FieldTemplate
+from src_.entity.fingerprint import (
+    crawl_fingerprint,
+    is_stale,
+    pitch_fingerprint,
+    record_fingerprint,
+)
+
+
+def test_fingerprint_changes_with_inputs_and_model():
+    base = crawl_fingerprint("https://example.com")
+
+    assert crawl_fingerprint("https://example.com") == base
+    assert crawl_fingerprint("https://example.org") != base
+    assert crawl_fingerprint("https://example.com", model_name="other-model") != base
+
+
+def test_pitch_depends_on_upstream_output_not_upstream_inputs():
+    crawled = {"success": True, "summary": "same"}
+
+    first = pitch_fingerprint("YMCA", "text", crawled, "company")
+    second = pitch_fingerprint("YMCA", "text", dict(crawled), "company")
+
+    assert first == second
+    assert pitch_fingerprint("YMCA", "text", {"success": True, "summary": "new"}, "company") != first
+
+
+def test_record_and_is_stale():
+    entry = FieldTemplate()
+    fp = crawl_fingerprint("https://example.com")
+
+    assert is_stale(entry, "crawl", fp)
+    record_fingerprint(entry, "crawl", fp)
+    assert not is_stale(entry, "crawl", fp)
+    assert is_stale(entry, "pitch", fp)
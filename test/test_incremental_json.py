@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import pytest
+
+from src_.core.fake_llm import fake_chat_model_factory
+from src_.core.llm_backend import set_chat_model_factory
+from src_.core.metrics import metrics
+from src_.core.response_cache import ResponseCache
+from src_.core.url_analysis_agent import URLAnalysisAgent
+from src_.utils.incremental_json import IncrementalJSONParser, JSONStreamError, TruncatedJSONError
+
+DOCUMENT = {
+    "summary": 'Quotes \\" and braces } { inside "strings", commas, too.',
+    "products": ["invoices", {"name": "approvals", "tags": ["a", "b"]}],
+    "score": 4.5,
+    "public": True,
+}
+
+
+def test_fields_complete_as_they_close():
+    parser = IncrementalJSONParser()
+    text = json.dumps(DOCUMENT, indent=2)
+    completed = []
+    for char in text:
+        completed.extend(key for key, _ in parser.feed(char))
+        if char == "," and parser.fields.get("summary") and "products" not in parser.fields:
+            # "summary" is usable while "products" is still streaming.
+            assert completed == ["summary"]
+    assert completed == list(DOCUMENT)
+    assert parser.close() == DOCUMENT
+
+
+def test_code_fence_and_empty_object():
+    parser = IncrementalJSONParser()
+    parser.feed('```json\n{"a": 1}\n```')
+    assert parser.close() == {"a": 1}
+    assert IncrementalJSONParser().feed("{}") == []
+
+
+def test_garbage_is_detected_early():
+    with pytest.raises(JSONStreamError):
+        IncrementalJSONParser().feed("Sure! Here is the JSON")
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1, ')
+    with pytest.raises(JSONStreamError):
+        parser.feed('"b": nope, "c": 2')
+    with pytest.raises(JSONStreamError):
+        IncrementalJSONParser().feed('{"a": 1} and some commentary')
+
+
+def test_truncated_output():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"a": 1, "b": "unfinis') == [("a", 1)]
+    with pytest.raises(TruncatedJSONError):
+        parser.close()
+
+
+def _agent(content):
+    set_chat_model_factory(fake_chat_model_factory(responses={"webpage content analyst": content}))
+    try:
+        return URLAnalysisAgent(model_name="gpt-4o", response_cache=ResponseCache())
+    finally:
+        set_chat_model_factory(None)
+
+
+def test_agent_streams_fields_and_caches():
+    fields = []
+    agent = _agent(json.dumps(DOCUMENT))
+    result = asyncio.run(agent.arun_stream({"url": "https://example.com"}, on_field=lambda k, v: fields.append(k)))
+
+    assert result["success"] and result["data"] == DOCUMENT
+    assert fields == list(DOCUMENT)
+    # A cached answer replays its fields too.
+    fields.clear()
+    asyncio.run(agent.arun_stream({"url": "https://example.com"}, on_field=lambda k, v: fields.append(k)))
+    assert fields == list(DOCUMENT) and agent.llm.call_count == 1
+
+
+@pytest.mark.parametrize("content, reason", [
+    ("I cannot help with that. " * 50, "invalid"),
+    ('{"summary": "cut off mid sent', "truncated"),
+], ids=["invalid", "truncated"])
+def test_agent_aborts_bad_streams(content, reason):
+    metrics.reset()
+    result = asyncio.run(_agent(content).arun_stream({"url": "https://example.com"}))
+
+    assert not result["success"]
+    assert metrics.counter_value(
+        "llm_stream_aborts_total", reason=reason, agent="URLAnalysisAgent", model="gpt-4o"
+    ) == 1
+    if reason == "invalid":
+        # Aborted on the first chunk instead of reading the whole answer.
+        assert len(result["raw_output"]) < len(content)
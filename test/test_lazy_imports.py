@@ -0,0 +1,25 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ["langchain", "langchain_core", "langchain_openai", "openai", "requests", "bs4", "httpx", "numpy"]
+
+
+def _loaded_after_import(module: str) -> list:
+    probe = f"import json, sys; import {module}; print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    completed = subprocess.run(
+        [sys.executable, "-c", probe], capture_output=True, text=True, check=True, cwd=REPO_ROOT,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def test_cli_import_loads_no_heavy_dependencies():
+    assert _loaded_after_import("main") == []
+
+
+def test_content_gen_import_builds_no_llm_client():
+    # Without an API key, building a ChatOpenAI at import time would fail.
+    loaded = _loaded_after_import("src.marketing_content_gen_with_planner")
+    assert "langchain_openai" not in loaded and "openai" not in loaded
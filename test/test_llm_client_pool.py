@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src_.core.fake_llm import fake_chat_model_factory
+from src_.core.llm_backend import (
+    HTTPClientPool,
+    chat_model_registry,
+    default_chat_model_factory,
+    http_client_pool,
+    set_chat_model_factory,
+)
+from src_.core.metrics import metrics
+from src_.core.url_analysis_agent import URLAnalysisAgent
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_agents_share_one_model_per_settings():
+    set_chat_model_factory(fake_chat_model_factory())
+    try:
+        metrics.reset()
+        first = URLAnalysisAgent(model_name="gpt-4o", temperature=0.2)
+        second = URLAnalysisAgent(model_name="gpt-4o", temperature=0.2)
+        other = URLAnalysisAgent(model_name="gpt-4o", temperature=0.7)
+
+        assert first.llm is second.llm
+        assert other.llm is not first.llm
+        assert len(chat_model_registry) == 2
+        assert metrics.counter_value("llm_clients_created_total", model="gpt-4o") == 2
+        assert metrics.counter_value("llm_client_reuses_total", model="gpt-4o") == 1
+    finally:
+        set_chat_model_factory(None)
+    # Changing the factory drops the models it built.
+    assert len(chat_model_registry) == 0
+
+
+def test_openai_clients_use_the_shared_http_pool(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    model = default_chat_model_factory("gpt-4o", 0.2)
+    other = default_chat_model_factory("gpt-3.5-turbo", 0.7)
+
+    assert model.http_client is other.http_client is http_client_pool.sync_client()
+    assert model.http_async_client is other.http_async_client is http_client_pool.async_client()
+
+
+def test_async_pool_keeps_connections_alive_per_event_loop():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    pool = HTTPClientPool()
+
+    async def get_twice():
+        client = pool.async_client()
+        for _ in range(2):
+            response = await client.get(url)
+            assert response.text == "ok"
+        return pool.stats()["async_connections"]
+
+    try:
+        # Both requests of a loop reuse one kept-alive connection; a second asyncio.run still works.
+        assert asyncio.run(get_twice()) == 1
+        assert asyncio.run(get_twice()) >= 1
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from src_.core.fake_llm import fake_chat_model_factory
+from src_.core.llm_backend import set_chat_model_factory
+from src_.core.metrics import MetricsRegistry, metrics
+from src_.core.response_cache import ResponseCache
+from src_.core.url_analysis_agent import URLAnalysisAgent
+
+
+def test_counters_timings_and_exports():
+    registry = MetricsRegistry()
+    registry.inc("llm_retries_total", operation="crawl")
+    registry.inc("llm_retries_total", 2, operation="crawl")
+    with registry.timer("cache_save_seconds"):
+        pass
+    with pytest.raises(ValueError):
+        with registry.timer("cache_save_seconds"):
+            raise ValueError()
+
+    assert registry.counter_value("llm_retries_total", operation="crawl") == 3
+    assert registry.timing("cache_save_seconds").count == 2
+    prometheus = registry.to_prometheus()
+    assert '# TYPE llm_retries_total counter' in prometheus
+    assert 'llm_retries_total{operation="crawl"} 3' in prometheus
+    assert "cache_save_seconds_count 2" in prometheus
+    assert registry.snapshot()["counters"]["llm_retries_total"][0]["value"] == 3
+    assert "cache_save_seconds" in registry.summary_table()
+
+
+def test_agent_reports_tokens_and_cache_hits():
+    set_chat_model_factory(fake_chat_model_factory())
+    try:
+        agent = URLAnalysisAgent(model_name="gpt-4o", response_cache=ResponseCache())
+    finally:
+        set_chat_model_factory(None)
+    metrics.reset()
+
+    agent.run({"url": "https://example.com"})
+    asyncio.run(agent.arun({"url": "https://example.com"}))
+
+    labels = {"agent": "URLAnalysisAgent", "model": "gpt-4o"}
+    assert metrics.counter_value("llm_cache_misses_total", agent="URLAnalysisAgent") == 1
+    assert metrics.counter_value("llm_cache_hits_total", agent="URLAnalysisAgent") == 1
+    assert metrics.timing("llm_request_seconds", **labels).count == 1
+    assert metrics.timing("agent_run_seconds", **labels).count == 2
+    assert metrics.counter_value("llm_prompt_tokens_total", **labels) > 0
+    assert metrics.counter_value("llm_completion_tokens_total", **labels) > 0
@@ -0,0 +1,58 @@
+import multiprocessing
+import os
+
+import pytest
+
+from src_.entity.cache import Cache
+from src_.entity.field_template import FieldTemplate
+from src_.utils.file_lock import FileLock, FileLockTimeout, atomic_write
+
+
+def _write_entries(db_path, worker, count):
+    cache = Cache(db_path)
+    for i in range(count):
+        cache.upsert(f"accounts:worker{worker}-{i}", FieldTemplate(text=f"{worker}-{i}"))
+    with cache.batch():
+        cache.cache_data[f"personas:worker{worker}"] = FieldTemplate(text="batched")
+
+
+def test_processes_share_one_cache(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = Cache(db_path)
+    cache.upsert("accounts:existing", FieldTemplate(text="kept"))
+
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=_write_entries, args=(db_path, w, 25)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    assert len(Cache(db_path).cache_data) == 1 + 4 * 25 + 4
+    # Entries written by other processes are merged in; this process's own view survives.
+    cache.cache_data["accounts:existing"].text = "changed here"
+    assert cache.refresh() == 4 * 25 + 4
+    assert cache.cache_data["accounts:existing"].text == "changed here"
+    cache.save_cache()
+    assert Cache(db_path).get("accounts:existing").text == "changed here"
+    assert len(Cache(db_path).cache_data) == 1 + 4 * 25 + 4
+
+
+def test_file_lock_excludes_other_holders(tmp_path):
+    path = str(tmp_path / "run.lock")
+    with FileLock(path):
+        with pytest.raises(FileLockTimeout):
+            FileLock(path, timeout=0.1).acquire()
+    with FileLock(path, timeout=0):
+        pass
+
+
+def test_atomic_write_replaces_whole_file(tmp_path):
+    path = str(tmp_path / "out" / "page.html")
+    atomic_write(path, "<p>old</p>")
+    atomic_write(path, "<p>new</p>")
+
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "<p>new</p>"
+    assert os.listdir(tmp_path / "out") == ["page.html"]
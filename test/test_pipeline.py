@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from src_.core.pipeline import Pipeline, PipelineTarget, Stage, StageSkipped, targets_from_grouped_info
+
+
+def test_targets_flow_independently():
+    events = []
+
+    async def first(target):
+        # The slow target must not hold back the fast one's second stage.
+        await asyncio.sleep(0.1 if target.name == "slow" else 0)
+        events.append(("first", target.name))
+        return target.name.upper()
+
+    def second(target):
+        events.append(("second", target.name))
+        return target.outputs["first"] + "!"
+
+    pipeline = Pipeline([Stage("second", second, depends_on=["first"]), Stage("first", first)])
+    targets = [PipelineTarget("accounts", "slow"), PipelineTarget("accounts", "fast")]
+
+    results = asyncio.run(pipeline.run(targets))
+
+    assert pipeline.order == ["first", "second"]
+    assert events.index(("second", "fast")) < events.index(("first", "slow"))
+    assert [target.outputs["second"] for target in results] == ["SLOW!", "FAST!"]
+
+
+def test_stage_concurrency_limit():
+    state = {"in_flight": 0, "peak": 0}
+
+    async def limited(target):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+
+    pipeline = Pipeline([Stage("limited", limited, concurrency=2)])
+    asyncio.run(pipeline.run([PipelineTarget("accounts", str(i)) for i in range(10)]))
+
+    assert state["peak"] == 2
+
+
+def test_failure_and_skip_only_affect_downstream_of_that_target():
+    async def check(target):
+        if target.name == "broken":
+            raise RuntimeError("boom")
+        if target.name == "empty":
+            raise StageSkipped()
+
+    async def after(target):
+        return "ok"
+
+    pipeline = Pipeline([Stage("check", check), Stage("after", after, depends_on=["check"])])
+    targets = targets_from_grouped_info({"accounts": {"broken": {}, "empty": {}, "fine": {}}})
+
+    broken, empty, fine = asyncio.run(pipeline.run(targets))
+
+    assert broken.status == {"check": "failed", "after": "skipped"}
+    assert broken.errors["check"] == "boom"
+    assert empty.status == {"check": "skipped", "after": "skipped"}
+    assert fine.status == {"check": "done", "after": "done"}
+
+
+def test_targets_are_read_lazily_with_a_bounded_window():
+    state = {"read": 0, "finished": 0, "in_flight": 0, "peak": 0}
+
+    def generate():
+        for i in range(20):
+            # A target is only read once one of the 3 in progress has finished.
+            assert state["read"] - state["finished"] < 3
+            state["read"] += 1
+            yield PipelineTarget("accounts", str(i))
+
+    async def work(target):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.001 * (20 - int(target.name)))
+        state["in_flight"] -= 1
+        state["finished"] += 1
+
+    pipeline = Pipeline([Stage("work", work)])
+    results = asyncio.run(pipeline.run(generate(), max_in_flight=3))
+
+    assert state["peak"] == 3
+    # Collected results keep the input order although later targets finish first.
+    assert [target.name for target in results] == [str(i) for i in range(20)]
+    state.update(read=0, finished=0)
+    assert asyncio.run(pipeline.run(generate(), max_in_flight=3, collect=False)) == []
+
+
+def test_invalid_graphs_are_rejected():
+    noop = lambda target: None
+
+    with pytest.raises(ValueError):
+        Pipeline([Stage("a", noop, depends_on=["missing"])])
+    with pytest.raises(ValueError):
+        Pipeline([Stage("a", noop, depends_on=["b"]), Stage("b", noop, depends_on=["a"])])
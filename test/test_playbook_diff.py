@@ -0,0 +1,101 @@
+from src_.core.incremental import IncrementalSchedule
+from src_.core.pipeline import PipelineTarget, targets_from_grouped_info
+from src_.entity.cache import Cache
+from src_.entity.field_template import FieldTemplate
+from src_.entity.playbook import Playbook, TargetInfo
+from src_.entity.playbook_diff import diff_snapshots, digest_target
+from src_.entity.target_records import PlaybookTargets
+
+
+def _playbook(accounts: dict) -> Playbook:
+    target_info = {"Accounts": {
+        name: {"data": [{"type": kind, "value": value} for kind, value in fields.items()]}
+        for name, fields in accounts.items()
+    }}
+    return Playbook(company_info=None, target_info=TargetInfo(PlaybookTargets.from_dict(target_info)))
+
+
+def _run(schedule: IncrementalSchedule, grouped_info: dict, failed=()) -> list:
+    scheduled = []
+    for target in schedule.select(targets_from_grouped_info(grouped_info)):
+        target.status = {"crawl": "failed" if target.name in failed else "done"}
+        schedule.finished(target)
+        scheduled.append(target.name)
+    schedule.finish()
+    return scheduled
+
+
+def test_diff_reports_added_removed_and_changed_fields():
+    old = _playbook({
+        "Kept": {"url": "https://kept.org"},
+        "Moved": {"url": "https://old.org", "text": "Same text"},
+        "Reworded": {"url": "https://reworded.org", "text": "Old text"},
+        "Gone": {"text": "Removed"},
+    })
+    new = _playbook({
+        "Kept": {"url": "https://kept.org"},
+        "Moved": {"url": "https://new.org", "text": "Same text"},
+        "Reworded": {"url": "https://reworded.org", "text": "New text"},
+        "Fresh": {"url": "https://fresh.org"},
+    })
+
+    diff = new.diff(old)
+
+    assert diff.added == ["accounts:Fresh"]
+    assert diff.removed == ["accounts:Gone"]
+    assert diff.changed == {"accounts:Moved": ("url",), "accounts:Reworded": ("text",)}
+    assert diff.unchanged == 1
+    assert diff.affected == {"accounts:Fresh", "accounts:Moved", "accounts:Reworded"}
+    assert not new.diff(new)
+
+
+def test_digest_tells_missing_from_empty_fields():
+    assert digest_target({"url": "https://a.org"}) != digest_target({"url": "https://a.org", "text": ""})
+    diff = diff_snapshots({"accounts:A": digest_target({"url": "x"})}, [("accounts:A", digest_target({"text": "x"}))])
+    assert diff.changed == {"accounts:A": ("url", "text")}
+
+
+def test_schedule_runs_only_affected_targets_and_drops_removed_ones(tmp_path):
+    cache = Cache(str(tmp_path / "cache.db"))
+    grouped_info = {"accounts": {
+        "A": {"url": "https://a.org"},
+        "B": {"url": "https://b.org"},
+        "C": {"url": "https://c.org"},
+    }}
+    for name in grouped_info["accounts"]:
+        cache.upsert(f"accounts:{name}", FieldTemplate(url=f"https://{name.lower()}.org"))
+    cache.upsert("company:Stampli", FieldTemplate(text="company"))
+
+    assert _run(IncrementalSchedule(cache, "v1"), grouped_info, failed={"C"}) == ["A", "B", "C"]
+
+    grouped_info["accounts"]["B"] = {"url": "https://b.org", "text": "Now with a description"}
+    del grouped_info["accounts"]["A"]
+    grouped_info["accounts"]["D"] = {"url": "https://d.org"}
+    # Reopened, as the next run would: the digests live in the store.
+    cache = Cache(str(tmp_path / "cache.db"))
+    schedule = IncrementalSchedule(cache, "v1")
+    # B changed, C failed last time, D is new; A was removed.
+    assert _run(schedule, grouped_info) == ["B", "C", "D"]
+    assert Cache(str(tmp_path / "cache.db")).get("accounts:A") is None
+    assert "accounts:A" not in cache.cache_data and cache.get("company:Stampli") is not None
+
+    assert _run(IncrementalSchedule(Cache(str(tmp_path / "cache.db")), "v1"), grouped_info) == []
+    # New prompts, template or company info: everything runs again.
+    assert _run(IncrementalSchedule(Cache(str(tmp_path / "cache.db")), "v2"), grouped_info) == ["B", "C", "D"]
+    forced = IncrementalSchedule(Cache(str(tmp_path / "cache.db")), "v2", forced=["accounts:C"])
+    assert _run(forced, grouped_info) == ["C"]
+
+
+def test_schedule_only_collects_removed_targets_of_selected_sections(tmp_path):
+    cache = Cache(str(tmp_path / "cache.db"))
+    grouped_info = {"accounts": {"A": {"url": "https://a.org"}}, "personas": {"CFO": {"text": "Finance"}}}
+    cache.upsert("personas:CFO", FieldTemplate(text="Finance"))
+    _run(IncrementalSchedule(cache, "v1"), grouped_info)
+
+    schedule = IncrementalSchedule(cache, "v1", sections=["accounts"])
+    targets = [PipelineTarget("accounts", "A", info={"url": "https://a.org"})]
+    assert list(schedule.select(targets)) == []
+    diff = schedule.finish()
+
+    assert diff.removed == [] and diff.unchanged == 1
+    assert cache.get("personas:CFO") is not None
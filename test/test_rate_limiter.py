@@ -0,0 +1,43 @@
+import asyncio
+
+from src_.core.rate_limiter import ModelLimits, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_requests_per_minute_queue_in_arrival_order():
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock)
+    limiter.set_limits("gpt-4o", ModelLimits(requests_per_minute=2, tokens_per_minute=10**6))
+
+    delays = [limiter.reserve("gpt-4o", 10) for _ in range(4)]
+
+    # Burst of two, then one request every 30 seconds, each caller behind the previous one.
+    assert delays == [0.0, 0.0, 30.0, 60.0]
+    clock.now = 60.0
+    assert limiter.reserve("gpt-4o", 10) == 30.0
+
+
+def test_tokens_per_minute_and_settle():
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock)
+    limiter.set_limits("gpt-4o", ModelLimits(requests_per_minute=1000, tokens_per_minute=600))
+
+    assert limiter.reserve("gpt-4o", 600) == 0.0
+    assert limiter.reserve("gpt-4o", 60) == 6.0
+    # The first call really used 120 tokens: the unused 480 go back to the bucket.
+    limiter.settle("gpt-4o", 600, 120)
+    assert limiter.reserve("gpt-4o", 60) == 0.0
+
+
+def test_unconfigured_models_are_not_throttled():
+    limiter = RateLimiter()
+
+    assert limiter.reserve("unknown-model", 10**9) == 0.0
+    assert asyncio.run(limiter.aacquire("unknown-model", 5)) == 5
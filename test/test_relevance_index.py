@@ -0,0 +1,32 @@
+from src_.utils.relevance_index import RelevanceIndex, select_relevant, tokenize
+
+INDUSTRIES = [
+    {"name": "Health Care", "description": "Hospitals, clinics and care providers managing patient services and medical suppliers."},
+    {"name": "Nonprofit", "description": "Charities and community organizations funded by donations and grants."},
+    {"name": "Construction", "description": "General contractors and builders with job costing and subcontractor invoices."},
+    {"name": "Retail", "description": "Stores and e-commerce brands with many suppliers and inventory purchases."},
+]
+
+
+def test_tokenize_drops_stopwords_and_plurals():
+    assert tokenize("The Hospitals and the clinics of Boston") == ["hospital", "clinic", "boston"]
+
+
+def test_top_k_ranks_by_bm25_score():
+    index = RelevanceIndex([(d["name"], d["description"]) for d in INDUSTRIES])
+
+    top = index.top_k("A community hospital funded by donations", k=2)
+
+    # "community", "funded" and "donations" outweigh the single "hospital" match.
+    assert [name for name, _ in top] == ["Nonprofit", "Health Care"]
+    assert all(score > 0 for _, score in top)
+    assert index.top_k("quantum chromodynamics", k=2) == []
+
+
+def test_select_relevant_prunes_and_falls_back():
+    selected = select_relevant("general contractor job costing", INDUSTRIES, k=1, label="industries")
+    assert [d["name"] for d in selected] == ["Construction"]
+
+    # Nothing matches: every description is kept, unless the caller only wants matches.
+    assert select_relevant("", INDUSTRIES, k=1, label="industries") == INDUSTRIES
+    assert select_relevant("", INDUSTRIES, k=1, label="industries", keep_all_if_no_match=False) == []
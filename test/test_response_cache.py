@@ -0,0 +1,51 @@
+from langchain.schema import HumanMessage
+
+from src_.core.response_cache import ResponseCache
+
+
+def test_key_depends_on_model_temperature_and_messages():
+    messages = [HumanMessage(content="Summarize https://www.ymca.org/")]
+    key = ResponseCache.make_key("gpt-4o", 0.3, messages)
+
+    assert key == ResponseCache.make_key("gpt-4o", 0.3, [HumanMessage(content="Summarize https://www.ymca.org/")])
+    assert key != ResponseCache.make_key("gpt-4o", 0.4, messages)
+    assert key != ResponseCache.make_key("gpt-3.5-turbo", 0.3, messages)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert len(cache) == 2
+
+
+def test_expired_entries_are_not_returned():
+    cache = ResponseCache(max_age_seconds=-1)
+    cache.set("a", "1")
+
+    assert cache.get("a") is None
+
+
+def test_hits_are_plain_reads_and_access_times_are_written_in_batches(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.db"))
+    cache.set("a", "1")
+    other = ResponseCache(str(tmp_path / "responses.db"))
+    # Another process holding the write lock does not block lookups.
+    other.conn.execute("BEGIN IMMEDIATE")
+    try:
+        assert cache.get("a") == "1"
+    finally:
+        other.conn.execute("ROLLBACK")
+
+    accessed = cache._touched["a"]
+    (stored,) = other.conn.execute("SELECT last_access FROM llm_responses WHERE key = 'a'").fetchone()
+    assert stored < accessed
+    # Written with the next write.
+    cache.set("b", "2")
+    (stored,) = other.conn.execute("SELECT last_access FROM llm_responses WHERE key = 'a'").fetchone()
+    assert stored == accessed and not cache._touched
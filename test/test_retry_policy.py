@@ -0,0 +1,53 @@
+import asyncio
+
+from langchain_core.exceptions import LangChainException
+
+from src_.utils.retry_policy import arun_with_retries, run_with_retries
+from src_.utils.url_content_crawler import _crawl_retries
+
+UNABLE = {"success": True, "data": "Unable to determine from the provided information"}
+
+
+def _scripted(outcomes):
+    """
+    A call that plays back `outcomes` (results or exceptions to raise), recording use_cache.
+    """
+    calls = []
+
+    def call(use_cache):
+        calls.append(use_cache)
+        outcome = outcomes[len(calls) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return call, calls
+
+
+def _run_both(outcomes, max_retry=3):
+    sync_call, sync_calls = _scripted(outcomes)
+    sync_result = run_with_retries(_crawl_retries("https://a.org", max_retry, 0), sync_call)
+
+    async_call, async_calls = _scripted(outcomes)
+
+    async def acall(use_cache):
+        return async_call(use_cache)
+
+    async_result = asyncio.run(arun_with_retries(_crawl_retries("https://a.org", max_retry, 0), acall))
+    assert sync_result == async_result and sync_calls == async_calls
+    return sync_result, sync_calls
+
+
+def test_sync_and_async_share_the_retry_policy():
+    result, calls = _run_both([UNABLE, LangChainException("overloaded"), {"success": True, "data": {"a": 1}}])
+
+    assert result == {"success": True, "data": {"a": 1}}
+    # Only the first attempt may be served from the response cache.
+    assert calls == [True, False, False]
+
+
+def test_exhausted_retries_return_the_error_result():
+    result, calls = _run_both([UNABLE, LangChainException("down"), LangChainException("down")], max_retry=2)
+
+    assert result == {"success": False, "url": "https://a.org", "data": None, "error": "down"}
+    assert len(calls) == 3
@@ -0,0 +1,96 @@
+import asyncio
+
+from src_.core.pipeline import DONE, FAILED, Pipeline, PipelineTarget, Stage
+from src_.core.run_journal import RunJournal
+
+
+class _Stages:
+    def __init__(self, failing):
+        self.failing = failing
+        self.calls = []
+        self.built = {}
+
+    def fetch(self, target):
+        self.calls.append(("fetch", target.name))
+        return target.info["text"]
+
+    def build(self, target):
+        self.calls.append(("build", target.name))
+        if target.name in self.failing:
+            raise RuntimeError(f"{target.name} is down")
+        self.built[target.key] = target.outputs["fetch"].upper()
+        return self.built[target.key]
+
+    def write(self, target):
+        self.calls.append(("write", target.name))
+        return target.outputs["build"] + "!"
+
+    def run(self, journal, targets):
+        pipeline = Pipeline([
+            Stage("fetch", self.fetch),
+            Stage("build", self.build, depends_on=["fetch"], resume=lambda target: self.built[target.key]),
+            Stage("write", self.write, depends_on=["build"]),
+        ], journal=journal)
+        try:
+            return asyncio.run(pipeline.run(targets))
+        finally:
+            journal.close()
+
+
+def _targets(**texts):
+    return [PipelineTarget("accounts", name, info={"text": text}) for name, text in texts.items()]
+
+
+def test_resume_skips_finished_units_and_retries_failed_ones(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    stages = _Stages(failing={"b", "c"})
+    stages.run(RunJournal(path, max_attempts=2), _targets(a="x", b="y", c="z"))
+
+    stages.calls.clear()
+    stages.failing = {"c"}
+    results = stages.run(RunJournal(path, resume=True, max_attempts=2), _targets(a="x", b="y", c="z"))
+
+    # "a" finished entirely; "b" and "c" re-fetch since their failed build needs the fetch output.
+    assert ("fetch", "a") not in stages.calls and ("write", "a") not in stages.calls
+    assert [call for call in stages.calls if call[1] == "b"] == [("fetch", "b"), ("build", "b"), ("write", "b")]
+    assert results[0].outputs["build"] == "X" and results[0].status["write"] == DONE
+    assert results[1].status["write"] == DONE
+
+    # "c" failed twice: it is given up on and reported, not retried again.
+    stages.calls.clear()
+    journal = RunJournal(path, resume=True, max_attempts=2)
+    assert [(r["target"], r["stage"]) for r in journal.permanent_failures()] == [("accounts:c", "build")]
+    assert "1 permanently failed" in journal.report()
+    results = stages.run(journal, _targets(a="x", b="y", c="z"))
+    assert ("build", "c") not in stages.calls
+    assert results[2].status["build"] == FAILED
+
+
+def test_changed_input_and_torn_records(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    stages = _Stages(failing=set())
+    stages.run(RunJournal(str(path)), _targets(a="x", b="y"))
+    with open(path, "a") as f:
+        f.write('{"target": "accounts:b", "sta')
+
+    stages.calls.clear()
+    stages.run(RunJournal(str(path), resume=True), _targets(a="x", b="changed"))
+
+    assert stages.calls == [("fetch", "b"), ("build", "b"), ("write", "b")]
+    stages.calls.clear()
+    stages.run(RunJournal(str(path), resume=True), _targets(a="x", b="changed"))
+    assert stages.calls == []
+
+
+def test_only_failed_units_of_the_run_stay_in_memory(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    stages = _Stages(failing={"b"})
+    journal = RunJournal(path)
+    stages.run(journal, _targets(a="x", b="y", c="z"))
+
+    assert list(journal._latest) == [("accounts:b", "build")]
+    assert "7 unit(s) finished, 1 failed" in journal.report()
+    # The file still holds every outcome for --resume.
+    resumed = RunJournal(path, resume=True)
+    assert len(resumed._latest) == 8
+    resumed.close()
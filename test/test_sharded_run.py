@@ -0,0 +1,106 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src_.core.landing_page_pipeline import LandingPageRun
+from src_.core.llm_backend import LLM_BACKEND_ENV
+from src_.core.metrics import metrics
+from src_.core.pipeline import PipelineTarget, targets_from_grouped_info
+from src_.core.run_journal import RunJournal
+from src_.core.sharded_run import partition_targets, run_sharded
+from src_.entity.cache import Cache
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"<html><head><title>page</title></head><body><p>hello</p></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_partition_targets_round_robin():
+    targets = [PipelineTarget("accounts", str(i)) for i in range(5)]
+
+    shards = partition_targets(targets, 2)
+
+    assert [[t.name for t in shard] for shard in shards] == [["0", "2", "4"], ["1", "3"]]
+    assert len(partition_targets(targets[:1], 4)) == 1
+
+
+def test_workers_stream_results_to_the_parent(tmp_path, monkeypatch):
+    # Spawned workers inherit the environment, so they talk to the fake LLM too.
+    monkeypatch.setenv(LLM_BACKEND_ENV, "fake")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    grouped_info = {"accounts": {
+        f"Account {i}": {"url": f"{base_url}/{i}", "text": f"Account {i} runs community centers"} for i in range(4)
+    }}
+    journal = RunJournal(str(tmp_path / "journal.jsonl"))
+    run = LandingPageRun(
+        cache=Cache(str(tmp_path / "cache.db")),
+        company_info_text="Stampli",
+        html_path="data/landing_page.html",
+        positions=[{"placeholder": "hs_cos_wrapper_banner"}],
+        output_dir=str(tmp_path / "output"),
+        journal=journal,
+    )
+    metrics.reset()
+    try:
+        results = run_sharded(run, targets_from_grouped_info(grouped_info), workers=2)
+    finally:
+        journal.close()
+        server.shutdown()
+        server.server_close()
+
+    assert sorted(target.name for target in results) == [f"Account {i}" for i in range(4)]
+    assert all(set(target.status.values()) == {"done"} for target in results)
+    # The parent wrote every output, cache entry and journal record.
+    assert "Account 3" in (tmp_path / "output" / "accounts:Account 3.html").read_text()
+    stored = Cache(str(tmp_path / "cache.db")).get("accounts:Account 0")
+    assert stored.rewritten_content and stored.fingerprints.keys() == {"crawl", "pitch", "rewrite"}
+    resumed = RunJournal(str(tmp_path / "journal.jsonl"), resume=True)
+    assert "20 unit(s) finished" in resumed.report()
+    resumed.close()
+    # Worker metrics are merged into this process's registry.
+    assert metrics.counter_value("pipeline_stage_runs_total", stage="render", status="done") == 4
+
+
+def test_targets_are_handed_out_lazily_in_shards(tmp_path, monkeypatch):
+    monkeypatch.setenv(LLM_BACKEND_ENV, "fake")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    read = []
+
+    def targets():
+        for i in range(20):
+            read.append(i)
+            yield PipelineTarget("accounts", f"Account {i}", info={"url": f"{base_url}/{i}", "text": "YMCA"})
+
+    read_when_finished = []
+    run = LandingPageRun(
+        cache=Cache(str(tmp_path / "cache.db")),
+        company_info_text="Stampli",
+        html_path="data/landing_page.html",
+        positions=[{"placeholder": "hs_cos_wrapper_banner"}],
+        output_dir=str(tmp_path / "output"),
+    )
+    try:
+        results = run_sharded(
+            run, targets(), workers=2, chunk_size=2, collect=False,
+            on_finished=lambda target: read_when_finished.append((len(read), target.status["render"])),
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert results == []
+    assert len(read_when_finished) == 20 and {status for _, status in read_when_finished} == {"done"}
+    # At most two shards per worker were read ahead when the first one finished.
+    assert read_when_finished[0][0] <= 2 * 2 * 2
+    assert (tmp_path / "output" / "accounts:Account 19.html").exists()
@@ -0,0 +1,70 @@
+import json
+
+from src.playbook_parser import PlaybookParser
+from src_.entity.target_records import PlaybookTargets, categorize_targets
+
+TARGET_INFO = {
+    "meta": {"position": 2},
+    "Accounts": {
+        "meta": {"position": 1},
+        "YMCA": {"data": [{"id": "1", "type": "url", "value": "https://www.ymca.org/"}]},
+        "Empty": {"data": []},
+    },
+    "Industries": {
+        "Nonprofit": {"data": [
+            {"id": "2", "type": "text", "value": "  Charities  "},
+            {"id": "3", "type": "url", "value": "https://example.com/nonprofit"},
+            {"id": "4", "type": "image", "value": "logo.png"},
+        ]},
+    },
+    "Personas": {"CFO": {"data": [{"id": "5", "type": "text", "value": "old"}, {"id": "6", "type": "text", "value": "new"}]}},
+    "Healthcare Subverticals": {"Clinics": {"data": [{"id": "7", "type": "text"}]}},
+}
+
+
+def test_records_keep_the_last_url_and_text():
+    targets = PlaybookTargets.from_dict(TARGET_INFO)
+
+    assert len(targets) == 5
+    nonprofit, = targets.section("Industries")
+    assert (nonprofit.url, nonprofit.text, nonprofit.context) == ("https://example.com/nonprofit", "  Charities  ",
+                                                                 "Charities https://example.com/nonprofit")
+    assert targets.section("Personas")[0].text == "new"
+    # Every record of a section shares one section string.
+    assert targets.section("Accounts")[0].section is targets.section("Accounts")[1].section
+
+
+def test_views_match_each_consumer_shape():
+    targets = PlaybookTargets.from_dict(TARGET_INFO)
+
+    assert targets.grouping() == {
+        "accounts": {"YMCA": {"url": "https://www.ymca.org/"}},
+        "industries": {"Nonprofit": {"url": "https://example.com/nonprofit", "text": "  Charities  "}},
+        "personas": {"CFO": {"text": "new"}},
+        "healthcare_subverticals": {},
+    }
+    descriptions = targets.descriptions()
+    assert descriptions["accounts"] == [{"name": "YMCA", "url": "https://www.ymca.org/"}, {"name": "Empty", "url": ""}]
+    assert descriptions["subverticals"] == [{"name": "Clinics", "description": "", "url": ""}]
+    assert [t["name"] for t in targets.flattened()] == ["YMCA", "Nonprofit", "CFO"]
+    assert targets.categorized()["personas"] == [{"name": "CFO", "context": "old new"}]
+
+
+def test_categorize_targets_drops_unknown_sections():
+    categorized = categorize_targets([
+        {"target_type": "Healthcare Subverticals", "name": "Clinics", "context": "x"},
+        {"target_type": "Partners", "name": "Acme", "context": "y"},
+    ])
+
+    assert categorized == {"accounts": [], "industries": [], "personas": [], "subverticals": [{"name": "Clinics", "context": "x"}]}
+
+
+def test_playbook_parser_reads_targets_once(tmp_path):
+    target_path = tmp_path / "target_info.json"
+    target_path.write_text(json.dumps(TARGET_INFO))
+
+    parser = PlaybookParser("data/company_info.json", str(target_path))
+
+    assert parser.parse_targets() == PlaybookTargets.from_json(str(target_path)).flattened()
+    assert parser.parse_targets()[1] == {"target_type": "Industries", "name": "Nonprofit",
+                                         "context": "Charities https://example.com/nonprofit"}
@@ -0,0 +1,51 @@
+import io
+import json
+
+import pytest
+
+from src_.core.pipeline import targets_from_grouped_info, targets_from_records
+from src_.entity.target_records import PlaybookTargets, stream_target_records
+from src_.utils.json_stream import iter_nested_items
+
+
+def test_nested_items_survive_any_chunk_boundary():
+    document = '{"meta": 2, "a\\\\b": {"x": 12345, "y": {"z": [true, null]}}, "empty": {}, "c": {"\\u00e9": "v"}}'
+    expected = [("meta", None, 2), ("a\\b", "x", 12345), ("a\\b", "y", {"z": [True, None]}), ("c", "é", "v")]
+
+    for chunk_size in (1, 2, 5, 1 << 16):
+        assert list(iter_nested_items(io.StringIO(document), chunk_size=chunk_size)) == expected
+
+
+@pytest.mark.parametrize("document", ['{"a": {"x": 1}', '{"a": 1} trailing', '["a"]', '{"a" 1}'])
+def test_nested_items_reject_malformed_documents(document):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_nested_items(io.StringIO(document), chunk_size=3))
+
+
+def test_streamed_targets_match_the_loaded_playbook():
+    streamed = list(stream_target_records("data/target_info.json"))
+
+    assert streamed == list(PlaybookTargets.from_json("data/target_info.json"))
+    grouped_info = PlaybookTargets.from_json("data/target_info.json").grouping()
+    expected = [(t.key, t.info) for t in targets_from_grouped_info(grouped_info, ["accounts", "personas"])]
+    assert [(t.key, t.info) for t in targets_from_records(iter(streamed), ["accounts", "personas"])] == expected
+
+
+def test_json_lines_targets(tmp_path):
+    path = tmp_path / "targets.jsonl"
+    path.write_text(
+        '{"section": "Accounts", "name": "YMCA", "data": [{"type": "url", "value": "https://www.ymca.org/"}]}\n'
+        "\n"
+        '{"section": "Personas", "name": "CFO", "data": [{"type": "text", "value": "Finance lead"}]}\n'
+    )
+
+    targets = list(targets_from_records(stream_target_records(str(path))))
+
+    assert [(t.key, t.info) for t in targets] == [
+        ("accounts:YMCA", {"url": "https://www.ymca.org/"}),
+        ("personas:CFO", {"text": "Finance lead"}),
+    ]
+
+    path.write_text('{"name": "no section"}\n')
+    with pytest.raises(ValueError, match="Line 1"):
+        list(stream_target_records(str(path)))
@@ -0,0 +1,45 @@
+from src_.core.metrics import metrics
+from src_.utils.token_counter import (
+    count_prompt_tokens,
+    count_tokens,
+    count_tokens_batch,
+    get_encoding,
+    split_text_by_tokens,
+)
+
+PROFILE = "Stampli automates accounts payable for mid-size businesses. " * 50
+
+
+def test_encoder_is_loaded_once():
+    assert get_encoding("gpt-3.5-turbo") is get_encoding("gpt-3.5-turbo")
+
+
+def test_counts_are_memoised():
+    metrics.reset()
+    first = count_tokens(PROFILE)
+    assert count_tokens(PROFILE) == first
+    assert metrics.counter_value("token_count_cache_misses_total") == 1
+    assert metrics.counter_value("token_count_cache_hits_total") == 1
+
+
+def test_batch_matches_single_counts():
+    texts = ["hello world", "", PROFILE, "a slightly longer sentence, with punctuation!"]
+    assert count_tokens_batch(texts) == [count_tokens(text) for text in texts]
+
+
+def test_prompt_counts_reuse_shared_paragraphs():
+    prompts = [f"Instructions.\n\n{PROFILE}\n\nTarget: Account {i}" for i in range(5)]
+    for prompt in prompts:
+        assert abs(count_prompt_tokens(prompt) - count_tokens(prompt)) <= 3
+
+    metrics.reset()
+    count_prompt_tokens("Instructions.\n\n" + PROFILE + "\n\nTarget: somebody new")
+    assert metrics.counter_value("token_count_cache_misses_total") == 1
+
+
+def test_split_text_by_tokens():
+    chunks = split_text_by_tokens(PROFILE, chunk_size=100, chunk_overlap=10)
+    assert all(token_count <= 100 for _, token_count in chunks)
+    assert len(chunks) > 1
+    assert PROFILE.startswith(chunks[0][0]) and PROFILE.endswith(chunks[-1][0])
+    assert sum(token_count for _, token_count in chunks) - 10 * (len(chunks) - 1) == len(get_encoding().encode(PROFILE))